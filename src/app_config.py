@@ -42,7 +42,9 @@ import app_cache
 import default_config
 import app_utils
 from common import CancelException
-from db_intf import DBCache
+from db_intf import DBCache, DB_RETENTION_MASTERNODES_DAYS, DB_RETENTION_PROPOSALS_DAYS, \
+    DB_RETENTION_UNCONFIRMED_TX_DAYS
+from tx_cache import TxCacheStore
 from encrypted_files import read_file_encrypted, write_file_encrypted
 from hw_common import HWType, HWNotConnectedException
 from wnd_utils import WndUtils, get_widget_font_color_blue, get_widget_font_color_green
@@ -207,6 +209,7 @@ class AppConfig(QObject):
         self.bip32_recursive_search = True
         self.cache_dir = ''
         self.tx_cache_dir = ''
+        self.tx_cache: Optional[TxCacheStore] = None
         self.app_config_file_name = ''
         self.log_dir = ''
         self.log_file = ''
@@ -222,6 +225,12 @@ class AppConfig(QObject):
         self.show_dash_value_in_fiat = True
         self.ui_use_dark_mode = False  # Use dark mode independently of the OS settings
         self.dust_treshold_value = 0.00001
+        self.rpc_conn_pool_size = app_defs.RPC_CONN_POOL_SIZE_DEFAULT
+        self.rpc_hedged_requests = False  # duplicate slow read-only RPC calls to another node
+        # retention (in days) of the cached data no longer used by the app, applied by the db maintenance
+        self.db_retention_masternodes_days = DB_RETENTION_MASTERNODES_DAYS
+        self.db_retention_proposals_days = DB_RETENTION_PROPOSALS_DAYS
+        self.db_retention_unconfirmed_tx_days = DB_RETENTION_UNCONFIRMED_TX_DAYS
 
         # attributes related to encryption cache data with hardware wallet:
         self.hw_generated_key = b"\xab\x0fs}\x8b\t\xb4\xc3\xb8\x05\xba\xd1\x96\x9bq`I\xed(8w\xbf\x95\xf0-\x1a\x14\xcb\x1c\x1d+\xcd"
@@ -483,6 +492,9 @@ class AppConfig(QObject):
         if self.db_intf:
             self.db_intf.close()
 
+        if self.tx_cache:
+            self.tx_cache.close()
+
     def save_cache_settings(self):
         if self.feature_register_dmn_automatic.get_value() is not None:
             app_cache.set_value('FEATURE_REGISTER_DMN_AUTOMATIC_' + self.dash_network,
@@ -542,6 +554,12 @@ class AppConfig(QObject):
         self.encrypt_config_file = src_config.encrypt_config_file
         self.ui_use_dark_mode = src_config.ui_use_dark_mode
         self.dust_treshold_value = src_config.dust_treshold_value
+        self.rpc_conn_pool_size = src_config.rpc_conn_pool_size
+        self.rpc_hedged_requests = src_config.rpc_hedged_requests
+        self.db_retention_masternodes_days = src_config.db_retention_masternodes_days
+        self.db_retention_proposals_days = src_config.db_retention_proposals_days
+        self.db_retention_unconfirmed_tx_days = src_config.db_retention_unconfirmed_tx_days
+        self.configure_db_retention()
 
     def configure_cache(self):
         if self.is_testnet:
@@ -567,6 +585,16 @@ class AppConfig(QObject):
                 except Exception as e:
                     logging.exception(str(e))
 
+        if not self.tx_cache or self.tx_cache.cache_dir != self.tx_cache_dir:
+            if self.tx_cache:
+                self.tx_cache.close()
+            self.tx_cache = TxCacheStore(self.tx_cache_dir)
+            try:
+                self.tx_cache.open()
+            except Exception as e:
+                logging.exception('Cannot open the transaction cache store: ' + str(e))
+                self.tx_cache = None
+
         # Copy the previous (v2) database files if files for the new version (v3) do not exist
         db_cache_file_name_path = os.path.join(self.cache_dir, db_cache_file_name)
         db_cache_file_name_prev_path = os.path.join(self.cache_dir, db_cache_file_name_prev)
@@ -588,6 +616,7 @@ class AppConfig(QObject):
             self.db_intf = DBCache()
             self.db_intf.open(db_cache_file_name_path, db_labels_file_name_path)
             self.db_cache_file_name = db_cache_file_name_path
+        self.configure_db_retention()
 
         try:
             cur = self.db_intf.get_cursor()
@@ -614,6 +643,12 @@ class AppConfig(QObject):
 
         self.restore_cache_settings()
 
+    def configure_db_retention(self):
+        if self.db_intf:
+            self.db_intf.retention_masternodes_days = self.db_retention_masternodes_days
+            self.db_intf.retention_proposals_days = self.db_retention_proposals_days
+            self.db_intf.retention_unconfirmed_tx_days = self.db_retention_unconfirmed_tx_days
+
     def reset_configuration(self):
         """
         Clears all the data structures that are loaded during the reading of the
@@ -824,6 +859,26 @@ class AppConfig(QObject):
                 except Exception:
                     self.dust_treshold_value = 0.00001
 
+                try:
+                    self.rpc_conn_pool_size = int(config.get(section, 'rpc_conn_pool_size',
+                                                             fallback=str(app_defs.RPC_CONN_POOL_SIZE_DEFAULT)))
+                    if self.rpc_conn_pool_size < 1:
+                        self.rpc_conn_pool_size = 1
+                except Exception:
+                    self.rpc_conn_pool_size = app_defs.RPC_CONN_POOL_SIZE_DEFAULT
+
+                self.rpc_hedged_requests = self.value_to_bool(
+                    config.get(section, 'rpc_hedged_requests', fallback='0'))
+
+                for attr_name, default in (('db_retention_masternodes_days', DB_RETENTION_MASTERNODES_DAYS),
+                                           ('db_retention_proposals_days', DB_RETENTION_PROPOSALS_DAYS),
+                                           ('db_retention_unconfirmed_tx_days', DB_RETENTION_UNCONFIRMED_TX_DAYS)):
+                    try:
+                        setattr(self, attr_name, max(int(config.get(section, attr_name, fallback=str(default))), 1))
+                    except Exception:
+                        setattr(self, attr_name, default)
+                self.configure_db_retention()
+
                 # with ini ver 3 we changed the connection password encryption scheme, so connections in new ini
                 # file will be saved under different section names - with this we want to disallow the old app
                 # version to read such network configuration entries, because passwords won't be decoded properly
@@ -1136,6 +1191,11 @@ class AppConfig(QObject):
         config.set(section, 'proposal_vote_time_offset_upper', str(self._proposal_vote_time_offset_upper))
         config.set(section, 'encrypt_config_file', '1' if self.encrypt_config_file else '0')
         config.set(section, 'dust_treshold_value', str(self.dust_treshold_value))
+        config.set(section, 'rpc_conn_pool_size', str(self.rpc_conn_pool_size))
+        config.set(section, 'rpc_hedged_requests', '1' if self.rpc_hedged_requests else '0')
+        config.set(section, 'db_retention_masternodes_days', str(self.db_retention_masternodes_days))
+        config.set(section, 'db_retention_proposals_days', str(self.db_retention_proposals_days))
+        config.set(section, 'db_retention_unconfirmed_tx_days', str(self.db_retention_unconfirmed_tx_days))
 
         # save mn configuration
         for idx, mn in enumerate(self.masternodes):
@@ -1252,6 +1312,11 @@ class AppConfig(QObject):
         all_data += str(self._proposal_vote_time_offset_upper)
         all_data += str(self.encrypt_config_file)
         all_data += str(self.dust_treshold_value)
+        all_data += str(self.rpc_conn_pool_size)
+        all_data += str(self.rpc_hedged_requests)
+        all_data += str(self.db_retention_masternodes_days)
+        all_data += str(self.db_retention_proposals_days)
+        all_data += str(self.db_retention_unconfirmed_tx_days)
 
         for mn in self.masternodes:
             all_data += mn.get_data_str()
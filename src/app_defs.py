@@ -17,6 +17,7 @@ FEE_DUFF_PER_BYTE = 1
 MIN_TX_FEE = 1000
 SCREENSHOT_MODE = False
 DEBUG_MODE = False
+RPC_CONN_POOL_SIZE_DEFAULT = 4  # max number of concurrent HTTP connections to an RPC node
 DEFAULT_LOG_FORMAT = '%(asctime)s %(levelname)s|%(name)s|%(threadName)s|%(filename)s|%(funcName)s|%(message)s'
 KnownLoggerType = collections.namedtuple('KnownLoggerType', 'name external')
 APP_PATH = ''
@@ -74,6 +75,7 @@ __KNOWN_LOGGERS = [
     KnownLoggerType(name='dmt.bip44_wallet', external=False),
     KnownLoggerType(name='dmt.dashd_intf', external=False),
     KnownLoggerType(name='dmt.db_intf', external=False),
+    KnownLoggerType(name='dmt.tx_cache', external=False),
     KnownLoggerType(name='dmt.proposals', external=False),
     KnownLoggerType(name='dmt.ext_item_model', external=False),
     KnownLoggerType(name='dmt.hw_intf', external=False),
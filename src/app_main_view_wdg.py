@@ -385,9 +385,9 @@ class WdgAppMainView(QWidget, QDetectThemeChange, ui_app_main_view_wdg.Ui_WdgApp
             active_date = self.edtNetMnsFilterWasActiveOn.date()
             dt = datetime(*active_date.getDate())
             if dt < datetime.now():
-                active_date_str = datetime.strftime(dt, '%Y-%m-%d')
-                cond = f"dmt_create_time < '{active_date_str}' and (dmt_deactivation_time is null or " \
-                       f"dmt_deactivation_time > '{active_date_str}')"
+                active_date_ts = int(dt.timestamp())
+                cond = f"dmt_create_time < {active_date_ts} and (dmt_deactivation_time is null or " \
+                       f"dmt_deactivation_time > {active_date_ts})"
             else:
                 # actually we can't predict whhiw masternode will be active in the future, so show none
                 cond = 'true=false'
@@ -1283,10 +1283,11 @@ class WdgAppMainView(QWidget, QDetectThemeChange, ui_app_main_view_wdg.Ui_WdgApp
         gi.superblock_cycle = _ginfo.get('superblockcycle')
         deadline_blocks = round(gi.superblock_cycle / 10)
 
-        last_superblock_ts = self.dashd_intf.get_block_timestamp(gi.last_superblock)
+        block_timestamps = self.dashd_intf.get_block_timestamps([gi.last_superblock, cur_block_height])
+        last_superblock_ts = block_timestamps[gi.last_superblock]
         gi.next_superblock_ts = 0
         if 0 < cur_block_height <= gi.next_superblock:
-            gi.next_superblock_ts = self.dashd_intf.get_block_timestamp(cur_block_height) + (
+            gi.next_superblock_ts = block_timestamps[cur_block_height] + (
                     gi.next_superblock - cur_block_height) * 2.5 * 60
 
         if gi.next_superblock_ts == 0:
@@ -1333,7 +1334,7 @@ class WdgAppMainView(QWidget, QDetectThemeChange, ui_app_main_view_wdg.Ui_WdgApp
         gi.blockchain_size_on_disk = bi.get('size_on_disk')
         gi.blocks = bi.get('blocks')
 
-        gi.last_block_ts = self.dashd_intf.get_block_timestamp(cur_block_height)
+        gi.last_block_ts = block_timestamps[cur_block_height]
         gi.loaded = True
 
     def get_mn_protx(self, masternode: MasternodeConfig, protx_list_registered: List[Dict]) -> Optional[Dict]:
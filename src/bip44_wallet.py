@@ -2,13 +2,14 @@
 # -*- coding: utf-8 -*-
 # Author: Bertrand256
 # Created on: 2018-07
+import json
 import threading
 import time
 import datetime
 import logging
 
 from PyQt5 import QtCore
-from typing import List, Dict, Tuple, Optional, Generator, Callable, Union
+from typing import List, Dict, Tuple, Optional, Generator, Callable, Union, Iterable
 from PyQt5.QtCore import QObject, Qt
 import app_utils
 import hw_intf
@@ -16,7 +17,7 @@ from common import CancelException
 from dash_utils import bip32_path_string_to_n, pubkey_to_address, bip32_path_n_to_string, bip32_path_string_append_elem
 from dashd_intf import DashdInterface
 from hw_common import HWNotConnectedException
-from db_intf import DBCache
+from db_intf import DBCache, UNCONFIRMED_TX_BLOCK_HEIGHT
 from thread_fun_dlg import CtrlObject
 from thread_utils import EnhRLock
 from wallet_common import Bip44AccountType, Bip44AddressType, UtxoType, TxOutputType, xpub_to_hash, Bip44Entry, \
@@ -29,9 +30,10 @@ MAX_ADDRESSES_TO_SCAN = 1000
 MAX_BIP44_ACCOUNTS = 200
 GET_BLOCKHEIGHT_MIN_SECONDS = 30
 UNCONFIRMED_TX_PURGE_SECONDS = 3600
-UNCONFIRMED_TX_BLOCK_HEIGHT = 99999999
 DEFAULT_TX_FETCH_PRIORITY = 1  # the higher the number to higher the priority
 ADDR_BALANCE_CONSISTENCY_CHECK_SECONDS = 3600
+TX_PROCESS_BATCH_SIZE = 100  # number of transactions whose addresses are resolved to db ids at once
+ADDRESS_RESOLVE_CHUNK_SIZE = 500
 
 log = logging.getLogger('dmt.bip44_wallet')
 
@@ -78,6 +80,9 @@ class Bip44Wallet(QObject):
         self.addresses_by_id: Dict[int, Bip44AddressType] = {}
         self.addresses_by_address: Dict[str, Bip44AddressType] = {}
 
+        # db ids of the addresses appearing in the transactions being processed, resolved in batches
+        self.address_ids_by_address: Dict[str, int] = {}
+
         # addresses whose balance has been modified since the last call of reset_tx_diffs
         self.addr_bal_updated: Dict[int, int] = {}  # {'address.id': 'address.id' }
 
@@ -163,6 +168,7 @@ class Bip44Wallet(QObject):
         self.account_by_bip32_path.clear()
         self.addresses_by_id.clear()
         self.addresses_by_address.clear()
+        self.address_ids_by_address.clear()
         self.utxos_by_id.clear()
         with self.subscribed_addrs_lock:
             self.__txes_subscribed_addrs.clear()
@@ -313,12 +319,33 @@ class Bip44Wallet(QObject):
     def get_tx_diff(self, added_utxos: List[UtxoType], removed_utxos: List[UtxoType]):
         pass
 
-    def get_address_id(self, address: str, db_cursor):
-        db_cursor.execute('select id from address where address=?', (address,))
-        row = db_cursor.fetchone()
-        if row:
-            return row[0]
-        return None
+    def get_address_id(self, address: str, db_cursor) -> int:
+        """
+        Returns the db id of an address appearing in transaction data, adding the address to the db as an external
+        one (not belonging to the wallet) if it's not there yet.
+        """
+        addr_id = self.address_ids_by_address.get(address)
+        if addr_id is None:
+            self._resolve_address_ids([address], db_cursor)
+            addr_id = self.address_ids_by_address[address]
+        return addr_id
+
+    def _resolve_address_ids(self, addresses: Iterable[str], db_cursor):
+        """
+        Resolves the db ids of the addresses not present in the self.address_ids_by_address map with a single query
+        per chunk of addresses; addresses that don't exist in the db are added as external ones.
+        """
+        missing = list({a for a in addresses if a and a not in self.address_ids_by_address})
+        for idx in range(0, len(missing), ADDRESS_RESOLVE_CHUNK_SIZE):
+            chunk = missing[idx: idx + ADDRESS_RESOLVE_CHUNK_SIZE]
+            db_cursor.execute('select address, min(id) from address where address in (' +
+                              ','.join(['?'] * len(chunk)) + ') group by address', chunk)
+            for address, addr_id in db_cursor.fetchall():
+                self.address_ids_by_address[address] = addr_id
+            for address in chunk:
+                if address not in self.address_ids_by_address:
+                    db_cursor.execute('insert into address(address, external) values(?,1)', (address,))
+                    self.address_ids_by_address[address] = db_cursor.lastrowid
 
     def get_address_item(self, address: str, create: bool) -> Optional[Bip44AddressType]:
         addr = self.addresses_by_address.get(address)
@@ -330,6 +357,12 @@ class Bip44Wallet(QObject):
                 row = db_cursor.fetchone()
                 if row:
                     addr_info = dict([(col[0], row[idx]) for idx, col in enumerate(db_cursor.description)])
+                    if addr_info.get('external'):
+                        if not create:
+                            return None
+                        # the address has been known only from the transaction data so far
+                        db_cursor.execute('update address set external=0 where id=?', (addr_info.get('id'),))
+                        self.db_intf.commit()
                     if not addr_info.get('path'):
                         parent_id = addr_info.get('parent_id')
                         address_index = addr_info.get('address_index')
@@ -393,11 +426,12 @@ class Bip44Wallet(QObject):
         addr.last_scan_block_height = address_dict.get('last_scan_block_height', 0)
         return addr
 
-    def _fill_temp_ids_table(self, ids: List[int], db_cursor, tab_sufix: str = ''):
-        db_cursor.execute(f"CREATE TEMPORARY TABLE IF NOT EXISTS temp_ids{tab_sufix}(id INTEGER PRIMARY KEY)")
-        db_cursor.execute(f'delete from temp_ids{tab_sufix}')
-        db_cursor.executemany(f'insert into temp_ids{tab_sufix}(id) values(?)',
-                              [(id,) for id in ids])
+    @staticmethod
+    def _ids_param(ids: Iterable[int]) -> str:
+        """ Returns a list of ids as a single sql parameter (JSON array) to be expanded by the json_each table
+        function, e.g.: 'where id in (select value from json_each(?))'. Unlike the formerly used temporary table,
+        it doesn't require any writes, so it doesn't start an implicit transaction on read-only connections. """
+        return json.dumps(list(ids))
 
     def _get_child_address(self, parent_key_entry: Bip44Entry, child_addr_index: int) -> Bip44AddressType:
         """
@@ -461,8 +495,8 @@ class Bip44Wallet(QObject):
                                 raise CacheInconsistencyException()
 
                             # address wasn't initially opened as a part of xpub account scan, so update its attrs
-                            db_cursor.execute('update address set parent_id=?, address_index=?, path=?, tree_id=? '
-                                              'where id=?',
+                            db_cursor.execute('update address set parent_id=?, address_index=?, path=?, tree_id=?, '
+                                              'external=0 where id=?',
                                               (parent_key_entry.id, child_addr_index, bip32_path, parent_key_entry.tree_id,
                                                row[0]))
 
@@ -507,7 +541,7 @@ class Bip44Wallet(QObject):
             except Exception:
                 raise
             finally:
-                if db_cursor.connection.total_changes > 0:
+                if db_cursor.connection.in_transaction:
                     self.db_intf.commit()
                 self.db_intf.release_cursor()
         return addr
@@ -715,7 +749,7 @@ class Bip44Wallet(QObject):
 
                         # check if there were no transactions for the address
                         if not self.addr_bal_updated.get(addr_id):
-                            db_cursor.execute('select 1 from tx_output o join address ao on ao.address=o.address '
+                            db_cursor.execute('select 1 from tx_output o join address ao on ao.id=o.address_id '
                                               'where ao.id=? and ao.tree_id=?', (addr_id, self.__tree_id))
                             if db_cursor.fetchone():
                                 break
@@ -776,21 +810,27 @@ class Bip44Wallet(QObject):
             if applicable.
             """
 
-            self._fill_temp_ids_table(addr_ids, db_cursor)
-
+            ids_param = self._ids_param(addr_ids)
             db_cursor.execute("""select tx_hash from tx where block_height=? and
-              (exists(select * from tx_input i join address ai on ai.address=i.src_address and ai.tree_id=?
-                      where i.tx_id=tx.id and ai.id in (select id from temp_ids)) or
-               exists(select * from tx_output o join address ao on ao.address=o.address and ao.tree_id=? 
-                      where o.tx_id=tx.id and ao.id in (select id from temp_ids))) 
+              (exists(select * from tx_input i join address ai on ai.id=i.src_address_id and ai.tree_id=?
+                      where i.tx_id=tx.id and ai.id in (select value from json_each(?))) or
+               exists(select * from tx_output o join address ao on ao.id=o.address_id and ao.tree_id=? 
+                      where o.tx_id=tx.id and ao.id in (select value from json_each(?)))) 
               and block_timestamp < ?
-            """, (UNCONFIRMED_TX_BLOCK_HEIGHT, self.__tree_id, self.__tree_id,
+            """, (UNCONFIRMED_TX_BLOCK_HEIGHT, self.__tree_id, ids_param, self.__tree_id, ids_param,
                   int(time.time() - 20 * 60)))
 
             for tx_hash, in db_cursor.fetchall():
-                tx_json = self._getrawtransaction(tx_hash, skip_cache=True)
+                tx_json = self._getrawtransaction(self._unwrap_txid(tx_hash), skip_cache=True)
                 yield tx_json
 
+        def get_txs_addresses(txs: List[Dict]) -> Generator[str, None, None]:
+            for tx_json in txs:
+                for vin in tx_json.get('vin', []):
+                    yield vin.get('address')
+                for vout in tx_json.get('vout', []):
+                    yield vout.get('scriptPubKey', {}).get('address')
+
         def process_transactions(tx_iterator: Generator[Dict, None, None], skip_cache=False):
             last_time_checked = time.time()
             last_nr = 0
@@ -799,6 +839,17 @@ class Bip44Wallet(QObject):
             log.debug(f'Starting process_transactions')
 
             tx_nr = 0
+            tx_batch = []
+
+            def process_batch():
+                nonlocal tx_nr
+                # resolve the db ids of all addresses appearing in the batch at once
+                self._resolve_address_ids(get_txs_addresses(tx_batch), db_cursor)
+                for tx_json in tx_batch:
+                    self._process_transaction(db_cursor, tx_json.get('txid'), tx_json=tx_json, skip_cache=skip_cache)
+                    tx_nr += 1
+                tx_batch.clear()
+
             for tx_entry in tx_iterator:
                 self.scan_metrics_txes_fetched += 1
                 tx_id = tx_entry.get('txid')
@@ -806,8 +857,9 @@ class Bip44Wallet(QObject):
                     log.error('TX JSON does not have the "txid" attribute')
                     continue
 
-                self._process_transaction(db_cursor, tx_id, tx_json=tx_entry, skip_cache=skip_cache)
-                tx_nr += 1
+                tx_batch.append(tx_entry)
+                if len(tx_batch) >= TX_PROCESS_BATCH_SIZE:
+                    process_batch()
 
                 if int(time.time() - last_time_checked) > 1:  # feedback every 1s
                     if check_break_process_fun and check_break_process_fun():
@@ -816,6 +868,8 @@ class Bip44Wallet(QObject):
                         self.on_fetch_account_txs_feedback(tx_nr - last_nr)
                         last_time_checked = time.time()
                         last_nr = tx_nr
+            if tx_batch:
+                process_batch()
 
             tm_diff = round(time.time() - tm_start, 2)
             log.debug(f'Finished process_transactions - tx fetched count: {tx_nr}, fetch time: {tm_diff} s')
@@ -835,14 +889,15 @@ class Bip44Wallet(QObject):
 
         db_cursor = self.db_intf.get_cursor()
         try:
-            self._fill_temp_ids_table(addr_ids, db_cursor)
+            self.address_ids_by_address.clear()
 
             # Check the minimum block number from which scanning for new transactions will be done for all of the input
             # addresses; if there are any addresses not used before (last_scan_block_height=0) discard their
             # last_scan_block_height value to avoid a full-rescan of all the other addresses; here we assume that
             # fresh addresses (that weren't needed during previous scans) do not have any transactions;
             db_cursor.execute('select min(last_scan_block_height) from address where last_scan_block_height is not null'
-                              ' and last_scan_block_height > 0 and id in (select id from temp_ids)')
+                              ' and last_scan_block_height > 0 and id in (select value from json_each(?))',
+                              (self._ids_param(addr_ids),))
 
             row = db_cursor.fetchone()
             if row:
@@ -859,7 +914,9 @@ class Bip44Wallet(QObject):
 
             # Update all unspent transaction outputs according to the db cache that seem to being spent anyway
             for addr_info in addr_info_list:
-                db_cursor.execute('select o.id, o.address, i.src_address, tx1.id, '
+                # two branches of union instead of 'o.address_id=? or i.src_address_id=?', which would force
+                # a full scan of the tx_output table
+                db_cursor.execute('select o.id, o.address_id, i.src_address_id, tx1.id, '
                                   'i.input_index spent_input_index_matching,'
                                    ' tx2.tx_hash spent_tx_hash_matching '
                                    'from tx_output o '
@@ -868,10 +925,19 @@ class Bip44Wallet(QObject):
                                    '         i.src_tx_output_index=o.output_index '
                                    '    join tx tx2 on tx2.id=i.tx_id '
                                    '  where (o.spent_tx_hash is null or o.spent_input_index is null)'
-                                   '  and (o.address=? or i.src_address=?)',
-                    (addr_info.address, addr_info.address))
+                                   '  and o.address_id=? '
+                                   'union '
+                                   'select o.id, o.address_id, i.src_address_id, tx1.id, i.input_index, tx2.tx_hash '
+                                   'from tx_input i '
+                                   '    join tx tx1 on tx1.tx_hash=i.src_tx_hash'
+                                   '    join tx_output o on o.tx_id=tx1.id and '
+                                   '         o.output_index=i.src_tx_output_index '
+                                   '    join tx tx2 on tx2.id=i.tx_id '
+                                   '  where (o.spent_tx_hash is null or o.spent_input_index is null)'
+                                   '  and i.src_address_id=?',
+                    (addr_info.id, addr_info.id))
 
-                for output_id, address1, address2, tx_id, spent_index, spent_tx_hash in \
+                for output_id, address1_id, address2_id, tx_id, spent_index, spent_tx_hash in \
                     db_cursor.fetchall():
                     db_cursor.execute('update tx_output set spent_tx_hash=?, spent_input_index=? where id=?',
                                       (spent_tx_hash, spent_index, output_id))
@@ -879,14 +945,10 @@ class Bip44Wallet(QObject):
                     self._utxo_modified(output_id)
 
                     addrs_to_update = []
-                    if address1 is not None:
-                        address1_id = self.get_address_id(address1, db_cursor)
-                        if address1_id:
-                            addrs_to_update.append(address1_id)
-                    if address2 is not None:
-                        address2_id = self.get_address_id(address2, db_cursor)
-                        if address2_id:
-                            addrs_to_update.append(address2_id)
+                    if address1_id is not None:
+                        addrs_to_update.append(address1_id)
+                    if address2_id is not None:
+                        addrs_to_update.append(address2_id)
 
                     if addrs_to_update:
                         self._update_addr_balances(account=None, addr_ids=addrs_to_update, db_cursor=db_cursor)
@@ -917,42 +979,51 @@ class Bip44Wallet(QObject):
             process_transactions(txes)
 
             if last_block_height > 0:
-                for a in addr_info_list:
-                    if time.time() - a.last_balance_verify_ts >= ADDR_BALANCE_CONSISTENCY_CHECK_SECONDS:
-                        log.debug('Verifying address balance consistency. Id: %s', a.id)
-                        try:
-                            b = _cur_addr_balances.get(a.address)
-                            if b is None:
-                                log.warning('No balance info for address: ' + a.address)
-                            else:
-                                # refresh data since it might have been changed in earlier stages
-                                a.read_from_db(db_cursor)
-                                current_balance = b.get('balance')
-                                a.last_balance_verify_ts = int(time.time())
-                                if current_balance is not None and current_balance != a.balance:
-                                    log.warning(f'Balance of address {a.address}, id: {a.id} discrepency; cached '
-                                                f'balance: {a.balance} ({app_utils.to_string(a.balance / 1e8)} Dash), '
-                                                f'network balance: {current_balance} ({app_utils.to_string(current_balance / 1e8)} Dash)')
-
-                                    txes = self.dashd_intf.getaddressdeltasrawtx_dmt(addresses=[a.address], start = 0,
-                                                                                     end = max_block_height, verbose=1,
-                                                                                     include_mempool=1)
-
-                                    # we need to re-fetch data from the network to exclude possible invalid data
-                                    # that got into the cache due to some network problems or chain reorganization
-                                    process_transactions(txes, skip_cache=True)
-
-                                    if a.id in self.addr_bal_updated:
-                                        addr_ids_to_update_balance.append(a.id)
-                        except Exception as e:
-                            log.error('Address balance check error: %s', str(e))
-                        log.debug('Finished verifying address balance consistency. Id: %s', a.id)
+                addrs_to_verify = [a for a in addr_info_list if time.time() - a.last_balance_verify_ts >=
+                                   ADDR_BALANCE_CONSISTENCY_CHECK_SECONDS]
+                if addrs_to_verify:
+                    # make sure the balances maintained by the db triggers match the cached transactions and
+                    # refresh the data, since it might have been changed in earlier stages
+                    verify_ids = [a.id for a in addrs_to_verify]
+                    addr_ids_to_update_balance.extend(self._verify_addr_balances(db_cursor, addr_ids=verify_ids))
+                    db_cursor.execute('select id, balance from address where id in (select value from json_each(?))',
+                                      (self._ids_param(verify_ids),))
+                    cached_balances = {id: balance for id, balance in db_cursor.fetchall()}
+
+                for a in addrs_to_verify:
+                    log.debug('Verifying address balance consistency. Id: %s', a.id)
+                    try:
+                        b = _cur_addr_balances.get(a.address)
+                        if b is None:
+                            log.warning('No balance info for address: ' + a.address)
+                        else:
+                            cached_balance = cached_balances.get(a.id, a.balance)
+                            current_balance = b.get('balance')
+                            a.last_balance_verify_ts = int(time.time())
+                            if current_balance is not None and current_balance != cached_balance:
+                                log.warning(f'Balance of address {a.address}, id: {a.id} discrepency; cached '
+                                            f'balance: {cached_balance} ({app_utils.to_string(cached_balance / 1e8)} Dash), '
+                                            f'network balance: {current_balance} ({app_utils.to_string(current_balance / 1e8)} Dash)')
+
+                                txes = self.dashd_intf.getaddressdeltasrawtx_dmt(addresses=[a.address], start = 0,
+                                                                                 end = max_block_height, verbose=1,
+                                                                                 include_mempool=1)
+
+                                # we need to re-fetch data from the network to exclude possible invalid data
+                                # that got into the cache due to some network problems or chain reorganization
+                                process_transactions(txes, skip_cache=True)
+
+                                if a.id in self.addr_bal_updated and a.id not in addr_ids_to_update_balance:
+                                    addr_ids_to_update_balance.append(a.id)
+                    except Exception as e:
+                        log.error('Address balance check error: %s', str(e))
+                    log.debug('Finished verifying address balance consistency. Id: %s', a.id)
 
             if addr_ids_to_update_balance:
                 self._update_addr_balances(account=None, addr_ids=addr_ids_to_update_balance)
 
         finally:
-            if db_cursor.connection.total_changes > 0:
+            if db_cursor.connection.in_transaction:
                 self.db_intf.commit()
             self.db_intf.release_cursor()
 
@@ -975,11 +1046,10 @@ class Bip44Wallet(QObject):
                     cached on the local filesystem or not;
         :return: Tuple[int <transaction db id>, Optional[Dict <transaction details json>]]
         """
-        tx_hash = self._wrap_txid(tx_hash)
-
         try:
             if not tx_json:
                 tx_json = self._getrawtransaction(tx_hash, skip_cache=skip_cache)
+            tx_hash = self._wrap_txid(tx_hash)
 
             db_cursor.execute('select id, block_height from tx where tx_hash=?', (tx_hash, ))
             row = db_cursor.fetchone()
@@ -1039,13 +1109,13 @@ class Bip44Wallet(QObject):
                 # remove redundant outputs and inputs that may be leftover after entering orphaned forks or other read
                 # errors from RCP nodes
                 # 1. outputs:
-                db_cursor.execute('select id, address from tx_output where tx_id=?', (tx_id,))
+                db_cursor.execute('select id, address_id from tx_output where tx_id=?', (tx_id,))
                 for _id, _ in db_cursor.fetchall():
                     if _id not in existing_output_ids:
                         db_cursor.execute('delete from tx_output where id=?', (_id,))
 
                 # 2. inputs:
-                db_cursor.execute('select id, src_address from tx_input where tx_id=?', (tx_id,))
+                db_cursor.execute('select id, src_address_id from tx_input where tx_id=?', (tx_id,))
                 for _id, _ in db_cursor.fetchall():
                     if _id not in existing_input_ids:
                         db_cursor.execute('delete from tx_input where id=?', (_id,))
@@ -1056,12 +1126,12 @@ class Bip44Wallet(QObject):
             raise
         return tx_id, tx_json
 
-    def _process_tx_output_entry(self, db_cursor, tx_id: int, tx_hash: str, output_index: int, tx_json: Dict) \
+    def _process_tx_output_entry(self, db_cursor, tx_id: int, tx_hash: bytes, output_index: int, tx_json: Dict) \
             -> Optional[int]:
         """
         :param db_cursor: database curso
         :param tx_id: db id of the record in the 'tx' table
-        :param tx_hash: transaction hash
+        :param tx_hash: transaction hash in the db form (see _wrap_txid)
         :param output_index: the output index in the transaction outputs list
         :param tx_json: transaction body as a JSON object
         :return: id of the related record in the 'tx_output' table
@@ -1094,15 +1164,15 @@ class Bip44Wallet(QObject):
                     spent_input_index = None
                     spent_tx_hash = None
 
-                db_cursor.execute('select id, address, satoshis, spent_tx_hash, spent_input_index '
+                db_cursor.execute('select id, address_id, satoshis, spent_tx_hash, spent_input_index '
                                   'from tx_output where tx_id=? and output_index=?', (tx_id, output_index))
                 row = db_cursor.fetchone()
 
                 if not row:
-                    db_cursor.execute('insert into tx_output(address, tx_id, output_index, satoshis, '
+                    db_cursor.execute('insert into tx_output(address_id, tx_id, output_index, satoshis, '
                                       'spent_tx_hash, spent_input_index, script_type) '
                                       'values(?,?,?,?,?,?,?)',
-                                      (address, tx_id, output_index, satoshis, spent_tx_hash,
+                                      (addr_id, tx_id, output_index, satoshis, spent_tx_hash,
                                        spent_input_index, scr_type))
 
                     utxo_id = db_cursor.lastrowid
@@ -1111,9 +1181,9 @@ class Bip44Wallet(QObject):
                         self.addr_bal_updated[addr_id] = True
                     output_db_id = utxo_id
                 else:
-                    (output_db_id, address_cached, satoshis_cached, spent_tx_hash_cached, spent_input_index_cached) = row
+                    (output_db_id, addr_id_cached, satoshis_cached, spent_tx_hash_cached, spent_input_index_cached) = row
 
-                    if (address_cached != address or satoshis_cached != satoshis or
+                    if (addr_id_cached != addr_id or satoshis_cached != satoshis or
                         spent_tx_hash != spent_tx_hash_cached or spent_input_index_cached != spent_input_index):
 
                         if addr_id:
@@ -1121,18 +1191,19 @@ class Bip44Wallet(QObject):
 
                         # update db if there is any discrepency with the data fetched from the network; it may be
                         # caused by the network problems or the chain reorganization
-                        db_cursor.execute('update tx_output set address=?, satoshis=?, spent_tx_hash=?, '
+                        db_cursor.execute('update tx_output set address_id=?, satoshis=?, spent_tx_hash=?, '
                                           'spent_input_index=? where id=?',
-                                          (address, satoshis, spent_tx_hash, spent_input_index, output_db_id))
+                                          (addr_id, satoshis, spent_tx_hash, spent_input_index, output_db_id))
             else:
-                log.warning('No scriptPub in output, txhash: %s, index: %s', tx_hash, output_index)
+                log.warning('No scriptPub in output, txhash: %s, index: %s', self._unwrap_txid(tx_hash),
+                            output_index)
         else:
             log.warning(f'Ouptut index number {output_index} exceeds the number of transaction outputs ({len(vouts)}); '
                         f'tx_id: {tx_id}')
 
         return output_db_id
 
-    def _process_tx_input_entry(self, db_cursor, tx_id: int, tx_hash: str, input_index: int, tx_json: Dict) \
+    def _process_tx_input_entry(self, db_cursor, tx_id: int, tx_hash: bytes, input_index: int, tx_json: Dict) \
             -> Optional[int]:
         input_db_id = None
 
@@ -1143,10 +1214,10 @@ class Bip44Wallet(QObject):
             satoshis = vin.get('valueSat')
             if satoshis:
                 satoshis = -satoshis
-            related_tx_hash = vin.get('txid')
+            related_tx_hash = self._wrap_txid(vin.get('txid'))
             related_tx_index = vin.get('vout')
 
-            db_cursor.execute('select id, src_address, satoshis, src_tx_hash, src_tx_output_index, coinbase '
+            db_cursor.execute('select id, src_address_id, satoshis, src_tx_hash, src_tx_output_index, coinbase '
                               'from tx_input where tx_id=? and input_index=?',
                               (tx_id, input_index))
             row = db_cursor.fetchone()
@@ -1158,19 +1229,19 @@ class Bip44Wallet(QObject):
             coinbase = 1 if vin.get('coinbase') else 0
 
             if not row:
-                db_cursor.execute('insert into tx_input(tx_id, input_index, src_address, satoshis,'
+                db_cursor.execute('insert into tx_input(tx_id, input_index, src_address_id, satoshis,'
                                   'src_tx_hash, src_tx_output_index, coinbase) values(?,?,?,?,?,?,?)',
-                                  (tx_id, input_index, addr, satoshis, related_tx_hash, related_tx_index,
+                                  (tx_id, input_index, addr_id, satoshis, related_tx_hash, related_tx_index,
                                    coinbase))
                 if addr_id:
                     self.addr_bal_updated[addr_id] = True
                 input_db_id = db_cursor.lastrowid
                 related_tx_hash_cached = None
             else:
-                (input_db_id, src_address_cached, satoshis_cached, related_tx_hash_cached, related_tx_index_cached,
+                (input_db_id, src_addr_id_cached, satoshis_cached, related_tx_hash_cached, related_tx_index_cached,
                  coinbase_cached) = row
 
-                if (src_address_cached != addr or satoshis_cached != satoshis or
+                if (src_addr_id_cached != addr_id or satoshis_cached != satoshis or
                     related_tx_hash_cached != related_tx_hash or related_tx_index_cached != related_tx_index or
                     coinbase_cached != coinbase):
 
@@ -1179,9 +1250,9 @@ class Bip44Wallet(QObject):
 
                     # update db if there is any discrepency with the data fetched from the network; it may be
                     # caused by the network problems or the chain reorganization
-                    db_cursor.execute('update tx_input set src_address=?, satoshis=?, src_tx_hash=?, '
+                    db_cursor.execute('update tx_input set src_address_id=?, satoshis=?, src_tx_hash=?, '
                                       'src_tx_output_index=?, coinbase=? where id=?',
-                                      (addr, satoshis, related_tx_hash, related_tx_index, coinbase, input_db_id))
+                                      (addr_id, satoshis, related_tx_hash, related_tx_index, coinbase, input_db_id))
 
                     log.warning(f'Updating tx_input id {input_db_id} due to the data discrepency between cache and '
                                 f'the Dash network')
@@ -1190,7 +1261,7 @@ class Bip44Wallet(QObject):
                 # mark related utxos as spent
                 db_cursor.execute(
                     'update tx_output set spent_tx_hash=?, spent_input_index=? '
-                    ' where exists(select 1 from tx where tx.id=tx_output.tx_id and tx.tx_hash=?) '
+                    ' where tx_id in (select id from tx where tx.tx_hash=?) '
                     ' and output_index=? and (spent_tx_hash is null or spent_tx_hash<>? or spent_input_index is null '
                     '  or spent_input_index <> ?)',
                     (tx_hash, input_index, related_tx_hash, related_tx_index, tx_hash, input_index))
@@ -1317,7 +1388,7 @@ class Bip44Wallet(QObject):
                         account_ids_scanned.append(account.id)
 
             finally:
-                if db_cursor.connection.total_changes > 0:
+                if db_cursor.connection.in_transaction:
                     self.db_intf.commit()
                 self.db_intf.release_cursor()
                 self.decrease_ext_call_level()
@@ -1421,7 +1492,7 @@ class Bip44Wallet(QObject):
             self.on_address_loaded_callback = old_add_loaded_feedback
         return addr_found
 
-    def purge_transaction(self, tx_id: int, tx_hash: str, db_cursor=None):
+    def purge_transaction(self, tx_id: int, tx_hash: bytes, db_cursor=None):
         log.info('Purging timed-out unconfirmed transaction (td_id: %s).', tx_id)
         if not db_cursor:
             db_cursor = self.db_intf.get_cursor()
@@ -1433,11 +1504,10 @@ class Bip44Wallet(QObject):
             mod_addr_ids = []
 
             # following addressses will have the balance changed after purging the transaction
-            db_cursor.execute('select a.id from tx_output o join address a on a.address=o.address '
-                              'where (tx_id=? or spent_tx_hash=?)'
+            db_cursor.execute('select address_id from tx_output where (tx_id=? or spent_tx_hash=?) '
+                              'and address_id is not null'
                               ' union '
-                              'select a.id from tx_input i join address a on a.address=i.src_address '
-                              'where tx_id=?',
+                              'select src_address_id from tx_input where tx_id=? and src_address_id is not null',
                               (tx_id, tx_hash, tx_id))
 
             for row in db_cursor.fetchall():
@@ -1468,9 +1538,55 @@ class Bip44Wallet(QObject):
             if release_cursor:
                 self.db_intf.release_cursor()
 
+    def _verify_addr_balances(self, db_cursor, account_id: Optional[int] = None,
+                              addr_ids: Optional[List[int]] = None) -> List[int]:
+        """
+        Verifies whether the 'balance' and 'received' fields (maintained incrementally by the db triggers on the
+        tx_output and tx_input tables) of the addresses of a given bip44 account or of the addresses whose ids have
+        been passed in addr_ids match the cached transaction data. The totals are compared first with a single
+        aggregate query; only if they differ, the addresses are checked one by one and those with wrong values
+        are repaired.
+        :return: ids of the repaired addresses
+        """
+        if addr_ids:
+            addr_cond = 'a.id in (select value from json_each(?))'
+            params = (self._ids_param(set(addr_ids)),)
+        elif account_id is not None:
+            addr_cond = 'a.parent_id in (select ca.id from address ca where ca.parent_id=?)'
+            params = (account_id,)
+        else:
+            return []
+
+        db_cursor.execute(
+            f"select ifnull(sum(a.received), 0), ifnull(sum(a.balance), 0), "
+            f"(select ifnull(sum(o.satoshis), 0) from tx_output o join address a on a.id=o.address_id "
+            f"where {addr_cond}), "
+            f"(select ifnull(sum(i.satoshis), 0) from tx_input i join address a on a.id=i.src_address_id "
+            f"where {addr_cond}) "
+            f"from address a where {addr_cond}", params * 3)
+        received, balance, real_received, real_spent = db_cursor.fetchone()
+        if received == real_received and balance == real_received + real_spent:
+            return []
+
+        repaired_ids = []
+        db_cursor.execute(
+            f"select id, real_received, real_spent + real_received real_balance from (select a.id id, "
+            f"a.received, (select ifnull(sum(satoshis), 0) from tx_output o where o.address_id = a.id) "
+            f"real_received, a.balance, (select ifnull(sum(satoshis), 0) "
+            f"from tx_input o where o.src_address_id = a.id) real_spent from address a where {addr_cond}) "
+            f"where received <> real_received or balance <> real_received + real_spent", params)
+        for addr_id, real_received, real_balance in db_cursor.fetchall():
+            log.warning(f'Repairing balance of address id {addr_id}, which didn\'t match the cached transactions')
+            db_cursor.execute('update address set balance=?, received=? where id=?',
+                              (real_balance, real_received, addr_id))
+            repaired_ids.append(addr_id)
+        return repaired_ids
+
     def _update_addr_balances(self, account: Optional[Bip44AccountType], addr_ids: List[int]=None, db_cursor=None):
-        """ Update the 'balance' and 'received' fields of all addresses belonging to a given
-        bip44 account (account_id) or of all addresses whose ids has been passed in addr_ids list.
+        """ Propagate the 'balance' and 'received' values of all addresses belonging to a given bip44 account
+        (account_id) or of all addresses whose ids has been passed in addr_ids list to the cached objects and update
+        the totals of the related accounts. Address balances are maintained in the db by triggers, so they are
+        recomputed from the transaction data only when verifying an account (see _verify_addr_balances).
         """
 
         if not db_cursor:
@@ -1484,55 +1600,40 @@ class Bip44Wallet(QObject):
             cur_tree_id = self.get_tree_id()
 
             if addr_ids:
-                # update balances for specific addresses
                 addr_ids = list(set(addr_ids))  # remove duplicate ids
-                self._fill_temp_ids_table(addr_ids, db_cursor)
-
                 db_cursor.execute(
-                    "select id, account_id, real_received, "
-                    "real_spent + real_received real_balance, tree_id from (select a.id id, aa.id account_id, "
-                    "a.received, (select ifnull(sum(satoshis), 0) from tx_output o where o.address = a.address) "
-                    "real_received, a.balance, (select ifnull(sum(satoshis), 0) "
-                    "from tx_input o where o.src_address = a.address) real_spent, aa.tree_id tree_id from address a "
+                    "select a.id, aa.id account_id, a.received, a.balance from address a "
                     "left join address ca on ca.id = a.parent_id left join address aa on aa.id = ca.parent_id "
-                    "where a.id in (select id from temp_ids)) "
-                    "where received <> real_received or balance <> real_received + real_spent")
+                    "where a.id in (select value from json_each(?))", (self._ids_param(addr_ids),))
             elif account:
                 account.last_verify_balance_ts = int(time.time())
+                self._verify_addr_balances(db_cursor, account_id=account.id)
                 db_cursor.execute(
-                   "select id, account_id, real_received, real_spent + real_received real_balance, "
-                   "tree_id from (select a.id id, ca.id change_id, aa.id account_id, "
-                   "a.received, (select ifnull(sum(satoshis), 0) from tx_output o where o.address = a.address) "
-                   "real_received, a.balance, (select ifnull(sum(satoshis), 0) "
-                   "from tx_input o where o.src_address = a.address) real_spent, aa.tree_id tree_id from address a "
-                   "join address ca on ca.id = a.parent_id join address aa on aa.id = ca.parent_id where aa.id=?) "
-                   "where received <> real_received or balance <> real_received + real_spent", (account.id,))
+                   "select a.id, aa.id account_id, a.received, a.balance from address a "
+                   "join address ca on ca.id = a.parent_id join address aa on aa.id = ca.parent_id where aa.id=?",
+                   (account.id,))
             else:
                 raise Exception('Both arguments account_id and addr_ids are empty')
 
-            for addr_id, acc_id, real_received, real_balance, tree_id in db_cursor.fetchall():
+            for addr_id, acc_id, received, balance in db_cursor.fetchall():
                 if acc_id is not None and acc_id not in accounts_to_update:
                     # after updating balances of the addresses, update balance the related accounts
                     accounts_to_update.append(acc_id)
 
-                db_cursor.execute('update address set balance=?, received=? where id=?',
-                                  (real_balance, real_received, addr_id))
-
                 if self.on_address_data_changed_callback:
                     if account:
                         address = account.address_by_id(addr_id)
                     else:
                         address, account = self._find_address_item_in_cache_by_id(addr_id)
 
-                    if address:
-                        address.balance = real_balance
-                        address.received = real_received
+                    if address and (address.balance != balance or address.received != received):
+                        address.balance = balance
+                        address.received = received
                         self.signal_address_data_changed(account, address)
 
             if account and account.id not in accounts_to_update:
                 accounts_to_update.append(account.id)
 
-            self._fill_temp_ids_table(accounts_to_update, db_cursor)
             db_cursor.execute(
                 "select balance, real_balance, received, real_received, id, tree_id from ("
                 "  select aa.id, aa.tree_id, aa.balance,"
@@ -1541,8 +1642,8 @@ class Bip44Wallet(QObject):
                 "       aa.received,"
                 "       (select ifnull(sum(a.received),0) from address ca join address a "
                 "           on a.parent_id=ca.id where ca.parent_id=aa.id) real_received "
-                "from address aa where aa.id in (select id from temp_ids)) " 
-                "where balance<>real_balance or received<>real_received")
+                "from address aa where aa.id in (select value from json_each(?))) "
+                "where balance<>real_balance or received<>real_received", (self._ids_param(accounts_to_update),))
 
             for balance, real_balance, received, real_received, acc_id, acc_tree_id in db_cursor.fetchall():
                 db_cursor.execute('update address set balance=?, received=? where id=?',
@@ -1556,21 +1657,19 @@ class Bip44Wallet(QObject):
                         self.signal_account_data_changed(account)
 
         finally:
-            if db_cursor.connection.total_changes > 0:
+            if db_cursor.connection.in_transaction:
                 self.db_intf.commit()
             if release_cursor:
                 self.db_intf.release_cursor()
 
-    def _wrap_txid(self, txid: str):
-        # base64 format takes less space in the db than hex string
-        # return base64.b64encode(bytes.fromhex(txid))
-        return txid
+    def _wrap_txid(self, txid: Optional[str]) -> Optional[bytes]:
+        # transaction hashes are stored in the db as 32-byte blobs, which takes half the space of hex strings
+        return bytes.fromhex(txid) if txid else None
 
-    def _unwrap_txid(self, txid_wrapped: str):
-        # return base64.b64decode(txid_wrapped).hex()
-        return txid_wrapped
+    def _unwrap_txid(self, txid_wrapped: Optional[bytes]) -> Optional[str]:
+        return txid_wrapped.hex() if isinstance(txid_wrapped, bytes) else txid_wrapped
 
-    def _get_utxo(self, id: int, tx_hash: str, address_id: int, output_index: int, satoshis: int,
+    def _get_utxo(self, id: int, tx_hash: bytes, address_id: int, output_index: int, satoshis: int,
                   block_height: int, block_ts: int, coinbase: int):
         utxo = self.utxos_by_id.get(id)
         if not utxo:
@@ -1599,12 +1698,12 @@ class Bip44Wallet(QObject):
         """
         tm_begin = time.time()
         self.validate_hd_tree()
-        db_cursor = self.db_intf.get_cursor()
+        db_cursor = self.db_intf.get_read_cursor()
         try:
             params = []
             sql_text = "select o.id, tx.block_height, tx.coinbase, tx.block_timestamp," \
                        "tx.tx_hash, o.output_index, o.satoshis, a.id from tx_output o " \
-                       "join address a on a.address=o.address join address cha on cha.id=a.parent_id join address aca "\
+                       "join address a on a.id=o.address_id join address cha on cha.id=a.parent_id join address aca "\
                        "on aca.id=cha.parent_id join tx on tx.id=o.tx_id where (spent_tx_hash is null " \
                        "or spent_input_index is null) and a.tree_id=?"
             params.append(self.__tree_id)
@@ -1622,8 +1721,8 @@ class Bip44Wallet(QObject):
 
             if only_new:
                 # limit returned utxos only to those existing in the self.utxos_added list
-                self._fill_temp_ids_table([id for id in self.utxos_added], db_cursor)
-                sql_text += ' and o.id in (select id from temp_ids)'
+                sql_text += ' and o.id in (select value from json_each(?))'
+                params.append(self._ids_param(self.utxos_added))
             sql_text += " order by tx.block_height desc"
 
             t = time.time()
@@ -1637,9 +1736,7 @@ class Bip44Wallet(QObject):
                                       block_timestamp, coinbase)
                 yield utxo
         finally:
-            if db_cursor.connection.total_changes > 0:
-                self.db_intf.commit()
-            self.db_intf.release_cursor()
+            self.db_intf.release_read_cursor()
 
         diff = time.time() - tm_begin
         log.debug('list_utxos_for_account exec time: %ss', diff)
@@ -1650,23 +1747,22 @@ class Bip44Wallet(QObject):
             filter_by_satoshis: Optional[int] = None,
             skip_hw: bool = False
     ) -> Generator[UtxoType, None, None]:
-        db_cursor = self.db_intf.get_cursor()
+        db_cursor = self.db_intf.get_read_cursor()
         try:
             params = []
             sql_text = "select o.id, tx.block_height, tx.coinbase,tx.block_timestamp, tx.tx_hash, o.output_index, " \
                        "o.satoshis, a.id from tx_output o join address a" \
-                       " on a.address=o.address join tx on tx.id=o.tx_id where (spent_tx_hash is null " \
-                       " or spent_input_index is null) and a.id in (select id from temp_ids2)"
+                       " on a.id=o.address_id join tx on tx.id=o.tx_id where (spent_tx_hash is null " \
+                       " or spent_input_index is null) and a.id in (select value from json_each(?))"
+            params.append(self._ids_param(address_ids))
             if not skip_hw:
                 sql_text += " and a.tree_id=?"
                 params.append(self.__tree_id)
 
-            self._fill_temp_ids_table(address_ids, db_cursor, tab_sufix='2')
-
             if only_new:
                 # limit returned utxos only to those existing in the self.utxos_added list
-                self._fill_temp_ids_table([id for id in self.utxos_added], db_cursor)
-                sql_text += ' and o.id in (select id from temp_ids)'
+                sql_text += ' and o.id in (select value from json_each(?))'
+                params.append(self._ids_param(self.utxos_added))
 
             if filter_by_satoshis:
                 sql_text += ' and o.satoshis=?'
@@ -1685,22 +1781,18 @@ class Bip44Wallet(QObject):
                 yield utxo
 
         finally:
-            if db_cursor.connection.total_changes > 0:
-                self.db_intf.commit()
-            self.db_intf.release_cursor()
+            self.db_intf.release_read_cursor()
 
     def list_utxos_for_ids(self, utxo_ids: List[int]) -> Generator[UtxoType, None, None]:
-        db_cursor = self.db_intf.get_cursor()
+        db_cursor = self.db_intf.get_read_cursor()
         try:
-            self._fill_temp_ids_table(utxo_ids, db_cursor)
-
             sql_text = "select o.id, tx.block_height, tx.coinbase,tx.block_timestamp, tx.tx_hash, o.output_index, " \
                        "o.satoshis, a.id from tx_output o join address a" \
-                       " on a.address=o.address join tx on tx.id=o.tx_id where (spent_tx_hash is null " \
-                       " or spent_input_index is null) and o.id in (select id from temp_ids) " \
+                       " on a.id=o.address_id join tx on tx.id=o.tx_id where (spent_tx_hash is null " \
+                       " or spent_input_index is null) and o.id in (select value from json_each(?)) " \
                        " and a.tree_id=? order by tx.block_height desc"
 
-            db_cursor.execute(sql_text, (self.__tree_id,))
+            db_cursor.execute(sql_text, (self._ids_param(utxo_ids), self.__tree_id))
 
             for id, block_height, coinbase, block_timestamp, tx_hash, \
                 output_index, satoshis, address_id in db_cursor.fetchall():
@@ -1711,9 +1803,7 @@ class Bip44Wallet(QObject):
                 yield utxo
 
         finally:
-            if db_cursor.connection.total_changes > 0:
-                self.db_intf.commit()
-            self.db_intf.release_cursor()
+            self.db_intf.release_read_cursor()
 
     def _prepare_cursor_for_txs_list(
             self,
@@ -1729,8 +1819,8 @@ class Bip44Wallet(QObject):
                         'aca.id=? '
             cond_params.append(account_id)
         elif address_ids:
-            condition = ' where a.id in (select id from temp_ids) '
-            self._fill_temp_ids_table(address_ids, db_cursor)
+            condition = ' where a.id in (select value from json_each(?)) '
+            cond_params.append(self._ids_param(address_ids))
         else:
             condition = ''
 
@@ -1738,8 +1828,8 @@ class Bip44Wallet(QObject):
         sql_text = """
             select -1 type,
                    group_concat(DISTINCT a.id) src_addr_ids,
-                   (select group_concat(DISTINCT ifnull(null,'')||':'||o.address||':'||output_index||':'||o.satoshis) 
-                    from tx_output o where o.tx_id=t.id) rcp_addresses,
+                   (select group_concat(DISTINCT ifnull(null,'')||':'||ao.address||':'||output_index||':'||o.satoshis) 
+                    from tx_output o left join address ao on ao.id=o.address_id where o.tx_id=t.id) rcp_addresses,
                    sum(i.satoshis),
                    t.id,
                    t.tx_hash,
@@ -1747,7 +1837,7 @@ class Bip44Wallet(QObject):
                    t.block_timestamp,
                    0 is_coinbase,
                    -1
-            from tx_input i join tx t on t.id=i.tx_id join address a on a.address=i.src_address"""
+            from tx_input i join tx t on t.id=i.tx_id join address a on a.id=i.src_address_id"""
 
         if not skip_hw:
             sql_text += ' and a.tree_id=?'
@@ -1770,8 +1860,8 @@ class Bip44Wallet(QObject):
                    t.block_height,
                    t.block_timestamp, max(i.coinbase) is_coinbase,
                    o.id
-            from tx_output o join tx t on t.id=o.tx_id join address a on a.address=o.address { hw_cond1 }
-            join tx_input i on i.tx_id=t.id left join address ai on ai.address=i.src_address { hw_cond2 }"""
+            from tx_output o join tx t on t.id=o.tx_id join address a on a.id=o.address_id { hw_cond1 }
+            join tx_input i on i.tx_id=t.id left join address ai on ai.id=i.src_address_id { hw_cond2 }"""
 
         if not skip_hw:
             params.append(self.__tree_id)
@@ -1814,7 +1904,7 @@ class Bip44Wallet(QObject):
         tm_begin = time.time()
         if account_id:
             self.validate_hd_tree()  # we don't need a hw connection when scanning specific addresses
-        db_cursor = self.db_intf.get_cursor()
+        db_cursor = self.db_intf.get_read_cursor()
         try:
             self._prepare_cursor_for_txs_list(db_cursor, account_id, address_ids, skip_hw)
 
@@ -1823,7 +1913,7 @@ class Bip44Wallet(QObject):
 
                 tx = TxType()
                 tx.id = str(tx_id) + ':' + str(output_id) + ':' + str(type)
-                tx.tx_hash = tx_hash
+                tx.tx_hash = self._unwrap_txid(tx_hash)
                 tx.is_coinbase = is_coinbase
                 tx.satoshis = satoshis
                 tx.direction = type
@@ -1836,9 +1926,7 @@ class Bip44Wallet(QObject):
                     tx.recipient_addrs.append(a)
                 yield tx
         finally:
-            if db_cursor.connection.total_changes > 0:
-                self.db_intf.commit()
-            self.db_intf.release_cursor()
+            self.db_intf.release_read_cursor()
 
         diff = time.time() - tm_begin
         log.debug('list_utxos_for_account exec time: %ss', diff)
@@ -1862,7 +1950,7 @@ class Bip44Wallet(QObject):
 
                 yield acc
         finally:
-            if db_cursor.connection.total_changes > 0:
+            if db_cursor.connection.in_transaction:
                 self.db_intf.commit()
             self.db_intf.release_cursor()
         diff = time.time() - tm_begin
@@ -1900,7 +1988,7 @@ class Bip44Wallet(QObject):
                     account.evaluate_address_if_null(db_cursor, self.dash_network)
                     self.set_account_status(account, 1)
                 finally:
-                    if db_cursor.connection.total_changes > 0:
+                    if db_cursor.connection.in_transaction:
                         self.db_intf.commit()
                     self.db_intf.release_cursor()
             finally:
@@ -1929,12 +2017,24 @@ class Bip44Wallet(QObject):
             self.db_intf.commit()
             self.db_intf.release_cursor()
 
+    def _detach_addresses(self, condition: str, params: Tuple, db_cursor):
+        """
+        Removes addresses matching the condition from the wallet structure. Addresses referenced by the cached
+        transaction data are kept as external ones, since transaction inputs and outputs refer to their db ids.
+        """
+        db_cursor.execute(f"delete from address where {condition} and not exists(select 1 from tx_output o "
+                          f"where o.address_id=address.id) and not exists(select 1 from tx_input i "
+                          f"where i.src_address_id=address.id)", params)
+        db_cursor.execute(f"update address set parent_id=null, address_index=null, path=null, tree_id=null, "
+                          f"is_change=null, last_scan_block_height=0, external=1 where {condition}", params)
+        self.address_ids_by_address.clear()
+
     def remove_account(self, id: int):
         log.debug(f'Deleting account from db. Account address db id: {id}')
         db_cursor = self.db_intf.get_cursor()
         try:
-            db_cursor.execute("delete from address where parent_id in ("
-                              "select a1.id from address a1 where a1.parent_id=?)", (id,))
+            self._detach_addresses("parent_id in (select a1.id from address a1 where a1.parent_id=?)", (id,),
+                                   db_cursor)
 
             db_cursor.execute("delete from address where parent_id=?", (id,))
 
@@ -2002,7 +2102,7 @@ class Bip44Wallet(QObject):
                 log.error('This entry has null address value: %s', entry.id)
                 return
         finally:
-            if db_cursor.connection.total_changes > 0:
+            if db_cursor.connection.in_transaction:
                 self.db_intf.commit()
             self.db_intf.release_cursor()
 
@@ -2032,7 +2132,7 @@ class Bip44Wallet(QObject):
             if acc_loc:
                 acc_loc.status = status
         finally:
-            if db_cursor.connection.total_changes > 0:
+            if db_cursor.connection.in_transaction:
                 self.db_intf.commit()
             self.db_intf.release_cursor()
 
@@ -2062,7 +2162,7 @@ class Bip44Wallet(QObject):
         #         log.error('This entry has null address value: %s', entry.id)
         #         return
         # finally:
-        #     if db_cursor.connection.total_changes > 0:
+        #     if db_cursor.connection.in_transaction:
         #         self.db_intf.commit()
         #     self.db_intf.release_cursor()
 
@@ -2083,7 +2183,7 @@ class Bip44Wallet(QObject):
                               "on ca.id=a.parent_id where a.tree_id=?)", (id,))
             db_cursor.execute("delete from address where id in (select a.parent_id from address a where a.tree_id=?)",
                               (id,))
-            db_cursor.execute("delete from address where tree_id=?", (id,))
+            self._detach_addresses("tree_id=?", (id,), db_cursor)
             db_cursor.execute("delete from main.hd_tree where id=?", (id,))
             if self.__tree_id == id:
                 self.clear()
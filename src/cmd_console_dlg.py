@@ -2,6 +2,7 @@
 # -*- coding: utf-8 -*-
 # Author: Bertrand256
 # Created on: 2018-09
+import html
 import json
 import re
 
@@ -124,6 +125,35 @@ class CmdConsoleDlg(QDialog, ui_cmd_console_dlg.Ui_CmdConsoleDlg):
             elif re.match(r"^logformat$", args, re.IGNORECASE):
                 self.print_logformat()
                 ok = True
+            elif re.match(r"^rpcmetrics$", args, re.IGNORECASE):
+                ok = self.print_rpc_metrics()
+            else:
+                self.error('Invalid command arguments: ' + args)
+
+        elif cmd == 'save':
+
+            match = re.match(r"^rpcmetrics\s+(.+)", args, re.IGNORECASE)
+            if match:
+                ok = self.save_rpc_metrics(match.group(1).strip().strip('"').strip("'"))
+            else:
+                self.error('Invalid command arguments: ' + args)
+
+        elif cmd == 'reset':
+
+            if re.match(r"^rpcmetrics$", args, re.IGNORECASE):
+                if self.main_dlg.dashd_intf:
+                    self.main_dlg.dashd_intf.rpc_metrics.reset()
+                    self.message('RPC metrics have been reset')
+                    ok = True
+                else:
+                    self.error('Not connected to a Dash node')
+            else:
+                self.error('Invalid command arguments: ' + args)
+
+        elif cmd == 'run':
+
+            if re.match(r"^dbmaintenance$", args, re.IGNORECASE):
+                ok = self.run_db_maintenance()
             else:
                 self.error('Invalid command arguments: ' + args)
 
@@ -213,6 +243,20 @@ class CmdConsoleDlg(QDialog, ui_cmd_console_dlg.Ui_CmdConsoleDlg):
         <b>display modules</b>
           Displays all logger modules. 
 
+        <b>display rpcmetrics</b>
+          Displays the RPC call metrics (latency percentiles, transferred bytes, failures, retries and connection 
+          switches) per RPC method and per connection.
+
+        <b>save rpcmetrics "file-name"</b>
+          Saves the RPC call metrics to a JSON file.
+
+        <b>reset rpcmetrics</b>
+          Clears the RPC call metrics.
+
+        <b>run dbmaintenance</b>
+          Removes the cached data no longer used (according to the retention settings), refreshes the database 
+          statistics and releases the free space of the cache database to the file system.
+
         <b>rpc command ["arg1",...]</b>
           Sends a RPC call to the RPC node you are connected to. 
         """
@@ -242,6 +286,60 @@ class CmdConsoleDlg(QDialog, ui_cmd_console_dlg.Ui_CmdConsoleDlg):
             lines.append(f'  {logger_name}: {level_name}')
         self.edtCmdLog.append('\n'.join(lines))
 
+    def print_rpc_metrics(self):
+        if not self.main_dlg.dashd_intf:
+            self.error('Not connected to a Dash node')
+            return False
+
+        def fmt(v):
+            return str(round(v)) if v is not None else '-'
+
+        metrics = self.main_dlg.dashd_intf.get_rpc_metrics()
+        header = f'{"":32} {"calls":>7} {"fail":>5} {"retry":>5} {"switch":>6} {"p50 ms":>8} {"p95 ms":>8} ' \
+                 f'{"p99 ms":>8} {"sent kB":>9} {"recv kB":>9}'
+        lines = [f'Period: {metrics["period_seconds"]} s']
+        for section, title in (('methods', 'RPC method'), ('connections', 'Connection')):
+            lines.append('')
+            lines.append(title + header[len(title):])
+            for name, m in metrics[section].items():
+                lines.append(f'{name[:32]:32} {m["call_count"]:>7} {m["failure_count"]:>5} {m["retry_count"]:>5} '
+                             f'{m["switch_count"]:>6} {fmt(m["latency_p50_ms"]):>8} {fmt(m["latency_p95_ms"]):>8} '
+                             f'{fmt(m["latency_p99_ms"]):>8} {round(m["bytes_sent"] / 1024, 1):>9} '
+                             f'{round(m["bytes_received"] / 1024, 1):>9}')
+        lines.append('')
+        lines.append('Connection pool: ' + json.dumps(metrics['conn_pool']))
+        lines.append('Transaction memory cache: ' + json.dumps(metrics['tx_mem_cache']))
+        lines.append(f'Hedged calls: {metrics["hedged_count"]}, won by the hedge node: {metrics["hedge_wins"]}')
+        self.message(html.escape('\n'.join(lines)), style="white-space: pre; font-family: monospace;")
+        return True
+
+    def save_rpc_metrics(self, file_name: str):
+        if not self.main_dlg.dashd_intf:
+            self.error('Not connected to a Dash node')
+            return False
+        try:
+            self.main_dlg.dashd_intf.save_rpc_metrics(file_name)
+            self.message('RPC metrics have been saved to ' + html.escape(file_name))
+            return True
+        except Exception as e:
+            self.error('Error while saving RPC metrics: ' + html.escape(str(e)))
+            return False
+
+    def run_db_maintenance(self):
+        if not self.app_config.db_intf or not self.app_config.db_intf.is_active():
+            self.error('Database cache not active')
+            return False
+        try:
+            self.message('Running database maintenance...')
+            summary = self.app_config.db_intf.run_maintenance()
+            deleted = ', '.join(f'{name}: {count}' for name, count in summary['rows_deleted'].items())
+            self.message(f'Database maintenance finished in {summary["time_seconds"]} s, reclaimed '
+                         f'{round(summary["bytes_reclaimed"] / 1024, 1)} kB; deleted rows: {html.escape(deleted)}')
+            return True
+        except Exception as e:
+            self.error('Error while running database maintenance: ' + html.escape(str(e)))
+            return False
+
     def print_logformat(self):
         if self.app_config.log_handler and self.app_config.log_handler.formatter:
             self.message(self.app_config.log_handler.formatter._fmt)
@@ -9,6 +9,10 @@ from typing import Any
 class AttrsProtected(object):
     """
     Class for protecting of attribute definition to only an inside of a constructor.
+
+    The protection is checked in __setattr__, which is installed only while the protection is enabled (see
+    set_attrs_protection_enabled); with the protection disabled, assigning attributes costs the same as for
+    plain objects.
     """
     def __init__(self):
         self.__allow_attr_definition = True
@@ -32,12 +36,29 @@ class AttrsProtected(object):
         finally:
             self.__allow_attr_definition = old_state
 
-    def __setattr__(self, name, value):
-        if name == '_AttrsProtected__allow_attr_definition' or self.__allow_attr_definition or hasattr(self, name):
+    def _protected_setattr(self, name, value):
+        d = self.__dict__
+        if name in d:
+            # assignment to an existing instance attribute, the most common case, costs a single dict lookup
+            d[name] = value
+        elif d.get('_AttrsProtected__allow_attr_definition', True) or hasattr(type(self), name):
+            # attribute definition in the constructor or assignment to a class attribute/property
             super().__setattr__(name, value)
         else:
             raise AttributeError('Attribute definition protection for class "%s". Attribute name: "%s"' % (self.__class__.__name__, name))
 
+    __setattr__ = _protected_setattr
+
+
+def set_attrs_protection_enabled(enabled: bool):
+    """
+    Enables/disables the attribute definition protection of all AttrsProtected-based objects.
+    """
+    if enabled:
+        AttrsProtected.__setattr__ = AttrsProtected._protected_setattr
+    elif '__setattr__' in AttrsProtected.__dict__:
+        del AttrsProtected.__setattr__
+
 
 class CancelException(Exception):
     def __init__(self, *args, **kwargs):
@@ -13,6 +13,7 @@ import logging
 
 from app_cache import AppCache
 from app_config import AppConfig
+from common import set_attrs_protection_enabled
 from wnd_utils import WndUtils
 
 
@@ -45,6 +46,10 @@ if __name__ == '__main__':
         if tail == 'src':
             app_dir = path
 
+    # the attribute definition protection of the data objects catches misspelled attribute names; it stays on by
+    # default (also in release builds) and can be turned off with DMT_ATTRS_PROTECTION=0 to skip its cost
+    set_attrs_protection_enabled(os.environ.get('DMT_ATTRS_PROTECTION', '1') != '0')
+
     os.environ['QT_API'] = 'pyqt5'
 
     app = QApplication(sys.argv)
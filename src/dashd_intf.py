@@ -5,14 +5,14 @@
 from __future__ import annotations
 
 import base64
+import collections
+import concurrent.futures
 import decimal
 import functools
-import gzip
 import json
 import hashlib
 from decimal import Decimal
 
-import os
 import re
 import socket
 import ssl
@@ -20,15 +20,19 @@ import threading
 import time
 import datetime
 import logging
+import os
+import queue
+import zlib
 from sys import getsizeof
 
 from PyQt5.QtCore import QThread
 from bitcoinrpc.authproxy import AuthServiceProxy, JSONRPCException, EncodeDecimal
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.asymmetric import padding
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from paramiko import AuthenticationException, PasswordRequiredException, SSHException
 from paramiko.ssh_exception import NoValidConnectionsError, BadAuthenticationType
-from typing import List, Dict, Union, Callable, Optional, Generator, Any, Tuple
+from typing import List, Dict, Union, Callable, Optional, Generator, Any, Tuple, Set
 import app_cache
 from app_config import AppConfig
 from random import randint
@@ -36,13 +40,28 @@ from wnd_utils import WndUtils
 import socketserver
 import select
 from psw_cache import SshPassCache
+from rpc_metrics import RpcMetrics, CountingSocket, transfer_counter
 from common import AttrsProtected, CancelException
 
 
 log = logging.getLogger('dmt.dashd_intf')
 
-FILE_CACHE_VALID_DAYS = 30
 RPC_TIMEOUT_SECONDS = 60
+RPC_BATCH_MAX_SIZE = 100  # max number of calls sent in a single JSON-RPC batch request
+RPC_POOL_DRAIN_TIMEOUT_SECONDS = 5  # max time to wait for the in-flight calls before closing an SSH tunnel
+TX_MEM_CACHE_MAX_BYTES = 64 * 1024 * 1024  # memory limit for the decoded transactions kept in TxMemCache
+CONN_STATS_EWMA_ALPHA = 0.2
+CONN_STATS_SAVE_INTERVAL_SECONDS = 60
+HEDGE_LATENCY_PERCENTILE = 95  # read-only calls slower than this percentile of the node latency are hedged
+HEDGE_MIN_DELAY_SECONDS = 0.5
+HEDGE_MIN_SAMPLES = 20
+RPC_PREFETCH_QUEUE_SIZE = 2  # max number of decoded result chunks waiting for the consumer
+RPC_ENCRYPTION_V2_AAD = b'DMTENCRYPTEDV2'
+BLOCK_INDEX_MIN_CONFIRMATIONS = 10  # more recent blocks can be reorganized, so they are not stored in block_index
+BLOCK_CACHE_MIN_CONFIRMATIONS = 10  # the same for block hashes/headers stored in the transaction cache
+BLOCK_INDEX_RANGE_MAX_GAP = 50  # missing heights closer than this are fetched as one range with 'getblockheaders'
+BLOCK_INDEX_RANGE_MAX_SIZE = 2000  # max number of headers returned by a single 'getblockheaders' call
+RPC_DECODE_BLOCK_SIZE = 1024 * 1024  # size of the base64 blocks decoded at a time; must be a multiple of 4
 
 try:
     import http.client as httplib
@@ -54,6 +73,26 @@ except ImportError:
 # features
 MASTERNODES_CACHE_VALID_SECONDS = 60 * 60  # 60 minutes
 
+# the masternode list is refreshed incrementally ('protx diff' since the block of the last sync), unless the last
+# sync is older than MASTERNODES_DIFF_MAX_BLOCKS blocks, the number of changed masternodes exceeds
+# MASTERNODES_DIFF_MAX_CHANGES or the last full sync has been done more than MASTERNODES_FULL_SYNC_SECONDS ago
+# (changes of the PoSe penalty of the not penalized masternodes aren't visible in the diff)
+MASTERNODES_DIFF_MAX_BLOCKS = 576
+MASTERNODES_DIFF_MAX_CHANGES = 300
+MASTERNODES_FULL_SYNC_SECONDS = 24 * 60 * 60
+MASTERNODE_EVO_PAYMENT_QUEUE_WEIGHT = 4  # an Evo masternode takes 4 places in the payment queue
+
+# columns of the MASTERNODES table written from the network data, in the order of Masternode.get_db_values()
+MASTERNODE_DB_COLUMNS = ('ident', 'status', 'payee', 'last_paid_time', 'last_paid_block', 'ip', 'protx_hash',
+                         'registered_height', 'queue_position', 'type', 'collateral_hash', 'collateral_index',
+                         'collateral_address', 'owner_address', 'voting_address', 'pubkey_operator',
+                         'platform_node_id', 'platform_p2p_port', 'platform_http_port', 'operator_reward',
+                         'pose_penalty', 'pose_revived_height', 'pose_ban_height', 'operator_payout_address',
+                         'pose_ban_timestamp')
+# columns read when loading the masternode cache, in the order expected by Masternode.set_db_row_values()
+MASTERNODE_DB_READ_COLUMNS = ('id',) + MASTERNODE_DB_COLUMNS + ('dmt_create_time', 'dmt_deactivation_time',
+                                                                'dmt_active')
+
 
 class ForwardServer (socketserver.ThreadingTCPServer):
     daemon_threads = True
@@ -162,6 +201,13 @@ class DashdConnectionError(Exception):
         self.org_exception = org_exception
 
 
+class DashdBatchNotSupported(Exception):
+    """
+    Raised when an RPC node (or a proxy in front of it) does not accept JSON-RPC batch requests.
+    """
+    pass
+
+
 class DashdSSH(object):
     def __init__(self, host, port, username, on_connection_broken_callback=None, auth_method: str = 'password',
                  private_key_path: str = ''):
@@ -346,6 +392,197 @@ class DashdSSH(object):
             self.connected = False
 
 
+class RpcHTTPConnection(httplib.HTTPConnection):
+    """HTTP connection counting the bytes transferred over its socket (see rpc_metrics.transfer_counter)."""
+    def connect(self):
+        super().connect()
+        self.sock = CountingSocket(self.sock)
+
+
+class RpcHTTPSConnection(httplib.HTTPSConnection):
+    def connect(self):
+        super().connect()
+        self.sock = CountingSocket(self.sock)
+
+
+class RpcPoolClosedError(Exception):
+    """
+    Raised when a connection is requested from a pool closed in the meantime (the connection has been switched
+    to another node).
+    """
+    pass
+
+
+class RpcPoolConnection(object):
+    """
+    HTTP(S) connection taken from RpcConnectionPool, along with the AuthServiceProxy object using it.
+    """
+    def __init__(self, pool: 'RpcConnectionPool', http_conn, proxy: AuthServiceProxy):
+        self.pool = pool
+        self.generation = pool.generation
+        self.http_conn = http_conn
+        self.proxy = proxy
+
+    def is_valid(self) -> bool:
+        return not self.pool.closed and self.generation == self.pool.generation
+
+    def close(self):
+        try:
+            self.http_conn.close()
+        except Exception:
+            pass
+
+
+class RpcConnectionPool(object):
+    """
+    Bounded pool of HTTP(S) connections to the RPC node of a single DashNetworkConnectionCfg. It allows independent
+    RPC calls from different threads to be performed concurrently.
+    """
+    def __init__(self, rpc_url: str, rpc_host: str, rpc_port, use_ssl: bool, max_size: int):
+        self.rpc_url = rpc_url
+        self.rpc_host = rpc_host
+        self.rpc_port = rpc_port
+        self.use_ssl = use_ssl
+        self.max_size = max(1, max_size)
+        self.cond = threading.Condition()
+        self.idle: List[RpcPoolConnection] = []
+        self.size = 0  # number of existing (idle + in-use) connections
+        self.in_use = 0
+        self.generation = 0  # incremented on reset; connections from previous generations are not reused
+        self.closed = False
+
+        self.metrics_acquire_count = 0
+        self.metrics_wait_count = 0
+        self.metrics_wait_time_ms = 0
+        self.metrics_max_in_use = 0
+        self.metrics_created_count = 0
+
+    def create_http_conn(self, timeout):
+        if self.use_ssl:
+            return RpcHTTPSConnection(self.rpc_host, self.rpc_port, timeout=timeout,
+                                      context=ssl._create_unverified_context())
+        else:
+            return RpcHTTPConnection(self.rpc_host, self.rpc_port, timeout=timeout)
+
+    def acquire(self) -> RpcPoolConnection:
+        with self.cond:
+            if self.closed:
+                raise RpcPoolClosedError('Connection pool closed.')
+            if not self.idle and self.size >= self.max_size:
+                tm_begin = time.time()
+                self.metrics_wait_count += 1
+                while not self.idle and self.size >= self.max_size:
+                    self.cond.wait()
+                    if self.closed:
+                        raise RpcPoolClosedError('Connection pool closed.')
+                self.metrics_wait_time_ms += int((time.time() - tm_begin) * 1000)
+
+            if self.idle:
+                conn = self.idle.pop()
+            else:
+                http_conn = self.create_http_conn(timeout=20)
+                proxy = AuthServiceProxy(self.rpc_url, timeout=RPC_TIMEOUT_SECONDS, connection=http_conn)
+                conn = RpcPoolConnection(self, http_conn, proxy)
+                self.size += 1
+                self.metrics_created_count += 1
+
+            self.in_use += 1
+            self.metrics_acquire_count += 1
+            self.metrics_max_in_use = max(self.metrics_max_in_use, self.in_use)
+            return conn
+
+    def release(self, conn: RpcPoolConnection):
+        with self.cond:
+            self.in_use -= 1
+            if conn.is_valid():
+                self.idle.append(conn)
+            else:
+                conn.close()
+                self.size -= 1
+            self.cond.notify()
+
+    def reset(self):
+        """
+        Closes idle connections; connections currently in use will be closed when released.
+        """
+        with self.cond:
+            self.generation += 1
+            for conn in self.idle:
+                conn.close()
+            self.size -= len(self.idle)
+            self.idle.clear()
+
+    def close(self, drain_timeout: float = 0):
+        """
+        Closes the pool: idle connections are closed immediately, those in use when released, so the calls in
+        flight are not interrupted.
+        :param drain_timeout: max time (in seconds) to wait for the connections in use to be released
+        """
+        with self.cond:
+            self.reset()
+            self.closed = True
+            self.cond.notify_all()
+            if drain_timeout > 0:
+                tm_end = time.time() + drain_timeout
+                while self.in_use > 0 and time.time() < tm_end:
+                    self.cond.wait(tm_end - time.time())
+
+    def get_metrics(self) -> Dict[str, int]:
+        with self.cond:
+            return {
+                'max_size': self.max_size,
+                'size': self.size,
+                'in_use': self.in_use,
+                'idle': len(self.idle),
+                'acquire_count': self.metrics_acquire_count,
+                'wait_count': self.metrics_wait_count,
+                'wait_time_ms': self.metrics_wait_time_ms,
+                'max_in_use': self.metrics_max_in_use,
+                'created_count': self.metrics_created_count
+            }
+
+
+class RpcConnStats(object):
+    """
+    Latency and error rate statistics of an RPC connection, used to prefer the fastest healthy node.
+    """
+    def __init__(self):
+        self.latency_ewma_ms: Optional[float] = None
+        self.error_rate: float = 0.0
+        self.call_count = 0
+        self.latency_samples = collections.deque(maxlen=200)
+
+    def record_success(self, latency_ms: float):
+        if self.latency_ewma_ms is None:
+            self.latency_ewma_ms = latency_ms
+        else:
+            self.latency_ewma_ms += CONN_STATS_EWMA_ALPHA * (latency_ms - self.latency_ewma_ms)
+        self.error_rate *= (1 - CONN_STATS_EWMA_ALPHA)
+        self.call_count += 1
+        self.latency_samples.append(latency_ms)
+
+    def record_failure(self):
+        self.error_rate += CONN_STATS_EWMA_ALPHA * (1 - self.error_rate)
+        self.call_count += 1
+
+    def is_healthy(self) -> bool:
+        return self.error_rate < 0.5
+
+    def latency_percentile(self, percentile: int) -> Optional[float]:
+        samples = sorted(self.latency_samples)
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percentile / 100))]
+
+    def to_dict(self) -> Dict:
+        return {'latency_ewma_ms': self.latency_ewma_ms, 'error_rate': self.error_rate, 'call_count': self.call_count}
+
+    def from_dict(self, data: Dict):
+        self.latency_ewma_ms = data.get('latency_ewma_ms')
+        self.error_rate = data.get('error_rate', 0.0)
+        self.call_count = data.get('call_count', 0)
+
+
 class DashdIndexException(JSONRPCException):
     """
     Exception for notifying, that dash daemon should have an indexing option tuned on
@@ -362,11 +599,57 @@ class DashdIndexException(JSONRPCException):
                        'Changing these parameters requires to execute dashd with "-reindex" option (linux: ./dashd -reindex)'
 
 
-def control_rpc_call(_func=None, *, encrypt_rpc_arguments=False, allow_switching_conns=True,
-                     skip_counting_data_size=False):
+def encrypt_rpc_args(pubkey, args: Tuple) -> Tuple:
+    """
+    Encrypts RPC call arguments with the RSA public key of the RPC node.
+    :return: arguments to be passed to the RPC call instead of the original ones
+    """
+    args_str = json.dumps(args)
+    max_chunk_size = int(pubkey.key_size / 8) - 75
+
+    encrypted_parts = []
+    while args_str:
+        data_chunk = args_str[:max_chunk_size]
+        args_str = args_str[max_chunk_size:]
+        ciphertext = pubkey.encrypt(data_chunk.encode('ascii'),
+                                    padding.OAEP(
+                                        mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                                        algorithm=hashes.SHA256(),
+                                        label=None))
+        encrypted_parts.append(ciphertext.hex())
+    return ('DMTENCRYPTEDV1',) + tuple(encrypted_parts)
+
+
+class RpcEncryptionSession(object):
+    """
+    Session of the 'DMTENCRYPTEDV2' encryption protocol: RPC arguments are encrypted with an AES-256-GCM key
+    generated once per connection; the key itself is encrypted (RSA-OAEP) with the public key of the RPC node
+    only once and then passed along with each call, so that the node can decrypt it (and cache it).
+    Encrypted arguments: 'DMTENCRYPTEDV2', <wrapped session key>, <nonce>, <ciphertext with tag>, all hex-encoded.
+    """
+    def __init__(self, pubkey):
+        self.pubkey = pubkey
+        self.pubkey_numbers = pubkey.public_numbers()
+        key = AESGCM.generate_key(bit_length=256)
+        self.aesgcm = AESGCM(key)
+        self.wrapped_key = pubkey.encrypt(key, padding.OAEP(mgf=padding.MGF1(algorithm=hashes.SHA256()),
+                                                            algorithm=hashes.SHA256(), label=None)).hex()
+
+    def is_valid_for(self, pubkey) -> bool:
+        return pubkey is self.pubkey or pubkey.public_numbers() == self.pubkey_numbers
+
+    def encrypt_args(self, args: Tuple) -> Tuple:
+        nonce = os.urandom(12)
+        ciphertext = self.aesgcm.encrypt(nonce, json.dumps(args).encode('utf-8'), RPC_ENCRYPTION_V2_AAD)
+        return RPC_ENCRYPTION_V2_AAD.decode('ascii'), self.wrapped_key, nonce.hex(), ciphertext.hex()
+
+
+def control_rpc_call(_func=None, *, encrypt_rpc_arguments=False, allow_switching_conns=True, read_only=False):
     """
     Decorator dedicated to functions related to RPC calls, taking care of switching an active connection if the
     current one becomes faulty. It also performs argument encryption for configured RPC calls.
+    :param read_only: the call doesn't change anything on the node, so it can be hedged (duplicated to another
+        node) when the current one responds slowly
     """
 
     def control_rpc_call_inner(func):
@@ -376,66 +659,45 @@ def control_rpc_call(_func=None, *, encrypt_rpc_arguments=False, allow_switching
             ret = None
             last_exception = None
             self = args[0]
-
-            try:
-                # estimate the size of the input data in bytes
-                input_bytes = len(args[1:]) + len(str(kwargs))
-            except:
-                input_bytes = None
-
             finished_with_success = False
-            bytes_received = 0
-
-            self.mark_call_begin(input_bytes)
+            call_conn_def = None
+            retries = 0
+            switches = 0
+
+            self.mark_call_begin()
+            metrics_start = self.metrics_call_start()
+            self.rpc_call_depth_inc()
+            outermost_call = self.conn_tls.depth == 1
             try:
-                self.http_lock.acquire()
                 last_conn_reset_time = None
 
                 for try_nr in range(1, 5):
+                    call_conn_def = self.cur_conn_def
                     try:
                         try:
                             _args = None
                             if encrypt_rpc_arguments:
-                                if self.cur_conn_def:
-                                    pubkey = self.cur_conn_def.get_rpc_encryption_pubkey_object()
-                                else:
-                                    pubkey = None
-
-                                if pubkey:
-                                    args_str = json.dumps(args[1:])
-                                    max_chunk_size = int(pubkey.key_size / 8) - 75
-
-                                    encrypted_parts = []
-                                    while args_str:
-                                        data_chunk = args_str[:max_chunk_size]
-                                        args_str = args_str[max_chunk_size:]
-                                        ciphertext = pubkey.encrypt(data_chunk.encode('ascii'),
-                                                                    padding.OAEP(
-                                                                        mgf=padding.MGF1(algorithm=hashes.SHA256()),
-                                                                        algorithm=hashes.SHA256(),
-                                                                        label=None))
-                                        encrypted_parts.append(ciphertext.hex())
-
-                                    # use a copy of args to avoid multiple encryption when retrying
-                                    _args = (args[0], 'DMTENCRYPTEDV1') + tuple(encrypted_parts)
-                                    log.info(
-                                        'Arguments of the "%s" call have been encrypted with the RSA public key of '
-                                        'the RPC node.', func.__name__)
+                                # use a copy of args to avoid multiple encryption when retrying
+                                enc_args = self.encrypt_call_args(args[1:])
+                                if enc_args:
+                                    _args = (args[0],) + enc_args
+                                    log.info('Arguments of the "%s" call have been encrypted (%s) with the public key '
+                                             'of the RPC node.', func.__name__, enc_args[0])
 
                             if _args is None:
                                 _args = tuple(args)
 
-                            ret = func(*_args, **kwargs)
+                            if read_only and outermost_call and self.app_config and \
+                                    self.app_config.rpc_hedged_requests:
+                                ret = self.call_hedged(func, _args, kwargs)
+                            else:
+                                tm_call_begin = time.time()
+                                ret = func(*_args, **kwargs)
+                                if outermost_call:
+                                    self.record_conn_success(call_conn_def, time.time() - tm_call_begin)
 
                             last_exception = None
                             self.mark_cur_conn_cfg_is_ok()
-
-                            if not skip_counting_data_size:
-                                try:
-                                    # estimate of the output data in bytes
-                                    bytes_received = len(str(ret))
-                                except:
-                                    bytes_received = None
                             finished_with_success = True
                             break
 
@@ -449,6 +711,7 @@ def control_rpc_call(_func=None, *, encrypt_rpc_arguments=False, allow_switching
                             else:
                                 last_exception = e
                                 last_conn_reset_time = time.time()
+                                retries += 1
                                 self.reset_connection()  # retry with the same connection
 
                         except (socket.gaierror, ConnectionRefusedError, TimeoutError, socket.timeout,
@@ -472,18 +735,28 @@ def control_rpc_call(_func=None, *, encrypt_rpc_arguments=False, allow_switching
                     except DashdConnectionError as e:
                         # try another net config if possible
                         log.error('Error while calling of "' + str(func) + '" (4). Details: ' + str(e))
+                        self.record_conn_failure(call_conn_def)
+
+                        with self.conn_state_lock:
+                            if call_conn_def is not self.cur_conn_def:
+                                switched = True  # another thread has already switched the connection
+                            else:
+                                switched = allow_switching_conns and self.switch_to_next_config()
 
-                        if not allow_switching_conns or not self.switch_to_next_config():
+                        if not switched:
                             self.last_error_message = str(e.org_exception)
                             raise e.org_exception  # couldn't use another conn config, raise last exception
                         else:
                             try_nr -= 1  # another config retry does not count
+                            switches += 1
                             last_exception = e.org_exception
                     except Exception:
                         raise
             finally:
-                self.http_lock.release()
-                self.mark_call_end(bytes_received, not finished_with_success)
+                self.rpc_call_depth_dec()
+                self.mark_call_end(not finished_with_success)
+                self.metrics_call_end(metrics_start, func.__name__, call_conn_def, outermost_call,
+                                      not finished_with_success, retries, switches)
 
             if last_exception:
                 raise last_exception
@@ -509,8 +782,6 @@ class Masternode(AttrsProtected):
         self.protx_hash: Optional[str] = None
         self.db_id = None
         self.marker = None
-        self.modified = False
-        self.monitor_changes = False
         self.queue_position: Optional[int] = None
         self.collateral_hash: str = ''
         self.collateral_index: int = -1
@@ -611,44 +882,85 @@ class Masternode(AttrsProtected):
             new_value = default_value
         self.__setattr__(field_name, new_value)
 
+    def get_db_values(self) -> Tuple:
+        """
+        Returns the values of the persisted fields, in the order of MASTERNODE_DB_COLUMNS.
+        """
+        return (self.ident, self.status, self.payout_address, self.lastpaidtime, self.lastpaidblock,
+                self.ip_port, self.protx_hash, self.registered_height, self.queue_position, self.type,
+                self.collateral_hash, self.collateral_index, self.collateral_address, self.owner_address,
+                self.voting_address, self.pubkey_operator, self.platform_node_id, self.platform_p2p_port,
+                self.platform_http_port, self.operator_reward, self.pose_penalty, self.pose_revived_height,
+                self.pose_ban_height, self.operator_payout_address, self.pose_ban_timestamp)
+
+    @classmethod
+    def from_db_row(cls, row: Tuple) -> Masternode:
+        """
+        Lean constructor used when loading the masternode cache: the object is created without running __init__
+        and its attributes are assigned by set_db_row_values().
+        """
+        mn = cls.__new__(cls)
+        mn.__dict__['_AttrsProtected__allow_attr_definition'] = False
+        mn.__dict__['marker'] = None
+        mn.set_db_row_values(row)
+        return mn
+
+    def set_db_row_values(self, row: Tuple):
+        """
+        Assigns the values of a MASTERNODES row (columns as in MASTERNODE_DB_READ_COLUMNS) directly to the instance
+        dict, bypassing the per-attribute checks of AttrsProtected.__setattr__.
+        """
+        self.__dict__.update({
+            'db_id': row[0],
+            'ident': row[1],
+            'status': row[2],
+            'payout_address': row[3],
+            'lastpaidtime': row[4],
+            '_lastpaidblock': row[5] if row[5] is not None else -1,
+            'ip_port': row[6],
+            'protx_hash': row[7],
+            '_registered_height': row[8] if row[8] is not None else -1,
+            'queue_position': row[9],
+            'type': row[10],
+            'collateral_hash': row[11],
+            'collateral_index': row[12],
+            'collateral_address': row[13],
+            'owner_address': row[14],
+            'voting_address': row[15],
+            'pubkey_operator': row[16],
+            'platform_node_id': row[17],
+            'platform_p2p_port': row[18],
+            'platform_http_port': row[19],
+            'operator_reward': row[20],
+            'pose_penalty': row[21],
+            '_pose_revived_height': row[22] if row[22] is not None else -1,
+            '_pose_ban_height': row[23] if row[23] is not None else -1,
+            'operator_payout_address': row[24],
+            '_pose_ban_timestamp': row[25] if row[25] is not None else 0,
+            'dmt_creation_time': row[26],
+            'dmt_deactivation_time': row[27],
+            'dmt_active': row[28]
+        })
+
+    @staticmethod
+    def get_db_values_hash(values: Tuple) -> bytes:
+        return hashlib.blake2b(repr(values).encode('utf-8'), digest_size=16).digest()
+
     def update_in_db(self, cursor):
         try:
+            values = self.get_db_values()
+            data_hash = self.get_db_values_hash(values)
             if self.db_id is None:
                 self.dmt_creation_time = int(time.time())
-                dmt_creation_time_str = datetime.datetime.fromtimestamp(self.dmt_creation_time).\
-                    strftime('%Y-%m-%d %H:%M:%S')
-
                 cursor.execute(
-                    "INSERT INTO MASTERNODES(ident, status, payee, "
-                    " last_paid_time, last_paid_block, ip, protx_hash, "
-                    " registered_height, dmt_active, dmt_create_time, queue_position, type, collateral_hash, "
-                    " collateral_index, collateral_address, owner_address, voting_address, pubkey_operator,"
-                    " platform_node_id, platform_p2p_port, platform_http_port, operator_reward, pose_penalty,"
-                    " pose_revived_height, pose_ban_height, operator_payout_address, pose_ban_timestamp) "
-                    "VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)",
-                    (self.ident, self.status, self.payout_address, self.lastpaidtime, self.lastpaidblock,
-                     self.ip_port, self.protx_hash, self.registered_height, 1,
-                     dmt_creation_time_str, self.queue_position, self.type,
-                     self.collateral_hash, self.collateral_index, self.collateral_address, self.owner_address,
-                     self.voting_address, self.pubkey_operator, self.platform_node_id, self.platform_p2p_port,
-                     self.platform_http_port, self.operator_reward, self.pose_penalty, self.pose_revived_height,
-                     self.pose_ban_height, self.operator_payout_address, self.pose_ban_timestamp))
+                    f"INSERT INTO MASTERNODES({', '.join(MASTERNODE_DB_COLUMNS)}, dmt_active, dmt_create_time, "
+                    f"data_hash) VALUES ({','.join('?' * (len(MASTERNODE_DB_COLUMNS) + 3))})",
+                    values + (1, self.dmt_creation_time, data_hash))
                 self.db_id = cursor.lastrowid
             else:
                 cursor.execute(
-                    "UPDATE MASTERNODES set ident=?, status=?, payee=?, "
-                    " last_paid_time=?, last_paid_block=?, ip=?, protx_hash=?, "
-                    " registered_height=?, queue_position=?, type=?, collateral_hash=?, "
-                    " collateral_index=?, collateral_address=?, owner_address=?, voting_address=?, pubkey_operator=?,"
-                    " platform_node_id=?, platform_p2p_port=?, platform_http_port=?, operator_reward=?, pose_penalty=?,"
-                    " pose_revived_height=?, pose_ban_height=?, operator_payout_address=?, pose_ban_timestamp=? "
-                    " WHERE id=?",
-                    (self.ident, self.status, self.payout_address, self.lastpaidtime, self.lastpaidblock,
-                     self.ip_port, self.protx_hash, self.registered_height, self.queue_position, self.type,
-                     self.collateral_hash, self.collateral_index, self.collateral_address, self.owner_address,
-                     self.voting_address, self.pubkey_operator, self.platform_node_id, self.platform_p2p_port,
-                     self.platform_http_port, self.operator_reward, self.pose_penalty, self.pose_revived_height,
-                     self.pose_ban_height, self.operator_payout_address, self.pose_ban_timestamp, self.db_id))
+                    f"UPDATE MASTERNODES set {', '.join(c + '=?' for c in MASTERNODE_DB_COLUMNS)}, data_hash=? "
+                    f"WHERE id=?", values + (data_hash, self.db_id))
         except Exception as e:
             log.exception(str(e))
 
@@ -656,13 +968,6 @@ class Masternode(AttrsProtected):
         if self.db_id is not None:
             cursor.execute("delete from MASTERNODES where id=?", (self.db_id,))
 
-    def __setattr__(self, name, value):
-        if hasattr(self, name) and name not in ('modified', 'marker', 'monitor_changes',
-                                                '_AttrsProtected__allow_attr_definition'):
-            if self.monitor_changes and getattr(self, name) != value:
-                self.modified = True
-        super().__setattr__(name, value)
-
     @property
     def lastpaidblock(self):
         return self._lastpaidblock
@@ -704,48 +1009,150 @@ class Masternode(AttrsProtected):
         self.set_check_attr_value('_pose_ban_timestamp', new_ban_timestamp, 0)
 
 
+def json_cache_read(intf, cache_file_ident: str, accept_cache_data_fun: Optional[Callable[[Dict], bool]] = None):
+    """
+    Read rpc-call result saved in the transaction cache store.
+    :return: cached data or None if there is no (valid) data for cache_file_ident
+    """
+    try:
+        tx_cache = intf.app_config.tx_cache
+        if tx_cache:
+            j = tx_cache.get(cache_file_ident)
+            if j is not None and (accept_cache_data_fun is None or accept_cache_data_fun(j)):
+                return j
+    except Exception:
+        pass
+    return None
+
+
+def json_cache_write(intf, cache_file_ident: str, data: Any,
+                     accept_cache_data_fun: Optional[Callable[[Dict], bool]] = None):
+    """
+    Save rpc-call result in the transaction cache store.
+    :param accept_cache_data_fun: function used to verify whether the data is final (e.g. transaction is confirmed);
+        non-final data is evicted from the cache first
+    """
+    try:
+        tx_cache = intf.app_config.tx_cache
+        if tx_cache:
+            try:
+                confirmed = accept_cache_data_fun is None or accept_cache_data_fun(data)
+            except Exception:
+                confirmed = False
+            tx_cache.put(cache_file_ident, data, confirmed)
+    except Exception:
+        log.exception('Cannot save data to the transaction cache')
+
+
 def json_cache_wrapper(func, intf, cache_file_ident, skip_cache=False,
                        accept_cache_data_fun: Optional[Callable[[Dict], bool]]=None):
     """
-    Wrapper for saving/restoring rpc-call results inside cache files.
+    Wrapper for saving/restoring rpc-call results inside the transaction cache store.
     :param accept_cache_data_fun: reference to an external function verifying whether data read from cache
         can be accepted; if not, a normal call to a rpc node will be executed
     """
     def json_call_wrapper(*args, **kwargs):
         nonlocal skip_cache, cache_file_ident, intf, func
 
-        fname = '/insight_dash_'
-        if intf.app_config.is_testnet:
-            fname += 'testnet_'
-
-        cache_file = intf.app_config.tx_cache_dir + fname + cache_file_ident + '.json'
         if not skip_cache:
-            try:  # looking into cache first
-                if os.path.exists(cache_file):
-                    ts = os.path.getctime(cache_file)
-                    if ts > time.time() - (FILE_CACHE_VALID_DAYS * 24 * 60 * 60):
-                        with open(cache_file) as fp:
-                            j = json.load(fp, parse_float=decimal.Decimal)
-
-                if accept_cache_data_fun is None or accept_cache_data_fun(j):
-                    return j
-            except:
-                pass
+            # looking into cache first
+            j = json_cache_read(intf, cache_file_ident, accept_cache_data_fun)
+            if j is not None:
+                return j
 
         # if not found in cache, call the original function
         j = func(*args, **kwargs)
-
-        try:
-            with open(cache_file, 'w') as fp:
-                json.dump(j, fp, default=EncodeDecimal)
-        except Exception:
-            log.exception('Cannot save data to a cache file')
-            pass
+        json_cache_write(intf, cache_file_ident, j, accept_cache_data_fun)
         return j
 
     return json_call_wrapper
 
 
+class TxMemCache(object):
+    """
+    In-process LRU cache of decoded transactions (results of getrawtransaction), bounded by the estimated size of
+    the cached data. Returned objects are shared between callers and must not be modified.
+    """
+    def __init__(self, max_bytes: int = TX_MEM_CACHE_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+        self.entries: collections.OrderedDict[Tuple[str, int], Tuple[Any, int]] = collections.OrderedDict()
+        self.unconfirmed_keys = set()
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def estimate_size(tx: Any) -> int:
+        # decoded tx takes a few times more memory than its raw hex representation
+        if isinstance(tx, dict):
+            return len(tx.get('hex', '')) * 4 + 2048
+        elif isinstance(tx, str):
+            return len(tx) + 64
+        return 2048
+
+    def get(self, txid: str, verbose: int) -> Optional[Any]:
+        with self.lock:
+            entry = self.entries.get((txid, verbose))
+            if entry is not None:
+                self.entries.move_to_end((txid, verbose))
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+            return None
+
+    def put(self, txid: str, verbose: int, tx: Any, confirmed: bool):
+        key = (txid, verbose)
+        size = self.estimate_size(tx)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self.entries[key] = (tx, size)
+            self.size += size
+            if confirmed:
+                self.unconfirmed_keys.discard(key)
+            else:
+                self.unconfirmed_keys.add(key)
+
+            while self.size > self.max_bytes and self.entries:
+                key, (_, size) = self.entries.popitem(last=False)
+                self.size -= size
+                self.unconfirmed_keys.discard(key)
+
+    def invalidate_unconfirmed(self):
+        """Called when a new block arrives - unconfirmed transactions could have been confirmed in it."""
+        with self.lock:
+            for key in self.unconfirmed_keys:
+                entry = self.entries.pop(key, None)
+                if entry is not None:
+                    self.size -= entry[1]
+            self.unconfirmed_keys.clear()
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.unconfirmed_keys.clear()
+            self.size = 0
+
+    def reset_counters(self):
+        with self.lock:
+            self.hits = 0
+            self.misses = 0
+
+
+def check_if_tx_confirmed(tx_json: Dict) -> bool:
+    # cached transaction will not be accepted if the transaction stored in cache file was not confirmed
+    if tx_json.get('confirmations'):
+        return True
+    return False
+
+
+def check_if_tx_final(tx: Any) -> bool:
+    # non-verbose result (raw tx hex) doesn't depend on the confirmation status
+    return isinstance(tx, str) or (isinstance(tx, dict) and check_if_tx_confirmed(tx))
+
+
 class DashdInterface(WndUtils):
     def __init__(self, window,
                  on_connection_initiated_callback=None,
@@ -783,19 +1190,104 @@ class DashdInterface(WndUtils):
         self.metrics_failures_count = 0
         self.metrics_last_call_started_ts = 0
 
+        self.tx_mem_cache = TxMemCache()
+        self.last_block_height: int = 0
+
+        self.conn_stats: Dict[str, RpcConnStats] = {}
+        self.conn_stats_last_save_ts = 0
+        self.hedge_executor: Optional[concurrent.futures.ThreadPoolExecutor] = None
+        self.hedge_pool: Optional[RpcConnectionPool] = None
+        self.hedge_conn_def: Optional['DashNetworkConnectionCfg'] = None
+        self.metrics_hedged_count = 0
+        self.metrics_hedge_wins = 0
+        self.metrics_lock = threading.Lock()  # guards the counters updated from different threads
+        self.rpc_metrics = RpcMetrics()
+        self.rpc_encryption_sessions: Dict[str, RpcEncryptionSession] = {}
+        self.rpc_encryption_lock = threading.Lock()
+
         self.ssh = None
         self.window = window
         self.active = False
         self.rpc_url = None
-        self.proxy = None
-        self.http_conn = None  # HTTPConnection object passed to the AuthServiceProxy (for convinient connection reset)
+        self.conn_pool: Optional[RpcConnectionPool] = None
+        self.conn_tls = threading.local()  # pool connection bound to the thread for the duration of an RPC call
+        self.rpc_auth_header = None  # used for requests not sent through AuthServiceProxy (batch requests)
+        self.rpc_batch_id = 0
         self.on_connection_initiated_callback = on_connection_initiated_callback
         self.on_connection_failed_callback = on_connection_failed_callback
         self.on_connection_successful_callback = on_connection_successful_callback
         self.on_connection_disconnected_callback = on_connection_disconnected_callback
         self.last_error_message = None
         self.mempool_txes: Dict[str, Dict] = {}
-        self.http_lock = threading.RLock()
+        self.conn_state_lock = threading.RLock()  # guards opening, switching and resetting of connections
+
+    def rpc_call_depth_inc(self):
+        self.conn_tls.depth = getattr(self.conn_tls, 'depth', 0) + 1
+
+    def rpc_call_depth_dec(self):
+        self.conn_tls.depth -= 1
+        if self.conn_tls.depth == 0:
+            conn = getattr(self.conn_tls, 'conn', None)
+            if conn:
+                self.conn_tls.conn = None
+                conn.pool.release(conn)
+
+    def get_thread_conn(self) -> RpcPoolConnection:
+        """
+        Returns the pool connection bound to the current thread. The connection is acquired at the first use
+        within an RPC call and returned to the pool when the outermost RPC call finishes.
+        """
+        conn = getattr(self.conn_tls, 'conn', None)
+        if conn and not conn.is_valid():
+            # connection was reset or switched to another node in the meantime; it's released before waiting for
+            # the switch below, so as not to delay the draining of the old pool
+            self.conn_tls.conn = None
+            conn.pool.release(conn)
+            conn = None
+        pool_override = getattr(self.conn_tls, 'pool_override', None)
+        pool = pool_override or self.conn_pool
+        if not pool_override and (not pool or pool.closed):
+            # the connection is being switched to another node - wait for it to finish
+            with self.conn_state_lock:
+                pool = self.conn_pool
+        if not pool:
+            raise Exception('Not connected')
+        if conn and conn.pool is not pool:
+            self.conn_tls.conn = None
+            conn.pool.release(conn)
+            conn = None
+        if not conn:
+            try:
+                conn = pool.acquire()
+            except RpcPoolClosedError:
+                if pool_override:
+                    raise
+                with self.conn_state_lock:
+                    pool = self.conn_pool
+                if not pool:
+                    raise Exception('Not connected')
+                conn = pool.acquire()
+            if getattr(self.conn_tls, 'depth', 0) > 0:
+                self.conn_tls.conn = conn
+            else:
+                # used outside an RPC call controlled by control_rpc_call - there will be no release call, so
+                # don't keep the connection as in-use
+                pool.release(conn)
+        return conn
+
+    @property
+    def proxy(self) -> AuthServiceProxy:
+        return self.get_thread_conn().proxy
+
+    @property
+    def http_conn(self):
+        return self.get_thread_conn().http_conn
+
+    def get_conn_pool_metrics(self) -> Dict[str, int]:
+        pool = self.conn_pool
+        if pool:
+            return pool.get_metrics()
+        return {}
 
     def initialize(self, config: AppConfig, connection=None, for_testing_connections_only=False):
         self.app_config = config
@@ -803,6 +1295,7 @@ class DashdInterface(WndUtils):
         self.app_config = config
         self.db_intf = self.app_config.db_intf
         self.conn_features = {}
+        self.rpc_encryption_sessions = {}
 
         # conn configurations are used from the first item in the list; if one fails, then the next is taken
         if connection:
@@ -810,7 +1303,8 @@ class DashdInterface(WndUtils):
             self.connections = [connection]
         else:
             # get a connection list orderd by priority of use
-            self.connections = self.app_config.get_ordered_conn_list()
+            self.load_conn_stats()
+            self.connections = self.order_connections_by_stats(self.app_config.get_ordered_conn_list())
 
         self.cur_conn_index = 0
         if self.connections:
@@ -822,6 +1316,7 @@ class DashdInterface(WndUtils):
             self.load_masternode_data_from_db_cache()
         self.reset_metrics()
         self.mempool_txes = {}
+        self.tx_mem_cache.clear()
         self.initialized = True
 
     def read_masternode_data_from_db(self, masternodes: List[Masternode], where_condition: str,
@@ -839,63 +1334,25 @@ class DashdInterface(WndUtils):
         for mn in masternodes:
             mn_by_db_id[mn.db_id] = mn
 
-        cur = self.db_intf.get_cursor()
+        cur = self.db_intf.get_read_cursor()
         try:
             tm_start = time.time()
             log.debug("Reading masternode data from DB")
-            cur.execute("SELECT id, ident, status, payee, last_paid_time, last_paid_block, IP, queue_position, "
-                        "protx_hash, type, collateral_hash, collateral_index, collateral_address,"
-                        "owner_address, voting_address, pubkey_operator, platform_node_id, platform_p2p_port,"
-                        "platform_http_port, registered_height, operator_reward, pose_penalty, "
-                        "pose_revived_height, pose_ban_height, operator_payout_address, pose_ban_timestamp,"
-                        "dmt_create_time, dmt_deactivation_time, dmt_active "
-                        "from MASTERNODES where " + where_condition)
+            cur.execute(f"SELECT {', '.join(MASTERNODE_DB_READ_COLUMNS)} from MASTERNODES where " + where_condition)
 
             for row in cur.fetchall():
                 db_id = row[0]
                 mn = mn_by_db_id.get(db_id)
                 if not mn:
-                    mn = Masternode()
+                    mn = Masternode.from_db_row(row)
                     masternodes.append(mn)
                     mn_by_db_id[db_id] = mn
-                    mn.db_id = db_id
-                    new_mn = True
                 else:
-                    new_mn = False
-                    mn.modified = False
+                    mn.set_db_row_values(row)
+                    if updated is not None:
+                        updated.append(mn)
                 mn_by_db_id_current[mn.db_id] = mn
 
-                mn.ident = row[1]
-                mn.status = row[2]
-                mn.payout_address = row[3]
-                mn.lastpaidtime = row[4]
-                mn.lastpaidblock = row[5]
-                mn.ip_port = row[6]
-                mn.queue_position = row[7]
-                mn.protx_hash = row[8]
-                mn.type = row[9]
-                mn.collateral_hash = row[10]
-                mn.collateral_index = row[11]
-                mn.collateral_address = row[12]
-                mn.owner_address = row[13]
-                mn.voting_address = row[14]
-                mn.pubkey_operator = row[15]
-                mn.platform_node_id = row[16]
-                mn.platform_p2p_port = row[17]
-                mn.platform_http_port = row[18]
-                mn.registered_height = row[19]
-                mn.operator_reward = row[20]
-                mn.pose_penalty = row[21]
-                mn.pose_revived_height = row[22]
-                mn.pose_ban_height = row[23]
-                mn.operator_payout_address = row[24]
-                mn.pose_ban_timestamp = row[25]
-                mn.dmt_creation_time = int(datetime.datetime.strptime(row[26], '%Y-%m-%d %H:%M:%S').timestamp()) if row[26] else None
-                mn.dmt_deactivation_time = int(datetime.datetime.strptime(row[27], '%Y-%m-%d %H:%M:%S').timestamp()) if row[27] else None
-                mn.dmt_active = row[28]
-                if not new_mn and updated is not None:
-                    updated.append(mn)
-
             tm_diff = time.time() - tm_start
             log.info(f'DB read time of {len(masternodes)} MASTERNODES: {str(tm_diff)} s')
 
@@ -908,7 +1365,7 @@ class DashdInterface(WndUtils):
         except Exception as e:
             log.exception('Reading masternodes from DB error: ' + str(e))
         finally:
-            self.db_intf.release_cursor()
+            self.db_intf.release_read_cursor()
 
     def load_masternode_data_from_db_cache(self):
         where_condition = 'dmt_active=1'
@@ -940,12 +1397,252 @@ class DashdInterface(WndUtils):
         self.metrics_rpc_call_count = 0
         self.metrics_failures_count = 0
         self.metrics_last_call_started_ts = 0
+        self.tx_mem_cache.reset_counters()
+
+    def get_tx_mem_cache_metrics(self) -> Dict[str, int]:
+        return {
+            'hits': self.tx_mem_cache.hits,
+            'misses': self.tx_mem_cache.misses,
+            'entries': len(self.tx_mem_cache.entries),
+            'size_bytes': self.tx_mem_cache.size
+        }
+
+    def on_block_height(self, block_height: Optional[int]):
+        """Called with the current block height each time it is read from the network."""
+        if isinstance(block_height, int) and block_height > self.last_block_height:
+            if self.last_block_height:
+                self.tx_mem_cache.invalidate_unconfirmed()
+            self.last_block_height = block_height
+
+    def get_conn_stats(self, conn_def: 'DashNetworkConnectionCfg') -> RpcConnStats:
+        conn_id = conn_def.get_conn_id()
+        stats = self.conn_stats.get(conn_id)
+        if stats is None:
+            stats = RpcConnStats()
+            self.conn_stats[conn_id] = stats
+        return stats
+
+    def record_conn_success(self, conn_def: Optional['DashNetworkConnectionCfg'], duration_s: float):
+        if conn_def:
+            self.get_conn_stats(conn_def).record_success(duration_s * 1000)
+            self.save_conn_stats(force=False)
+
+    def record_conn_failure(self, conn_def: Optional['DashNetworkConnectionCfg']):
+        if conn_def:
+            self.get_conn_stats(conn_def).record_failure()
+            self.save_conn_stats(force=False)
+
+    def load_conn_stats(self):
+        """Restores connection statistics saved in the previous sessions."""
+        saved = app_cache.get_value(f'RpcConnStats_{self.app_config.dash_network}', {}, dict)
+        for conn_id, data in saved.items():
+            if conn_id not in self.conn_stats and isinstance(data, dict):
+                stats = RpcConnStats()
+                stats.from_dict(data)
+                self.conn_stats[conn_id] = stats
+
+    def save_conn_stats(self, force: bool = True):
+        if self.app_config and (force or time.time() - self.conn_stats_last_save_ts >=
+                                CONN_STATS_SAVE_INTERVAL_SECONDS):
+            self.conn_stats_last_save_ts = time.time()
+            app_cache.set_value(f'RpcConnStats_{self.app_config.dash_network}',
+                                {conn_id: stats.to_dict() for conn_id, stats in self.conn_stats.items()})
+
+    def order_connections_by_stats(self, connections: List['DashNetworkConnectionCfg']) \
+            -> List['DashNetworkConnectionCfg']:
+        """
+        If the order of connections is not significant (random_dash_net_config), sort them so that the healthy
+        nodes with the lowest latency come first, then the nodes not used so far, then the faulty ones.
+        """
+        if not self.app_config.random_dash_net_config:
+            return connections
+
+        def sort_key(conn_def):
+            stats = self.conn_stats.get(conn_def.get_conn_id())
+            if stats is None or stats.latency_ewma_ms is None:
+                return 1, 0
+            elif stats.is_healthy():
+                return 0, stats.latency_ewma_ms
+            else:
+                return 2, stats.error_rate
 
-    def metrics_call_start(self, bytes_sent: int):
-        self.metrics_last_call_started_ts = time.time()
+        return sorted(connections, key=sort_key)
 
-    def metrics_call_end(self, bytes_received: int, failure: bool):
-        pass
+    def get_hedge_pool(self) -> Optional[RpcConnectionPool]:
+        """
+        Returns a connection pool of the node to which slow read-only calls are duplicated: the fastest healthy
+        node other than the current one, not requiring an SSH tunnel.
+        """
+        with self.conn_state_lock:
+            if self.hedge_pool and self.hedge_conn_def is not self.cur_conn_def and not self.hedge_pool.closed:
+                return self.hedge_pool
+            if self.hedge_pool:
+                self.hedge_pool.close()
+                self.hedge_pool = None
+                self.hedge_conn_def = None
+
+            candidates = []
+            for conn_def in self.connections:
+                if conn_def is not self.cur_conn_def and not conn_def.use_ssh_tunnel:
+                    stats = self.conn_stats.get(conn_def.get_conn_id())
+                    if stats and stats.latency_ewma_ms is not None and stats.is_healthy():
+                        candidates.append((stats.latency_ewma_ms, conn_def))
+            if candidates:
+                candidates.sort(key=lambda x: x[0])
+                conn_def = candidates[0][1]
+                rpc_url = ('https://' if conn_def.use_ssl else 'http://') + conn_def.username + ':' + \
+                    conn_def.password + '@' + conn_def.host + ':' + str(conn_def.port)
+                self.hedge_pool = RpcConnectionPool(rpc_url, conn_def.host, conn_def.port, conn_def.use_ssl,
+                                                    self.app_config.rpc_conn_pool_size)
+                self.hedge_conn_def = conn_def
+            return self.hedge_pool
+
+    def run_rpc_in_worker(self, pool: Optional[RpcConnectionPool], conn_def: 'DashNetworkConnectionCfg', func,
+                          args, kwargs):
+        """Executes an RPC function in a worker thread, optionally using connections from another node's pool."""
+        self.conn_tls.pool_override = pool
+        self.rpc_call_depth_inc()
+        tm_begin = time.time()
+        bytes_sent = transfer_counter.bytes_sent
+        bytes_received = transfer_counter.bytes_received
+        try:
+            ret = func(*args, **kwargs)
+            self.record_conn_success(conn_def, time.time() - tm_begin)
+            return ret
+        except (socket.gaierror, ConnectionError, TimeoutError, socket.timeout, httplib.HTTPException):
+            if pool:
+                # failures of the primary node are recorded by control_rpc_call
+                self.record_conn_failure(conn_def)
+            raise
+        finally:
+            self.rpc_call_depth_dec()
+            self.conn_tls.pool_override = None
+            # the calling thread doesn't see the bytes transferred by the worker threads
+            with self.metrics_lock:
+                self.metrics_bytes_sent += transfer_counter.bytes_sent - bytes_sent
+                self.metrics_bytes_received += transfer_counter.bytes_received - bytes_received
+
+    def call_hedged(self, func, args, kwargs):
+        """
+        Performs a read-only RPC call and, if the current node doesn't respond within its usual latency (given
+        percentile), sends the same call to another node. The first successful result is returned.
+
+        The call is performed in the calling thread; a worker thread is involved only for the hedged call, which
+        is sent when the delay expires. If the hedged call finishes first, the primary one is interrupted by
+        shutting down the socket of its connection.
+        """
+        conn_def = self.cur_conn_def
+        stats = self.get_conn_stats(conn_def)
+        threshold_ms = stats.latency_percentile(HEDGE_LATENCY_PERCENTILE)
+        hedge_pool = None
+        if threshold_ms is not None and len(self.connections) >= 2:
+            hedge_pool = self.get_hedge_pool()
+        tm_begin = time.time()
+        if not hedge_pool:
+            ret = func(*args, **kwargs)
+            self.record_conn_success(conn_def, time.time() - tm_begin)
+            return ret
+
+        primary_conn = self.get_thread_conn()
+        hedge_conn_def = self.hedge_conn_def
+        state_lock = threading.Lock()
+        primary_done = threading.Event()
+        hedge_result = []
+
+        def hedge_proc():
+            if primary_done.wait(max(threshold_ms / 1000, HEDGE_MIN_DELAY_SECONDS)):
+                return  # the primary call finished within the delay
+            log.debug(f'Hedging the "{func.__name__}" call to {hedge_conn_def.get_description()}')
+            with self.metrics_lock:
+                self.metrics_hedged_count += 1
+            ret = self.run_rpc_in_worker(hedge_pool, hedge_conn_def, func, args, kwargs)
+            with state_lock:
+                hedge_result.append(ret)
+                if primary_done.is_set():
+                    return
+            try:
+                sock = primary_conn.http_conn.sock
+                if sock:
+                    sock.shutdown(socket.SHUT_RDWR)
+            except Exception:
+                pass
+
+        if not self.hedge_executor:
+            self.hedge_executor = concurrent.futures.ThreadPoolExecutor(max_workers=8,
+                                                                        thread_name_prefix='RpcHedge')
+        hedge = self.hedge_executor.submit(hedge_proc)
+        try:
+            ret = func(*args, **kwargs)
+            primary_exception = None
+        except Exception as e:
+            ret = None
+            primary_exception = e
+        with state_lock:
+            primary_done.set()
+            hedge_won = bool(hedge_result)
+
+        if hedge_won:
+            # the primary connection has been interrupted (or its socket was shut down right after the call
+            # finished), so it needs to reconnect for the next call
+            primary_conn.http_conn.close()
+            with self.metrics_lock:
+                self.metrics_hedge_wins += 1
+            self.record_conn_success(conn_def, time.time() - tm_begin)  # elapsed time is a lower bound
+            return hedge_result[0] if primary_exception else ret
+
+        if primary_exception is None:
+            self.record_conn_success(conn_def, time.time() - tm_begin)
+            return ret
+
+        if hedge.running() or hedge.done():
+            # the primary call failed after the hedged one had been sent: use its result if it succeeds
+            try:
+                hedge.result()
+            except Exception:
+                pass
+            if hedge_result:
+                with self.metrics_lock:
+                    self.metrics_hedge_wins += 1
+                return hedge_result[0]
+        raise primary_exception  # both calls failed: raise the exception of the primary one
+
+    def metrics_call_start(self) -> Tuple[float, int, int]:
+        return time.time(), transfer_counter.bytes_sent, transfer_counter.bytes_received
+
+    def metrics_call_end(self, metrics_start: Tuple[float, int, int], method: str,
+                         conn_def: Optional['DashNetworkConnectionCfg'], outermost_call: bool, failure: bool,
+                         retries: int, switches: int):
+        try:
+            tm_begin, bytes_sent, bytes_received = metrics_start
+            bytes_sent = transfer_counter.bytes_sent - bytes_sent
+            bytes_received = transfer_counter.bytes_received - bytes_received
+            if outermost_call:
+                # bytes of the nested calls are included in those of the outermost one
+                with self.metrics_lock:
+                    self.metrics_bytes_sent += bytes_sent
+                    self.metrics_bytes_received += bytes_received
+            self.rpc_metrics.record_call(method, conn_def.get_description() if conn_def and outermost_call else None,
+                                         (time.time() - tm_begin) * 1000, bytes_sent, bytes_received, failure,
+                                         retries, switches)
+        except Exception:
+            log.exception('Error while recording RPC call metrics')
+
+    def get_rpc_metrics(self) -> Dict[str, Any]:
+        """
+        Returns the RPC call metrics along with the state of the connection pool, the transaction cache and the
+        hedged calls, for the diagnostics purposes.
+        """
+        ret = self.rpc_metrics.to_dict()
+        ret['conn_pool'] = self.get_conn_pool_metrics()
+        ret['tx_mem_cache'] = self.get_tx_mem_cache_metrics()
+        ret['hedged_count'] = self.metrics_hedged_count
+        ret['hedge_wins'] = self.metrics_hedge_wins
+        ret['conn_stats'] = {conn_id: st.to_dict() for conn_id, st in self.conn_stats.items()}
+        return ret
+
+    def save_rpc_metrics(self, file_name: str):
+        with open(file_name, 'w') as fp:
+            json.dump(self.get_rpc_metrics(), fp, indent=2)
 
     def reload_configuration(self):
         """Called after modification of connections' configuration or changes having impact on the file name
@@ -953,7 +1650,7 @@ class DashdInterface(WndUtils):
 
         # get a connection list orderd by priority of use
         self.disconnect()
-        self.connections = self.app_config.get_ordered_conn_list()
+        self.connections = self.order_connections_by_stats(self.app_config.get_ordered_conn_list())
         self.cur_conn_index = 0
         if len(self.connections):
             self.cur_conn_def = self.connections[self.cur_conn_index]
@@ -962,40 +1659,54 @@ class DashdInterface(WndUtils):
             self.cur_conn_def = None
         self.reset_metrics()
         self.conn_features = {}
+        self.rpc_encryption_sessions = {}
         self.mempool_txes = {}
+        self.tx_mem_cache.clear()
 
     def disconnect(self):
-        if self.active:
-            log.debug('Disconnecting')
-            if self.ssh:
-                self.ssh.disconnect()
-                del self.ssh
-                self.ssh = None
-            self.active = False
-            if self.on_connection_disconnected_callback:
-                self.on_connection_disconnected_callback()
-
-    def mark_call_begin(self, input_bytes=None):
+        with self.conn_state_lock:
+            if self.active:
+                log.debug('Disconnecting')
+                pool = self.conn_pool
+                if pool:
+                    # the pool is detached first, so the other threads wait (on conn_state_lock) for the new one
+                    # instead of acquiring connections from the closing one
+                    self.conn_pool = None
+                    log.debug('Connection pool metrics: ' + str(pool.get_metrics()))
+                    conn = getattr(self.conn_tls, 'conn', None)
+                    if conn and conn.pool is pool:
+                        # connection of the call that has triggered the disconnection
+                        self.conn_tls.conn = None
+                        pool.release(conn)
+                    # calls in flight are let finish before closing the SSH tunnel they go through
+                    pool.close(drain_timeout=RPC_POOL_DRAIN_TIMEOUT_SECONDS if self.ssh else 0)
+                if self.hedge_pool:
+                    self.hedge_pool.close()
+                    self.hedge_pool = None
+                    self.hedge_conn_def = None
+                self.save_conn_stats()
+                if self.ssh:
+                    self.ssh.disconnect()
+                    del self.ssh
+                    self.ssh = None
+                self.active = False
+                if self.on_connection_disconnected_callback:
+                    self.on_connection_disconnected_callback()
+
+    def mark_call_begin(self):
         try:
             self.starting_conn = self.cur_conn_def
             self.metrics_last_call_started_ts = time.time()
-
-            if isinstance(input_bytes, (int, float)):
-                self.metrics_bytes_sent += input_bytes
-
             self.metrics_rpc_call_count += 1
         except:
             pass
 
-    def mark_call_end(self, output_bytes=None, failure=False):
+    def mark_call_end(self, failure=False):
         try:
             if isinstance(self.metrics_last_call_started_ts, (int, float)):
                 tm_diff = time.time() - self.metrics_last_call_started_ts
                 self.metrics_rpc_time_ms += int(tm_diff * 1000)
 
-            if isinstance(output_bytes, (int, float)):
-                self.metrics_bytes_received += output_bytes
-
             if failure:
                 self.metrics_failures_count += 1
         except:
@@ -1007,26 +1718,27 @@ class DashdInterface(WndUtils):
         with current connection config.
         :return: True if successfully switched or False if there was no another config
         """
-        if self.cur_conn_def:
-            self.app_config.conn_cfg_failure(self.cur_conn_def)  # mark connection as defective
-        if self.cur_conn_index < len(self.connections)-1:
-            idx = self.cur_conn_index + 1
-        else:
-            idx = 0
-
-        conn = self.connections[idx]
-        if conn != self.starting_conn and conn != self.cur_conn_def:
-            log.debug("Trying to switch to another connection: %s" % conn.get_description())
-            self.disconnect()
-            self.cur_conn_index = idx
-            self.cur_conn_def = conn
-            if not self.open():
-                return self.switch_to_next_config()
+        with self.conn_state_lock:
+            if self.cur_conn_def:
+                self.app_config.conn_cfg_failure(self.cur_conn_def)  # mark connection as defective
+            if self.cur_conn_index < len(self.connections)-1:
+                idx = self.cur_conn_index + 1
             else:
-                return True
-        else:
-            log.warning('Failed to connect: no another connection configurations.')
-            return False
+                idx = 0
+
+            conn = self.connections[idx]
+            if conn != self.starting_conn and conn != self.cur_conn_def:
+                log.debug("Trying to switch to another connection: %s" % conn.get_description())
+                self.disconnect()
+                self.cur_conn_index = idx
+                self.cur_conn_def = conn
+                if not self.open():
+                    return self.switch_to_next_config()
+                else:
+                    return True
+            else:
+                log.warning('Failed to connect: no another connection configurations.')
+                return False
 
     def mark_cur_conn_cfg_is_ok(self):
         if self.cur_conn_def:
@@ -1038,7 +1750,12 @@ class DashdInterface(WndUtils):
         :return: True if successfully connected, False if the user cancelled the operation. If all of the attempts
             fail, then appropriate exception will be raised.
         """
+        if self.active:
+            return True
+        self.conn_state_lock.acquire()
         try:
+            if self.active:
+                return True  # opened by another thread in the meantime
             if not self.cur_conn_def:
                 raise Exception('There is no connections to Dash network enabled in the configuration.')
 
@@ -1062,6 +1779,8 @@ class DashdInterface(WndUtils):
         except Exception as e:
             self.last_error_message = str(e)
             raise
+        finally:
+            self.conn_state_lock.release()
 
         return True
 
@@ -1071,12 +1790,13 @@ class DashdInterface(WndUtils):
         (if used) and HTTP connection object to prepare for another try.
         :return:
         """
-        if self.active:
-            if self.http_conn:
-                self.http_conn.close()
-            if self.ssh:
-                self.ssh.disconnect()
-                self.active = False
+        with self.conn_state_lock:
+            if self.active:
+                if self.conn_pool:
+                    self.conn_pool.reset()
+                if self.ssh:
+                    self.ssh.disconnect()
+                    self.active = False
 
     def open_internal(self):
         """
@@ -1147,18 +1867,23 @@ class DashdInterface(WndUtils):
 
             if self.cur_conn_def.use_ssl:
                 self.rpc_url = 'https://'
-                self.http_conn = httplib.HTTPSConnection(rpc_host, rpc_port, timeout=5, context=ssl._create_unverified_context())
             else:
                 self.rpc_url = 'http://'
-                self.http_conn = httplib.HTTPConnection(rpc_host, rpc_port, timeout=5)
 
             self.rpc_url += rpc_user + ':' + rpc_password + '@' + rpc_host + ':' + str(rpc_port)
+            self.rpc_auth_header = 'Basic ' + base64.b64encode((rpc_user + ':' + rpc_password).encode('utf8')).\
+                decode('ascii')
             log.debug('AuthServiceProxy configured to: %s' % self.rpc_url)
-            self.proxy = AuthServiceProxy(self.rpc_url, timeout=RPC_TIMEOUT_SECONDS, connection=self.http_conn)
+            if self.conn_pool:
+                self.conn_pool.close()
+            self.conn_pool = RpcConnectionPool(self.rpc_url, rpc_host, rpc_port, self.cur_conn_def.use_ssl,
+                                               self.app_config.rpc_conn_pool_size)
+            # timeout is set to 5 seconds to perform 'quick' connection test
+            test_conn = self.conn_pool.create_http_conn(timeout=5)
 
             try:
                 # check the connection
-                self.http_conn.connect()
+                test_conn.connect()
                 log.debug('Successfully connected AuthServiceProxy')
 
                 try:
@@ -1184,9 +1909,7 @@ class DashdInterface(WndUtils):
                 raise
             finally:
                 log.debug('http_conn.close()')
-                self.http_conn.close()
-                # timeout has been initially set to 5 seconds to perform 'quick' connection test
-                self.http_conn.timeout = 20
+                test_conn.close()
 
             self.active = True
         return self.active
@@ -1197,10 +1920,12 @@ class DashdInterface(WndUtils):
         else:
             return '???'
 
-    @control_rpc_call
+    @control_rpc_call(read_only=True)
     def getblockcount(self):
         if self.open():
-            return self.proxy.getblockcount()
+            block_height = self.proxy.getblockcount()
+            self.on_block_height(block_height)
+            return block_height
         else:
             raise Exception('Not connected')
 
@@ -1208,6 +1933,7 @@ class DashdInterface(WndUtils):
     def getblockchaininfo(self, verify_node: bool = True):
         if self.open():
             info = self.proxy.getblockchaininfo()
+            self.on_block_height(info.get('blocks'))
             if verify_node:
                 node_under_testnet = (info.get('chain') == 'test')
                 if self.app_config.is_testnet and not node_under_testnet:
@@ -1266,6 +1992,130 @@ class DashdInterface(WndUtils):
         app_cache.set_value(cache_item_name, 0)
         cache_item_name = f'MasternodesLastReadTime_{self.app_config.dash_network}'
         app_cache.set_value(cache_item_name, 0)
+        self._save_masternodes_sync_block('', 0, 0)
+
+    def _save_masternodes_sync_block(self, block_hash: str, block_height: int, full_sync_time: Optional[int]):
+        """ Saves the block to which the cached masternode list corresponds; it is the base of the next
+        incremental (diff) sync. """
+        app_cache.set_value(f'MasternodesSyncBlockHash_{self.app_config.dash_network}', block_hash)
+        app_cache.set_value(f'MasternodesSyncBlockHeight_{self.app_config.dash_network}', block_height)
+        if full_sync_time is not None:
+            app_cache.set_value(f'MasternodesLastFullSyncTime_{self.app_config.dash_network}', full_sync_time)
+
+    def _save_masternodes_to_db(self, masternodes: List[Masternode], removed_masternodes: List[Masternode],
+                                feedback_fun: Optional[Callable]) -> bool:
+        """
+        Persists the masternode list in a single transaction: inserts the new masternodes, updates only those
+        whose persisted fields differ from the db (compared by the hash of the fields) and deactivates the removed
+        ones.
+        :return: True if the db has been modified.
+        """
+        cur = self.db_intf.get_cursor()
+        db_modified = False
+        try:
+            cur.execute("SELECT id, data_hash FROM MASTERNODES WHERE dmt_active=1")
+            db_hashes = dict(cur.fetchall())
+
+            updates = []
+            for mn in masternodes:
+                if feedback_fun:
+                    feedback_fun()
+                if mn.db_id is None:
+                    mn.update_in_db(cur)
+                    db_modified = True
+                else:
+                    values = mn.get_db_values()
+                    data_hash = Masternode.get_db_values_hash(values)
+                    if db_hashes.get(mn.db_id) != data_hash:
+                        updates.append(values + (data_hash, mn.db_id))
+
+            if updates:
+                cur.executemany(f"UPDATE MASTERNODES set {', '.join(c + '=?' for c in MASTERNODE_DB_COLUMNS)}, "
+                                f"data_hash=? WHERE id=?", updates)
+                db_modified = True
+
+            removed_ids = [mn.db_id for mn in removed_masternodes if mn.db_id is not None]
+            if removed_ids:
+                deactivation_time = int(time.time())
+                for mn in removed_masternodes:
+                    mn.dmt_deactivation_time = deactivation_time
+                cur.execute("UPDATE MASTERNODES set dmt_active=0, dmt_deactivation_time=? "
+                            "WHERE id IN (SELECT value FROM json_each(?))",
+                            (deactivation_time, json.dumps(removed_ids)))
+                db_modified = True
+
+            if updates or removed_ids:
+                log.info(f'Masternodes saved to db: {len(updates)} updated, {len(removed_ids)} deactivated')
+        finally:
+            if db_modified:
+                self.db_intf.commit()
+            self.db_intf.release_cursor()
+        return db_modified
+
+    def _fetch_masternode_list_changes(self, tip_hash: str, tip_height: int, feedback_fun: Optional[Callable]) \
+            -> Optional[Tuple[Dict[str, Dict], Dict[str, Dict], Set[str]]]:
+        """
+        Fetches the data of the masternodes that have changed since the block of the last sync: those added,
+        modified ('protx diff'), paid ('masternode payments') and those with a non-zero PoSe penalty, which
+        is decreased on each block.
+        :return: a tuple: ('masternodelist json' entries of the changed masternodes, 'protx info' results by
+            protx hash, protx hashes of the removed masternodes) or None if the full sync is needed
+        """
+        network = self.app_config.dash_network
+        base_hash = app_cache.get_value(f'MasternodesSyncBlockHash_{network}', '', str)
+        base_height = app_cache.get_value(f'MasternodesSyncBlockHeight_{network}', 0, int)
+        last_full_sync_time = app_cache.get_value(f'MasternodesLastFullSyncTime_{network}', 0, int)
+
+        if not self.masternodes or not base_hash or base_height <= 0 or \
+                not 0 <= tip_height - base_height <= MASTERNODES_DIFF_MAX_BLOCKS or \
+                int(time.time()) - last_full_sync_time >= MASTERNODES_FULL_SYNC_SECONDS:
+            return None
+        if base_hash == tip_hash:
+            return {}, {}, set()
+
+        try:
+            diff = self.proxy.protx('diff', base_hash, tip_hash)
+            if not isinstance(diff, dict) or diff.get('blockHash') != tip_hash:
+                raise Exception('Unexpected protx diff result')
+            removed = set(diff.get('deletedMNs', []))
+            changed = set(e.get('proRegTxHash') for e in diff.get('mnList', []) if e.get('proRegTxHash'))
+
+            if tip_height > base_height:
+                for block_payments in self.proxy.masternode('payments', tip_hash, base_height - tip_height):
+                    for mn_payment in block_payments.get('masternodes', []):
+                        if mn_payment.get('proTxHash'):
+                            changed.add(mn_payment.get('proTxHash'))
+
+            for mn in self.masternodes:
+                if mn.pose_penalty and mn.protx_hash:
+                    changed.add(mn.protx_hash)
+            changed = list(changed.difference(removed))
+
+            if len(changed) > MASTERNODES_DIFF_MAX_CHANGES:
+                log.info(f'Too many masternodes changed ({len(changed)}) for the incremental sync')
+                return None
+
+            calls = []
+            for protx_hash in changed:
+                calls.append(('masternodelist', 'json', protx_hash))
+                calls.append(('protx', 'info', protx_hash))
+            results = self.rpc_batch(calls)
+
+            mns_json = {}
+            protx_by_hash = {}
+            for idx, protx_hash in enumerate(changed):
+                if feedback_fun:
+                    feedback_fun()
+                # the 'masternodelist' filter is a partial match, so take only the entry of the requested masternode
+                for mn_id, mn_json in results[idx * 2].items():
+                    if mn_json.get('proTxHash') == protx_hash:
+                        mns_json[mn_id] = mn_json
+                protx_by_hash[protx_hash] = results[idx * 2 + 1]
+            log.info(f'Incremental masternode list sync: {len(mns_json)} changed, {len(removed)} removed')
+            return mns_json, protx_by_hash, removed
+        except Exception as e:
+            log.warning('Incremental masternode list sync failed, doing the full sync. Details: ' + str(e))
+            return None
 
     def _update_mn_queue_values(self, masternodes: List[Masternode]):
         """
@@ -1275,30 +2125,29 @@ class DashdInterface(WndUtils):
         payment_queue = []
         for mn in masternodes:
             if mn.status == 'ENABLED':
+                # the height from which the masternode waits for its payment; positions are assigned below in one
+                # pass, after sorting the queue by it
                 try:
                     if mn.lastpaidblock > 0:
-                        mn.queue_position = mn.lastpaidblock
+                        wait_height = mn.lastpaidblock
                     else:
-                        mn.queue_position = mn.registered_height
+                        wait_height = mn.registered_height
 
                     if mn.pose_revived_height is not None and mn.pose_revived_height > 0 and \
                             mn.pose_revived_height > mn.lastpaidblock:
-                        mn.queue_position = mn.pose_revived_height
+                        wait_height = mn.pose_revived_height
                 except Exception as e:
                     log.exception(str(e))
-
-                payment_queue.append(mn)
-                if mn.type == 'Evo':
-                    payment_queue.append(mn)  # for Evo node, take 4 places in the payment queue
-                    payment_queue.append(mn)
-                    payment_queue.append(mn)
+                    wait_height = mn.registered_height
+                payment_queue.append((wait_height, mn))
             else:
                 mn.queue_position = None
-        payment_queue.sort(key=lambda x: x.queue_position, reverse=False)
+        payment_queue.sort(key=lambda x: x[0])  # stable, so the masternodes with the same height keep their order
 
-        for mn in masternodes:
-            if mn.status == 'ENABLED':
-                mn.queue_position = payment_queue.index(mn) + 1
+        position = 1
+        for _, mn in payment_queue:
+            mn.queue_position = position
+            position += MASTERNODE_EVO_PAYMENT_QUEUE_WEIGHT if mn.type == 'Evo' else 1
 
     @control_rpc_call
     def get_masternodelist(self, *args, data_max_age=MASTERNODES_CACHE_VALID_SECONDS,
@@ -1318,27 +2167,41 @@ class DashdInterface(WndUtils):
                 if self.masternodes and data_max_age > 0 and int(time.time()) - last_read_time < data_max_age:
                     return self.masternodes
                 else:
-                    log.info('Fetching protx data from the network')
-                    protx_list = self.proxy.protx('list', 'registered', True)
-                    protx_by_hash = {}
-                    for protx_json in protx_list:
-                        if feedback_fun:
-                            feedback_fun()
-                        protx_hash = protx_json.get('proTxHash')
-                        if protx_hash:
-                            protx_by_hash[protx_hash] = protx_json
-                    log.info('Finished fetching protx data from the network')
-
-                    for mn in self.masternodes:
-                        # mark to delete masternode existing in cache but no longer existing on the network
-                        mn.marker = False
-                        mn.modified = False
-
-                    log.info('Fetching masternode data from the network')
-                    mns_json = self.proxy.masternodelist(*args)
+                    # the block to which the fetched data corresponds to (at least); it's read first, so the
+                    # changes made after it will be fetched again by the next incremental sync
+                    tip_height = self.getblockcount()
+                    tip_hash = self.proxy.getblockhash(tip_height)
+
+                    changes = self._fetch_masternode_list_changes(tip_hash, tip_height, feedback_fun)
+                    if changes is not None:
+                        mns_json, protx_by_hash, removed_protx_hashes = changes
+                        for mn in self.masternodes:
+                            # keep the masternodes not removed since the last sync
+                            mn.marker = mn.protx_hash not in removed_protx_hashes
+                        full_sync_time = None
+                    else:
+                        log.info('Fetching protx data from the network')
+                        protx_list = self.proxy.protx('list', 'registered', True)
+                        protx_by_hash = {}
+                        for protx_json in protx_list:
+                            if feedback_fun:
+                                feedback_fun()
+                            protx_hash = protx_json.get('proTxHash')
+                            if protx_hash:
+                                protx_by_hash[protx_hash] = protx_json
+                        log.info('Finished fetching protx data from the network')
+
+                        for mn in self.masternodes:
+                            # mark to delete masternode existing in cache but no longer existing on the network
+                            mn.marker = False
+
+                        log.info('Fetching masternode data from the network')
+                        mns_json = self.proxy.masternodelist(*args)
+                        log.info('Finished fetching masternode data from the network')
+                        full_sync_time = int(time.time())
                     app_cache.set_value(f'MasternodesLastReadTime_{self.app_config.dash_network}', int(time.time()))
-                    log.info('Finished fetching masternode data from the network')
 
+                    pose_ban_mns: List[Masternode] = []
                     for mn_id in mns_json.keys():
                         if feedback_fun:
                             feedback_fun()
@@ -1348,13 +2211,11 @@ class DashdInterface(WndUtils):
                         old_pose_ban_height = mn.pose_ban_height if mn else -1
                         if not mn:
                             mn = Masternode()
-                            mn.monitor_changes = True
                             mn.copy_from_json(mn_id, mn_json)
                             self.masternodes.append(mn)
                             self.masternodes_by_ident[mn_id] = mn
                             self.masternodes_by_ip_port[mn.ip_port] = mn
                         else:
-                            mn.monitor_changes = True
                             mn.copy_from_json(mn_id, mn_json)
 
                         if protx_json:
@@ -1362,54 +2223,35 @@ class DashdInterface(WndUtils):
 
                         if mn.pose_ban_height > 0 and (old_pose_ban_height != mn.pose_ban_height or
                                                        mn.pose_ban_timestamp is None or mn.pose_ban_timestamp <= 0):
-                            try:
-                                mn.pose_ban_timestamp = self.get_block_timestamp(mn.pose_ban_height)
-                            except Exception as e:
-                                log.error(f'Error calling get_block_timestamp for block {mn.pose_ban_height}: ' + str(e))
+                            pose_ban_mns.append(mn)
                         mn.marker = True
+
+                    if pose_ban_mns:
+                        try:
+                            timestamps = self.get_block_timestamps([mn.pose_ban_height for mn in pose_ban_mns])
+                            for mn in pose_ban_mns:
+                                mn.pose_ban_timestamp = timestamps.get(mn.pose_ban_height)
+                        except Exception as e:
+                            log.error(f'Error calling get_block_timestamps for PoSe-banned masternodes: ' + str(e))
+
+                    # remove non-existing masternodes from cache
+                    removed_mns: List[Masternode] = []
+                    for mn_index in reversed(range(len(self.masternodes))):
+                        mn = self.masternodes[mn_index]
+                        if not mn.marker:
+                            removed_mns.append(mn)
+                            self.masternodes_by_ident.pop(mn.ident, 0)
+                            del self.masternodes[mn_index]
+
+                    # after removing, so the removed masternodes don't take positions in the payment queue
                     self._update_mn_queue_values(self.masternodes)
                     log.info('Finished processing masternode data')
 
-                    # save masternodes to the db cache
-                    db_modified = False
-                    cur = None
-                    try:
-                        if self.db_intf.db_active:
-                            cur = self.db_intf.get_cursor()
-
-                        for mn in self.masternodes:
-                            if feedback_fun:
-                                feedback_fun()
-
-                            if self.db_intf.db_active:
-                                if mn.modified:
-                                    mn.update_in_db(cur)
-                                    mn.modified = False
-                                    db_modified = True
-                                    self.masternodes_last_db_timestamp = int(time.time())
-
-                        # remove non-existing masternodes from cache
-                        for mn_index in reversed(range(len(self.masternodes))):
-                            if feedback_fun:
-                                feedback_fun()
-                            mn = self.masternodes[mn_index]
-
-                            if not mn.marker:
-                                if self.db_intf.db_active:
-                                    mn.dmt_deactivation_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-                                    cur.execute("UPDATE MASTERNODES set dmt_active=0, dmt_deactivation_time=?"
-                                                "WHERE ID=?",
-                                                (mn.dmt_deactivation_time, mn.db_id))
-                                    db_modified = True
-                                    self.masternodes_last_db_timestamp = int(time.time())
-                                self.masternodes_by_ident.pop(mn.ident,0)
-                                del self.masternodes[mn_index]
-                    finally:
-                        if db_modified:
-                            self.db_intf.commit()
-                        if cur is not None:
-                            self.db_intf.release_cursor()
+                    if self.db_intf.db_active:
+                        if self._save_masternodes_to_db(self.masternodes, removed_mns, feedback_fun):
+                            self.masternodes_last_db_timestamp = int(time.time())
 
+                    self._save_masternodes_sync_block(tip_hash, tip_height, full_sync_time)
                     return self.masternodes
             else:
                 mns = self.proxy.masternodelist(*args)
@@ -1417,7 +2259,7 @@ class DashdInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(read_only=True)
     def getaddressbalance(self, addresses):
         if self.open():
             return self.proxy.getaddressbalance({'addresses': addresses})
@@ -1448,29 +2290,112 @@ class DashdInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
-    def decompress_rpc_result(self, result: Any) -> Tuple[Any, int]:
+    def decompress_rpc_result(self, result: Any) -> Any:
         """
         The function decompresses data received from a remote RPC node if it is compressed.
         If the data is compressed, it is a dictionary with the following fields: 'encoding' (with value 'gzip+base64')
         and 'encoded_data'.
         :param result:
-        :return: [0]: Uncompressed data or the unchanged input data if they are not compressed.
-                 [1]: Size of the received data
+        :return: Uncompressed data or the unchanged input data if they are not compressed.
         """
         if not isinstance(result, dict) or not result.get("encoding") == 'gzip+base64' or not result.get('encoded_data'):
-            return result, len(str(result))
+            return result
 
         if result["encoding"] == "gzip+base64":
             tm_begin = time.time()
-            compressed = base64.b64decode(result["encoded_data"])
-            decompressed = gzip.decompress(compressed)
-            ret = json.loads(decompressed.decode('utf-8'))
+            # The base64 text comes from the already parsed RPC response, so it stays in memory until the whole
+            # response is decompressed. It is decoded block by block, so only one block of the binary gzip data
+            # exists at a time. The text and the decompressed buffer are released before the JSON parsing, so that
+            # only the decoded text and the parsed objects coexist at the end.
+            encoded_data = result.pop('encoded_data')
+            encoded_len = len(encoded_data)
+            decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)  # gzip format
+            decompressed = bytearray()
+            for offset in range(0, encoded_len, RPC_DECODE_BLOCK_SIZE):
+                decompressed += decompressor.decompress(
+                    base64.b64decode(encoded_data[offset: offset + RPC_DECODE_BLOCK_SIZE]))
+            decompressed += decompressor.flush()
+            del encoded_data
+            text = decompressed.decode('utf-8')
+            del decompressed
+            ret = json.loads(text)
             tm_diff = time.time() - tm_begin
-            log.debug(f'Compressed data length: {len(result["encoded_data"])}, decompress duration: {round(tm_diff, 2)}')
-            return ret, len(result["encoded_data"])
+            log.debug(f'Compressed data length: {encoded_len}, decompress duration: {round(tm_diff, 2)}')
+            return ret
 
         raise ValueError(f"Unknown encoding format: {result.get('encoding')}")
 
+    @control_rpc_call(allow_switching_conns=False)
+    def _getaddressdeltasrawtx_dmt_chunk(self, *args):
+        if self.open():
+            return self.proxy.getaddressdeltasrawtx_dmt(*args)
+        else:
+            raise Exception('Not connected')
+
+    def prefetch_addressdeltasrawtx_dmt_chunks(self, addresses: List[str], start: int, end: int, verbose: int,
+                                               include_mempool: int) -> Generator[List[Dict], None, None]:
+        """
+        Yields consecutive chunks of transactions returned by the 'getaddressdeltasrawtx_dmt' call. The next chunk
+        is fetched and decoded in a background thread while the previous one is being processed by the caller; at
+        most RPC_PREFETCH_QUEUE_SIZE decoded chunks are kept waiting, after which the background thread stops
+        fetching until the caller catches up.
+        """
+        allow_compression = 1
+        max_chunk_prepare_time = 5
+        chunk_queue = queue.Queue(maxsize=RPC_PREFETCH_QUEUE_SIZE)
+        finishing = threading.Event()
+
+        def put_item(item) -> bool:
+            while not finishing.is_set():
+                try:
+                    chunk_queue.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def fetch_chunks():
+            try:
+                start_offset = 0
+                while not finishing.is_set():
+                    result = self._getaddressdeltasrawtx_dmt_chunk(addresses, start, end, verbose, include_mempool,
+                                                                   start_offset, allow_compression,
+                                                                   max_chunk_prepare_time)
+                    result = self.decompress_rpc_result(result)
+                    if not isinstance(result, dict):
+                        raise Exception('Incorrect type the data received. Should be dict.')
+                    transactions = result.get('transactions', [])
+                    is_complete = result.get('is_complete')
+                    del result
+
+                    if not put_item(transactions):
+                        break
+                    if is_complete is False:
+                        if len(transactions) == 0:
+                            log.warning(f'getaddressdeltasrawtx_dmt returned no transactions for '
+                                        f'start_offset={start_offset}. Breaking the process...')
+                            break
+                        start_offset += len(transactions)
+                    else:
+                        break
+                put_item(None)
+            except Exception as e:
+                put_item(e)
+
+        thread = threading.Thread(target=fetch_chunks, name='RpcPrefetch', daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = chunk_queue.get()
+                if item is None:
+                    break
+                elif isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            # if the consumer has finished prematurely, the thread exits after the chunk it is currently fetching
+            finishing.set()
+
     @control_rpc_call(allow_switching_conns=False)
     def getaddressdeltasrawtx_dmt(self, addresses: List[str], start: int, end: int,
                                   verbose: int, include_mempool: int, skip_cache=False) -> Generator[Dict, None, None]:
@@ -1478,10 +2403,6 @@ class DashdInterface(WndUtils):
         :param addresses: List of addresses to query
         :return:
         """
-
-        allow_compression = 1
-        max_chunk_prepare_time = 5
-
         if self.open():
             tm_begin = time.time()
             fv = self.checkfeaturesupport('getaddressdeltasrawtx_dmt', self.app_config.app_version)
@@ -1489,40 +2410,22 @@ class DashdInterface(WndUtils):
             tx_count = 0
 
             if start <= end:
-                start_offset = 0
                 if en:
-                    while True:
-                        result = self.proxy.getaddressdeltasrawtx_dmt(addresses, start, end, verbose, include_mempool,
-                                                                      start_offset, allow_compression,
-                                                                      max_chunk_prepare_time)
-                        result, size = self.decompress_rpc_result(result)
-
-                        if isinstance(result, dict):
-                            transactions = result.get('transactions')
-                            is_complete = result.get('is_complete')
-                            self.metrics_bytes_received += size
-
-                            for r in transactions:
-                                tx_count += 1
-                                yield r
-
-                            if is_complete is False:
-                                if len(transactions) == 0:
-                                    log.warning(f'getaddressdeltasrawtx_dmt returned no transactions for '
-                                                f'start_offset={start_offset}. Breaking the process...')
-                                start_offset += len(transactions)
-                            else:
-                                break
-                        else:
-                            log.error('Incorrect type the data received. Should be dict.')
+                    for transactions in self.prefetch_addressdeltasrawtx_dmt_chunks(addresses, start, end, verbose,
+                                                                                     include_mempool):
+                        for r in transactions:
+                            tx_count += 1
+                            yield r
                 else:
                     r = self.getaddressdeltas({'addresses': addresses, 'start': start, 'end': end})
 
-                    for tx_index, tx_entry in enumerate(r):
-                        tx_id = tx_entry.get('txid')
-                        if tx_id:
-                            tx_raw = self.getrawtransaction(tx_id, verbose, skip_cache=skip_cache)
-                            yield tx_raw
+                    for chunk_start in range(0, len(r), RPC_BATCH_MAX_SIZE):
+                        tx_ids = [tx_entry.get('txid') for tx_entry in r[chunk_start: chunk_start + RPC_BATCH_MAX_SIZE]
+                                  if tx_entry.get('txid')]
+                        txes = self.getrawtransactions(tx_ids, verbose, skip_cache=skip_cache)
+                        for tx_id in tx_ids:
+                            tx_count += 1
+                            yield txes[tx_id]
 
                     if include_mempool:
                         # add transactions from mempool if there are any
@@ -1547,36 +2450,43 @@ class DashdInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(read_only=True)
     def getaddressutxos(self, addresses):
         if self.open():
             return self.proxy.getaddressutxos({'addresses': addresses})
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(read_only=True)
     def getaddressmempool(self, addresses):
         if self.open():
             return self.proxy.getaddressmempool({'addresses': addresses})
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(read_only=True)
     def getrawmempool(self):
         if self.open():
             return self.proxy.getrawmempool()
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
     def getrawtransaction(self, txid, verbose, skip_cache=False):
+        """
+        :return: transaction details; the returned object can be shared with other callers, so it must not be
+            modified
+        """
+        if not skip_cache:
+            tx_json = self.tx_mem_cache.get(txid, verbose)
+            if tx_json is not None:
+                return tx_json
 
-        def check_if_tx_confirmed(tx_json):
-            # cached transaction will not be accepted if the transaction stored in cache file was not confirmed
-            if tx_json.get('confirmations'):
-                return True
-            return False
+        tx_json = self._getrawtransaction(txid, verbose, skip_cache)
+        self.tx_mem_cache.put(txid, verbose, tx_json, check_if_tx_final(tx_json))
+        return tx_json
 
+    @control_rpc_call(read_only=True)
+    def _getrawtransaction(self, txid, verbose, skip_cache=False):
         if self.open():
             tx_json = json_cache_wrapper(self.proxy.getrawtransaction, self, 'tx-' + str(verbose) + '-' + txid,
                                          skip_cache=skip_cache, accept_cache_data_fun=check_if_tx_confirmed)\
@@ -1586,19 +2496,58 @@ class DashdInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    def getrawtransactions(self, txids: List[str], verbose, skip_cache=False) -> Dict[str, Any]:
+        """
+        Bulk version of getrawtransaction: transactions not found in the cache are fetched from the network with
+        JSON-RPC batch requests.
+        :return: dict of transactions by their hashes
+        """
+        txes = {}
+        txids_to_fetch = []
+        for txid in txids:
+            if txid in txes or txid in txids_to_fetch:
+                continue
+            tx_json = None
+            if not skip_cache:
+                tx_json = self.tx_mem_cache.get(txid, verbose)
+                if tx_json is None:
+                    tx_json = json_cache_read(self, 'tx-' + str(verbose) + '-' + txid, check_if_tx_confirmed)
+                    if tx_json is not None:
+                        self.tx_mem_cache.put(txid, verbose, tx_json, True)
+            if tx_json is not None:
+                txes[txid] = tx_json
+            else:
+                txids_to_fetch.append(txid)
+
+        if txids_to_fetch:
+            results = self.rpc_batch([('getrawtransaction', txid, verbose) for txid in txids_to_fetch])
+            for txid, tx_json in zip(txids_to_fetch, results):
+                json_cache_write(self, 'tx-' + str(verbose) + '-' + txid, tx_json, check_if_tx_confirmed)
+                self.tx_mem_cache.put(txid, verbose, tx_json, check_if_tx_final(tx_json))
+                txes[txid] = tx_json
+        return txes
+
+    @control_rpc_call(read_only=True)
     def getblockhash(self, blockid, skip_cache=False):
         if self.open():
-            return json_cache_wrapper(self.proxy.getblockhash, self, 'blockhash-' + str(blockid),
-                                      skip_cache=skip_cache)(blockid)
+            if isinstance(blockid, int) and self.last_block_height and \
+                    blockid <= self.last_block_height - BLOCK_CACHE_MIN_CONFIRMATIONS:
+                return json_cache_wrapper(self.proxy.getblockhash, self, 'blockhash-' + str(blockid),
+                                          skip_cache=skip_cache)(blockid)
+            else:
+                # the hash of a recent block can still change by a reorg, so it's not cached
+                return self.proxy.getblockhash(blockid)
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(read_only=True)
     def getblockheader(self, blockhash, skip_cache=False):
         if self.open():
+            # headers of the recent blocks are stored as unconfirmed, so they expire and are not accepted on read
             return json_cache_wrapper(self.proxy.getblockheader, self, 'blockheader-' + str(blockhash),
-                                      skip_cache=skip_cache)(blockhash)
+                                      skip_cache=skip_cache,
+                                      accept_cache_data_fun=lambda j: j.get('confirmations', 0) >=
+                                      BLOCK_CACHE_MIN_CONFIRMATIONS)(blockhash)
         else:
             raise Exception('Not connected')
 
@@ -1629,7 +2578,7 @@ class DashdInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(read_only=True)
     def getcurrentvotes(self, hash):
         if self.open():
             return self.proxy.getcurrentvotes(hash)
@@ -1650,14 +2599,14 @@ class DashdInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(read_only=True)
     def getgovernanceinfo(self):
         if self.open():
             return self.proxy.getgovernanceinfo()
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(read_only=True)
     def getsuperblockbudget(self, block_index):
         if self.open():
             return self.proxy.getsuperblockbudget(block_index)
@@ -1672,14 +2621,14 @@ class DashdInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(read_only=True)
     def getaddressdeltas(self, *args):
         if self.open():
             return self.proxy.getaddressdeltas(*args)
         else:
             raise Exception('Not connected')
 
-    @control_rpc_call
+    @control_rpc_call(read_only=True)
     def getaddresstxids(self, *args):
         if self.open():
             return self.proxy.getaddresstxids(*args)
@@ -1700,6 +2649,107 @@ class DashdInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
+    def _rpc_batch_post(self, calls: List[Tuple]) -> List[Any]:
+        """
+        Sends a list of RPC calls as a single JSON-RPC batch request.
+        :return: list of results in the order of 'calls'; for failed calls the list contains JSONRPCException objects
+        """
+        request = []
+        for call in calls:
+            self.rpc_batch_id += 1
+            request.append({'version': '1.1', 'method': call[0], 'params': list(call[1:]), 'id': self.rpc_batch_id})
+
+        postdata = json.dumps(request, default=EncodeDecimal)
+        self.http_conn.request('POST', '/', postdata,
+                               {'Host': self.http_conn.host,
+                                'User-Agent': 'DMT',
+                                'Authorization': self.rpc_auth_header,
+                                'Content-type': 'application/json'})
+        self.http_conn.sock.settimeout(RPC_TIMEOUT_SECONDS)
+        http_response = self.http_conn.getresponse()
+        response_data = http_response.read()
+
+        content_type = http_response.getheader('Content-Type', '')
+        if not content_type.startswith('application/json'):
+            if http_response.status in (401, 403):
+                raise JSONRPCException({'code': -342, 'message': 'non-JSON HTTP response with \'%i %s\' from server' %
+                                                                  (http_response.status, http_response.reason)})
+            raise DashdBatchNotSupported(f'HTTP response {http_response.status} {http_response.reason}')
+
+        responses = json.loads(response_data.decode('utf8'), parse_float=decimal.Decimal)
+        if not isinstance(responses, list):
+            raise DashdBatchNotSupported(str(responses.get('error') if isinstance(responses, dict) else responses))
+
+        responses_by_id = {}
+        for r in responses:
+            if isinstance(r, dict):
+                responses_by_id[r.get('id')] = r
+
+        results = []
+        for req in request:
+            r = responses_by_id.get(req['id'])
+            if r is None:
+                results.append(JSONRPCException({'code': -343, 'message': 'missing JSON-RPC result'}))
+            elif r.get('error') is not None:
+                results.append(JSONRPCException(r['error']))
+            else:
+                results.append(r.get('result'))
+        return results
+
+    def _rpc_batch_chunk(self, calls: List[Tuple], encrypt_rpc_arguments: bool, raise_on_error: bool) -> List[Any]:
+        if self.open():
+            if encrypt_rpc_arguments and self.cur_conn_def:
+                calls = [(c[0],) + (self.encrypt_call_args(tuple(c[1:])) or tuple(c[1:])) for c in calls]
+
+            conn_features = self.conn_features.get(self.cur_conn_def.get_conn_id(), {})
+            results = None
+            if conn_features.get('rpc_batch', {}).get('enabled', True):
+                try:
+                    results = self._rpc_batch_post(calls)
+                except DashdBatchNotSupported as e:
+                    log.warning(f'RPC node {self.cur_conn_def.get_description()} does not support batch requests '
+                                f'({str(e)}). Sending calls one by one.')
+                    conn_features['rpc_batch'] = {'enabled': False}
+                    self.conn_features[self.cur_conn_def.get_conn_id()] = conn_features
+                    self.http_conn.close()
+
+            if results is None:
+                results = []
+                for c in calls:
+                    try:
+                        results.append(self.proxy.__getattr__(c[0])(*c[1:]))
+                    except JSONRPCException as e:
+                        results.append(e)
+
+            if raise_on_error:
+                for r in results:
+                    if isinstance(r, JSONRPCException):
+                        raise r
+            return results
+        else:
+            raise Exception('Not connected')
+
+    def rpc_batch(self, calls: List[Union[List, Tuple]], encrypt_rpc_arguments: bool = False,
+                  allow_switching_conns: bool = True, raise_on_error: bool = True) -> List[Any]:
+        """
+        Performs multiple RPC calls using JSON-RPC batch requests, so that up to RPC_BATCH_MAX_SIZE calls go out in
+        a single HTTP round-trip. Retrying, switching of connections and encryption of arguments work the same
+        way as for a single RPC call.
+        :param calls: list of calls, each in the form: [method_name, arg1, arg2, ...]
+        :param raise_on_error: if True, the first failed call raises JSONRPCException; otherwise, in place of
+            the results of the failed calls, the returned list contains JSONRPCException objects
+        :return: list of results in the order of 'calls'
+        """
+        def call_batch(self, calls_chunk):
+            return self._rpc_batch_chunk(calls_chunk, encrypt_rpc_arguments, raise_on_error)
+
+        call_batch.__setattr__('__name__', 'rpc_batch')
+        fun = control_rpc_call(call_batch, allow_switching_conns=allow_switching_conns)
+        results = []
+        for idx in range(0, len(calls), RPC_BATCH_MAX_SIZE):
+            results.extend(fun(self, calls[idx: idx + RPC_BATCH_MAX_SIZE]))
+        return results
+
     def rpc_call(self, encrypt_rpc_arguments: bool, allow_switching_conns: bool, command: str, *args):
         def call_command(self, *args):
             c = self.proxy.__getattr__(command)
@@ -1721,6 +2771,29 @@ class DashdInterface(WndUtils):
         else:
             raise Exception('Not connected')
 
+    def encrypt_call_args(self, args: Tuple) -> Optional[Tuple]:
+        """
+        Encrypts RPC call arguments for the current connection. If the RPC node supports the 'encryption_v2'
+        feature, the symmetric session encryption (DMTENCRYPTEDV2) is used, otherwise the arguments are encrypted
+        in chunks with the node's RSA public key (DMTENCRYPTEDV1).
+        :return: arguments to be passed instead of the original ones or None, if the connection has no RSA public key
+            configured
+        """
+        conn_def = self.cur_conn_def
+        pubkey = conn_def.get_rpc_encryption_pubkey_object() if conn_def else None
+        if not pubkey:
+            return None
+
+        if self.checkfeaturesupport('encryption_v2', self.app_config.app_version).get('enabled', False):
+            with self.rpc_encryption_lock:
+                session = self.rpc_encryption_sessions.get(conn_def.get_conn_id())
+                if not session or not session.is_valid_for(pubkey):
+                    session = RpcEncryptionSession(pubkey)
+                    self.rpc_encryption_sessions[conn_def.get_conn_id()] = session
+            return session.encrypt_args(args)
+        else:
+            return encrypt_rpc_args(pubkey, args)
+
     @control_rpc_call
     def checkfeaturesupport(self, feature_name: str, dmt_version: str, *args) -> Dict:
         if self.open():
@@ -1754,14 +2827,130 @@ class DashdInterface(WndUtils):
     def get_block_timestamp(self, block: int):
         ts = self.block_timestamps.get(block)
         if ts is None:
-            bhash = self.getblockhash(block)
-            bh = self.getblockheader(bhash)
-            ts = bh['time']
-            self.block_timestamps[block] = ts
+            ts = self.get_block_timestamps([block])[block]
         return ts
 
+    def get_block_timestamps(self, blocks: List[int]) -> Dict[int, int]:
+        """
+        Bulk version of get_block_timestamp: timestamps are read from the in-memory cache, then from the block_index
+        table of the db cache and the missing ones are fetched from the network.
+        :return: dict of block timestamps by block heights
+        """
+        timestamps = {}
+        blocks_missing = []
+        for block in blocks:
+            ts = self.block_timestamps.get(block)
+            if ts is not None:
+                timestamps[block] = ts
+            elif block not in blocks_missing:
+                blocks_missing.append(block)
+
+        if blocks_missing:
+            for block, ts in self.read_block_index(blocks_missing).items():
+                self.block_timestamps[block] = ts
+                timestamps[block] = ts
+            blocks_missing = [block for block in blocks_missing if block not in timestamps]
+
+        if blocks_missing:
+            headers = self.fetch_block_headers(sorted(blocks_missing))
+            for bh in headers:
+                self.block_timestamps[bh['height']] = bh['time']
+            self.save_block_index(headers)
+            for block in blocks_missing:
+                timestamps[block] = self.block_timestamps[block]
+        return timestamps
+
+    def fetch_block_headers(self, heights: List[int]) -> List[Dict]:
+        """
+        Fetches headers of blocks with the given (sorted, unique) heights. Heights lying close to each other are
+        fetched as one range with the 'getblockheaders' call, so headers of the blocks in between are prefetched as
+        well; the remaining ones with batched 'getblockhash' and 'getblockheader' calls.
+        """
+        ranges: List[List[int]] = []
+        for height in heights:
+            if ranges and height - ranges[-1][-1] <= BLOCK_INDEX_RANGE_MAX_GAP and \
+                    height - ranges[-1][0] < BLOCK_INDEX_RANGE_MAX_SIZE:
+                ranges[-1].append(height)
+            else:
+                ranges.append([height])
+
+        conn_id = self.cur_conn_def.get_conn_id() if self.cur_conn_def else None
+        headers_enabled = self.conn_features.get(conn_id, {}).get('getblockheaders', {}).get('enabled', True)
+        if not headers_enabled:
+            ranges = [[height] for height in heights]
+
+        block_hashes = self.rpc_batch([('getblockhash', r[0]) for r in ranges])
+        calls = []
+        for r, bhash in zip(ranges, block_hashes):
+            if len(r) > 1:
+                calls.append(('getblockheaders', bhash, r[-1] - r[0] + 1))
+            else:
+                calls.append(('getblockheader', bhash))
+        results = self.rpc_batch(calls, raise_on_error=False)
+
+        headers = []
+        heights_to_fetch = []
+        for r, call, result in zip(ranges, calls, results):
+            if isinstance(result, JSONRPCException):
+                if call[0] == 'getblockheaders':
+                    heights_to_fetch.extend(r)
+                    if headers_enabled:
+                        log.warning(f'getblockheaders call failed ({str(result)}). Fetching block headers one by one.')
+                        conn_features = self.conn_features.get(conn_id, {})
+                        conn_features['getblockheaders'] = {'enabled': False}
+                        self.conn_features[conn_id] = conn_features
+                        headers_enabled = False
+                else:
+                    raise result
+            elif call[0] == 'getblockheaders':
+                headers.extend(result)
+            else:
+                headers.append(result)
+
+        if heights_to_fetch:
+            headers.extend(self.fetch_block_headers(heights_to_fetch))
+        return headers
+
+    def read_block_index(self, blocks: List[int]) -> Dict[int, int]:
+        """
+        :return: timestamps of the given blocks found in the block_index table, by block heights
+        """
+        timestamps = {}
+        if self.db_intf and self.db_intf.is_active():
+            db_cursor = self.db_intf.get_read_cursor()
+            try:
+                for idx in range(0, len(blocks), 500):
+                    heights = blocks[idx: idx + 500]
+                    db_cursor.execute(f'select height, time from block_index where height in '
+                                      f'({",".join(["?"] * len(heights))})', heights)
+                    for height, ts in db_cursor.fetchall():
+                        timestamps[height] = ts
+            except Exception as e:
+                log.exception('Error while reading block_index: ' + str(e))
+            finally:
+                self.db_intf.release_read_cursor()
+        return timestamps
+
+    def save_block_index(self, headers: List[Dict]):
+        """
+        Stores the hashes and timestamps of the blocks that are deep enough not to be affected by a reorganization.
+        """
+        if self.db_intf and self.db_intf.is_active() and self.last_block_height:
+            max_height = self.last_block_height - BLOCK_INDEX_MIN_CONFIRMATIONS
+            rows = [(bh['height'], bh['hash'], bh['time']) for bh in headers if bh['height'] <= max_height]
+            if rows:
+                db_cursor = self.db_intf.get_cursor()
+                try:
+                    db_cursor.executemany('insert or replace into block_index(height, block_hash, time) '
+                                          'values(?,?,?)', rows)
+                    self.db_intf.commit()
+                except Exception as e:
+                    log.exception('Error while saving block_index: ' + str(e))
+                finally:
+                    self.db_intf.release_cursor()
+
     def fetch_mempool_txes(self, feedback_fun: Optional[Callable] = None):
-        cur_mempool_txes = self.proxy.getrawmempool()
+        cur_mempool_txes = self.getrawmempool()
 
         txes_to_purge = []
         for tx_hash in self.mempool_txes:
@@ -1771,14 +2960,20 @@ class DashdInterface(WndUtils):
         for tx_hash in txes_to_purge:
             del self.mempool_txes[tx_hash]
 
-        for tx_hash in cur_mempool_txes:
+        new_tx_hashes = [tx_hash for tx_hash in cur_mempool_txes if not self.mempool_txes.get(tx_hash)]
+        for idx in range(0, len(new_tx_hashes), RPC_BATCH_MAX_SIZE):
             if feedback_fun:
                 feedback_fun()
 
-            tx = self.mempool_txes.get(tx_hash)
-            if not tx:
-                tx = self.getrawtransaction(tx_hash, True, skip_cache=True)
-                self.mempool_txes[tx_hash] = tx
+            tx_hashes = new_tx_hashes[idx: idx + RPC_BATCH_MAX_SIZE]
+            results = self.rpc_batch([('getrawtransaction', tx_hash, 1) for tx_hash in tx_hashes],
+                                     raise_on_error=False)
+            for tx_hash, tx in zip(tx_hashes, results):
+                if isinstance(tx, JSONRPCException):
+                    # the transaction could have left the mempool in the meantime
+                    log.warning(f'Cannot read mempool transaction {tx_hash}: {str(tx)}')
+                else:
+                    self.mempool_txes[tx_hash] = tx
 
     def is_protx_update_pending(self, protx_hash: str, ip_port: str = None) -> bool:
         """
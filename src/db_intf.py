@@ -2,17 +2,39 @@
 # -*- coding: utf-8 -*-
 # Author: Bertrand256
 # Created on: 2017-10
+import datetime
+import json
 import os
+import time
+import urllib.parse
 
 import sqlite3
 import logging
 import threading
-from typing import List
+from typing import List, Callable, Optional, Dict, Any, Tuple
 import thread_utils
 
 
 log = logging.getLogger('dmt.db_intf')
 
+DB_CACHE_SIZE_KB = 64 * 1024
+DB_MMAP_SIZE = 256 * 1024 * 1024
+
+UNCONFIRMED_TX_BLOCK_HEIGHT = 99999999  # block height of the cached transactions not confirmed yet (mempool)
+
+# database maintenance (pruning, statistics, vacuum) is run on idle not more often than this
+DB_MAINTENANCE_INTERVAL_SECONDS = 24 * 60 * 60
+DB_MAINTENANCE_IDLE_SECONDS = 5 * 60  # the database is considered idle if not used for that time
+DB_MAINTENANCE_CHECK_SECONDS = 60
+DB_MAINTENANCE_VACUUM_STEP_PAGES = 1024  # number of free pages released in a single incremental vacuum step
+DB_MAINTENANCE_DELETE_CHUNK_SIZE = 500
+CFG_DB_LAST_MAINTENANCE_TIME = 'DB_LAST_MAINTENANCE_TIME'  # symbol in the LIVE_CONFIG table
+
+# default retention of the data that is no longer used by the application
+DB_RETENTION_MASTERNODES_DAYS = 365  # inactive (removed from the network) masternodes
+DB_RETENTION_PROPOSALS_DAYS = 365  # inactive proposals together with their votes
+DB_RETENTION_UNCONFIRMED_TX_DAYS = 2  # mempool transactions that never got confirmed
+
 
 class DBCache(object):
     """Purpose: coordinating access to a database cache (sqlite) from multiple threads.
@@ -23,6 +45,11 @@ class DBCache(object):
         1. get_cursor call locks the cache database to be used by the calling thread only
         2. subsequent get_cursor calls by the same thread require the same number of release_cursor calls;
            this is useful if you need multiple cursors to perform the required operations in one thread
+        3. the database connection is kept open until the close call; changes not committed by the time the last
+           cursor is released are rolled back
+        4. read-only operations can use 'get_read_cursor'/'release_read_cursor' instead; they use a separate,
+           read-only connection of the calling thread and don't wait for the writer's lock (in WAL mode readers see
+           the last committed state of the database)
     """
 
     def __init__(self):
@@ -32,6 +59,16 @@ class DBCache(object):
         self.lock = thread_utils.EnhRLock(stackinfo_skip_lines=1)
         self.depth = 0
         self.db_conn = None
+        self.read_conn_tls = threading.local()
+        self.read_conns: List[sqlite3.Connection] = []  # read-only connections of all threads
+        self.read_conns_lock = threading.Lock()
+        self.read_conns_generation = 0  # incremented when the read-only connections are closed
+        self.last_activity_time = time.time()
+        self.retention_masternodes_days = DB_RETENTION_MASTERNODES_DAYS
+        self.retention_proposals_days = DB_RETENTION_PROPOSALS_DAYS
+        self.retention_unconfirmed_tx_days = DB_RETENTION_UNCONFIRMED_TX_DAYS
+        self.maintenance_thread: Optional[threading.Thread] = None
+        self.maintenance_stop_event = threading.Event()
 
     def is_active(self):
         return self.db_active
@@ -46,16 +83,13 @@ class DBCache(object):
             log.debug('Trying to acquire db cache session')
             self.lock.acquire()
             try:
-                if self.db_conn is None:
-                    self.db_conn = sqlite3.connect(self.db_cache_file_name)
-                    db_conn2 = sqlite3.connect(self.db_labels_file_name)
-                    db_conn2.close()
-                    self.db_conn.execute(f"attach database '{self.db_labels_file_name}' as labels")
-
+                if self.db_conn is not None:
+                    self.db_conn.close()
+                    self.db_conn = None
+                self.connect()
                 self.create_structures()
+                self.db_conn.commit()
                 self.db_active = True
-                self.db_conn.close()
-                self.db_conn = None
                 self.depth = 0
 
             except Exception as e:
@@ -63,22 +97,112 @@ class DBCache(object):
 
             finally:
                 self.lock.release()
+
+            if self.db_active:
+                self.maintenance_stop_event.clear()
+                self.maintenance_thread = threading.Thread(target=self.maintenance_thread_proc,
+                                                           name='DBMaintenance', daemon=True)
+                self.maintenance_thread.start()
         else:
             raise Exception('Database cache already active.')
 
+    def connect(self):
+        self.db_conn = sqlite3.connect(self.db_cache_file_name, check_same_thread=False)
+        self.db_conn.execute(f"attach database '{self.db_labels_file_name}' as labels")
+        for schema in ('main', 'labels'):
+            # takes effect only for a new database; an existing cache is converted by the maintenance (see
+            # enable_incremental_vacuum)
+            self.db_conn.execute(f'PRAGMA {schema}.auto_vacuum=INCREMENTAL')
+            self.db_conn.execute(f'PRAGMA {schema}.journal_mode=WAL')
+            self.db_conn.execute(f'PRAGMA {schema}.synchronous=NORMAL')
+        self.db_conn.execute(f'PRAGMA cache_size=-{DB_CACHE_SIZE_KB}')
+        self.db_conn.execute(f'PRAGMA mmap_size={DB_MMAP_SIZE}')
+        self.db_conn.execute('PRAGMA temp_store=MEMORY')
+
     def close(self):
-        if self.depth > 0:
-            log.error('Database not closed yet. Depth: ' + str(self.depth))
-        self.db_active = False
+        if self.maintenance_thread:
+            self.maintenance_stop_event.set()
+            self.maintenance_thread.join()
+            self.maintenance_thread = None
+
+        self.lock.acquire()
+        try:
+            if self.depth > 0:
+                log.error('Database not closed yet. Depth: ' + str(self.depth))
+            elif self.db_conn is not None:
+                self.db_conn.close()
+                self.db_conn = None
+            self.db_active = False
+        finally:
+            self.lock.release()
+        self.close_read_conns()
+
+    def close_read_conns(self):
+        with self.read_conns_lock:
+            self.read_conns_generation += 1
+            for conn in self.read_conns:
+                try:
+                    conn.close()
+                except Exception as e:
+                    log.warning('Error while closing read-only connection: ' + str(e))
+            self.read_conns.clear()
+
+    def connect_read_only(self) -> sqlite3.Connection:
+        def ro_uri(file_name):
+            return 'file:' + urllib.parse.quote(os.path.abspath(file_name)) + '?mode=ro'
+
+        conn = sqlite3.connect(ro_uri(self.db_cache_file_name), uri=True, check_same_thread=False)
+        conn.execute("attach database ? as labels", (ro_uri(self.db_labels_file_name),))
+        conn.execute(f'PRAGMA cache_size=-{DB_CACHE_SIZE_KB}')
+        conn.execute(f'PRAGMA mmap_size={DB_MMAP_SIZE}')
+        conn.execute('PRAGMA temp_store=MEMORY')
+        return conn
+
+    def get_read_cursor(self):
+        """
+        Returns a cursor of the read-only connection of the calling thread. Temporary tables can be used with it.
+        Each call requires a matching 'release_read_cursor' call.
+        """
+        if self.db_active:
+            tls = self.read_conn_tls
+            conn = getattr(tls, 'conn', None)
+            if threading.current_thread() is not self.maintenance_thread:
+                self.last_activity_time = time.time()
+            if conn is None or tls.generation != self.read_conns_generation:
+                with self.read_conns_lock:
+                    conn = self.connect_read_only()
+                    self.read_conns.append(conn)
+                    tls.conn = conn
+                    tls.generation = self.read_conns_generation
+                    tls.depth = 0
+            tls.depth += 1
+            return conn.cursor()
+        else:
+            raise Exception('Database cache not active.')
+
+    def release_read_cursor(self):
+        tls = self.read_conn_tls
+        if getattr(tls, 'depth', 0) == 0:
+            raise Exception('Read cursor not acquired by this thread.')
+        tls.depth -= 1
+        if tls.depth == 0:
+            try:
+                if tls.generation == self.read_conns_generation and tls.conn.in_transaction:
+                    # end the transaction started by modifications of temporary tables, so the connection doesn't
+                    # hold an old snapshot of the database
+                    tls.conn.rollback()
+            except Exception as e:
+                log.warning('Error while releasing read-only cursor: ' + str(e))
 
     def get_cursor(self):
         if self.db_active:
             log.debug('Trying to acquire db cache session')
+            if threading.current_thread() is not self.maintenance_thread:
+                self.last_activity_time = time.time()
             self.lock.acquire()
             self.depth += 1
             if self.db_conn is None:
-                self.db_conn = sqlite3.connect(self.db_cache_file_name)
-                self.db_conn.execute(f"attach database '{self.db_labels_file_name}' as labels")
+                self.connect()
             log.debug('Acquired db cache session (%d)' % self.depth)
             return self.db_conn.cursor()
         else:
@@ -92,9 +216,8 @@ class DBCache(object):
                     raise Exception('Cursor not acquired by this thread.')
                 self.depth -= 1
                 try:
-                    if self.depth == 0:
-                        self.db_conn.close()
-                        self.db_conn = None
+                    if self.depth == 0 and self.db_conn.in_transaction:
+                        self.db_conn.rollback()
                 finally:
                     self.lock.release()
                 log.debug('Released db cache session (%d)' % self.depth)
@@ -127,177 +250,614 @@ class DBCache(object):
         else:
             log.warning('Cannot commit if db_active is False.')
 
+    def is_idle(self) -> bool:
+        return self.depth == 0 and time.time() - self.last_activity_time >= DB_MAINTENANCE_IDLE_SECONDS
+
+    def maintenance_thread_proc(self):
+        """
+        Runs the database maintenance when the database hasn't been used for DB_MAINTENANCE_IDLE_SECONDS, but not
+        more often than every DB_MAINTENANCE_INTERVAL_SECONDS (the time of the last run is kept in the database).
+        """
+        while not self.maintenance_stop_event.wait(DB_MAINTENANCE_CHECK_SECONDS):
+            try:
+                if self.db_active and self.is_idle():
+                    cur = self.get_cursor()
+                    try:
+                        cur.execute("SELECT value FROM LIVE_CONFIG WHERE symbol=?", (CFG_DB_LAST_MAINTENANCE_TIME,))
+                        row = cur.fetchone()
+                        last_time = int(row[0]) if row and row[0] else 0
+                    finally:
+                        self.release_cursor()
+                    if time.time() - last_time >= DB_MAINTENANCE_INTERVAL_SECONDS:
+                        self.run_maintenance(check_break_fun=lambda: self.maintenance_stop_event.is_set() or
+                                             not self.is_idle())
+            except Exception:
+                log.exception('Exception while running the database maintenance')
+
+    def run_maintenance(self, check_break_fun: Optional[Callable[[], bool]] = None) -> Dict[str, Any]:
+        """
+        Removes data that is no longer used by the application (according to the retention settings), refreshes
+        the statistics used by the query planner and releases the free pages to the file system. All steps are
+        done in small portions with the database lock released in between, so the maintenance can be broken
+        by the check_break_fun callback (returning True) when the database is needed by the application.
+        :return: summary of the run: number of rows deleted per category, bytes reclaimed and time taken
+        """
+        def file_size():
+            size = 0
+            for name in (self.db_cache_file_name, self.db_cache_file_name + '-wal'):
+                if os.path.exists(name):
+                    size += os.path.getsize(name)
+            return size
+
+        def is_break():
+            return check_break_fun is not None and check_break_fun()
+
+        tm_begin = time.time()
+        size_before = file_size()
+        deleted = {}
+        completed = False
+
+        deleted['unconfirmed_txs'], deleted['unconfirmed_tx_outputs'], deleted['unconfirmed_tx_inputs'] = \
+            self._prune_txs(
+                'SELECT id FROM tx WHERE block_height=? AND block_timestamp<?',
+                (UNCONFIRMED_TX_BLOCK_HEIGHT, int(time.time()) - self.retention_unconfirmed_tx_days * 86400), is_break)
+
+        if not is_break():
+            # transactions of the wallets that have been removed; such transactions don't refer to any of the
+            # wallet addresses (all the addresses they refer to have been converted to 'external' ones)
+            deleted['orphaned_txs'], deleted['orphaned_tx_outputs'], deleted['orphaned_tx_inputs'] = \
+                self._prune_txs(
+                    'SELECT id FROM tx t WHERE NOT EXISTS(SELECT 1 FROM tx_output o JOIN address a '
+                    'ON a.id=o.address_id WHERE o.tx_id=t.id AND a.external=0) AND NOT EXISTS(SELECT 1 FROM tx_input i '
+                    'JOIN address a ON a.id=i.src_address_id WHERE i.tx_id=t.id AND a.external=0)', (), is_break)
+
+        if not is_break():
+            cur = self.get_cursor()
+            try:
+                cur.execute('DELETE FROM address WHERE external=1 AND NOT EXISTS(SELECT 1 FROM tx_output o '
+                            'WHERE o.address_id=address.id) AND NOT EXISTS(SELECT 1 FROM tx_input i '
+                            'WHERE i.src_address_id=address.id)')
+                deleted['external_addresses'] = cur.rowcount
+
+                cutoff = int(time.time()) - self.retention_masternodes_days * 86400
+                cur.execute('DELETE FROM masternodes WHERE dmt_active=0 AND dmt_deactivation_time<?', (cutoff,))
+                deleted['masternodes'] = cur.rowcount
+
+                cutoff = (datetime.datetime.now() - datetime.timedelta(days=self.retention_proposals_days)).\
+                    strftime('%Y-%m-%d %H:%M:%S')
+                cur.execute('DELETE FROM voting_results WHERE proposal_id IN (SELECT id FROM proposals '
+                            'WHERE dmt_active=0 AND dmt_deactivation_time<?)', (cutoff,))
+                deleted['votes'] = cur.rowcount
+                cur.execute('DELETE FROM proposals WHERE dmt_active=0 AND dmt_deactivation_time<?', (cutoff,))
+                deleted['proposals'] = cur.rowcount
+                self.commit()
+
+                # the first run collects the statistics of all indexes; the later ones refresh only the outdated
+                cur.execute("SELECT 1 FROM sqlite_master WHERE type='table' AND name='sqlite_stat1'")
+                if not cur.fetchone():
+                    cur.execute('ANALYZE main')
+                else:
+                    cur.execute('PRAGMA optimize')
+            finally:
+                self.release_cursor()
+
+        incremental_vacuum = False
+        if not is_break():
+            cur = self.get_cursor()
+            try:
+                cur.execute('PRAGMA main.auto_vacuum')
+                incremental_vacuum = cur.fetchone()[0] == 2
+            finally:
+                self.release_cursor()
+            if not incremental_vacuum:
+                # a database created by the app versions not using the incremental auto-vacuum
+                incremental_vacuum = self.enable_incremental_vacuum(interruptible=check_break_fun is not None)
+
+        while incremental_vacuum and not is_break():
+            cur = self.get_cursor()
+            try:
+                cur.execute('PRAGMA main.freelist_count')
+                if not cur.fetchone()[0]:
+                    cur.execute("INSERT OR REPLACE INTO LIVE_CONFIG(symbol, value) VALUES(?, ?)",
+                                (CFG_DB_LAST_MAINTENANCE_TIME, str(int(time.time()))))
+                    self.commit()
+                    cur.execute('PRAGMA main.wal_checkpoint(TRUNCATE)')
+                    completed = True
+                    break
+                cur.execute(f'PRAGMA main.incremental_vacuum({DB_MAINTENANCE_VACUUM_STEP_PAGES})')
+                cur.fetchall()
+                self.commit()
+            finally:
+                self.release_cursor()
+
+        summary = {
+            'completed': completed,
+            'time_seconds': round(time.time() - tm_begin, 2),
+            'bytes_reclaimed': size_before - file_size(),
+            'rows_deleted': deleted
+        }
+        log.info('Database maintenance ' + ('finished: ' if completed else 'interrupted: ') + json.dumps(summary))
+        return summary
+
+    def _prune_txs(self, select_sql: str, params: tuple, is_break: Callable[[], bool]) -> Tuple[int, int, int]:
+        """ Deletes transactions (along with their inputs and outputs) selected by a given query in chunks.
+        :return: number of the deleted transactions, outputs and inputs """
+        cur = self.get_cursor()
+        try:
+            cur.execute(select_sql, params)
+            tx_ids = [row[0] for row in cur.fetchall()]
+        finally:
+            self.release_cursor()
+
+        tx_count = output_count = input_count = 0
+        for idx in range(0, len(tx_ids), DB_MAINTENANCE_DELETE_CHUNK_SIZE):
+            if is_break():
+                break
+            ids_param = json.dumps(tx_ids[idx: idx + DB_MAINTENANCE_DELETE_CHUNK_SIZE])
+            cur = self.get_cursor()
+            try:
+                cur.execute('DELETE FROM tx_output WHERE tx_id IN (SELECT value FROM json_each(?))', (ids_param,))
+                output_count += cur.rowcount
+                cur.execute('DELETE FROM tx_input WHERE tx_id IN (SELECT value FROM json_each(?))', (ids_param,))
+                input_count += cur.rowcount
+                cur.execute('DELETE FROM tx WHERE id IN (SELECT value FROM json_each(?))', (ids_param,))
+                tx_count += cur.rowcount
+                self.commit()
+            finally:
+                self.release_cursor()
+        return tx_count, output_count, input_count
+
     def create_structures(self):
+        """
+        Brings the schemas of the cache and labels databases up to date by running the migration steps not applied
+        yet; the number of steps applied so far is kept in the 'user_version' pragma of each database.
+        """
         try:
             cur = self.db_conn.cursor()
-            # create structures for masternodes data:
-            cur.execute("CREATE TABLE IF NOT EXISTS masternodes(id INTEGER PRIMARY KEY, ident TEXT, status TEXT,"
-                        " type TEXT, protocol TEXT, payee TEXT, last_seen INTEGER, active_seconds INTEGER,"
-                        " last_paid_time INTEGER, last_paid_block INTEGER, ip TEXT,"
-                        " collateral_hash TEXT, collateral_index INTEGER, collateral_address TEXT, "
-                        " owner_address TEXT, voting_address TEXT, pubkey_operator TEXT,"
-                        " platform_node_id TEXT, platform_p2p_port INTEGER, platform_http_port INTEGER, "
-                        " dmt_active INTEGER, dmt_create_time TEXT, dmt_deactivation_time TEXT, "
-                        " protx_hash TEXT, queue_position INTEGER, registered_height INTEGER, "
-                        " operator_reward REAL, pose_penalty INTEGER, pose_revived_height INTEGER, "
-                        " pose_ban_height INTEGER, operator_payout_address TEXT, pose_ban_timestamp INTEGER)")
-
-            cur.execute("CREATE INDEX IF NOT EXISTS IDX_masternodes_DMT_ACTIVE ON masternodes(dmt_active)")
-            cur.execute("CREATE INDEX IF NOT EXISTS IDX_masternodes_IDENT ON masternodes(ident)")
-            cur.execute("CREATE INDEX IF NOT EXISTS IDX_masternodes_DMT_CREATE_TIME ON masternodes(dmt_create_time)")
-            cur.execute("CREATE INDEX IF NOT EXISTS IDX_masternodes_DMT_DEACTIVATION_TIME ON "
-                        "masternodes(dmt_deactivation_time)")
-
-            # create structures for proposals:
-            cur.execute("CREATE TABLE IF NOT EXISTS proposals(id INTEGER PRIMARY KEY, name TEXT, payment_start TEXT,"
-                        " payment_end TEXT, payment_amount REAL, yes_count INTEGER, absolute_yes_count INTEGER,"
-                        " no_count INTEGER, abstain_count INTEGER, creation_time TEXT, url TEXT, payment_address TEXT,"
-                        " type INTEGER, hash TEXT,  collateral_hash TEXT, f_blockchain_validity INTEGER,"
-                        " f_cached_valid INTEGER, f_cached_delete INTEGER, f_cached_funding INTEGER, "
-                        " f_cached_endorsed INTEGER, object_type INTEGER, is_valid_reason TEXT, dmt_active INTEGER, "
-                        " dmt_create_time TEXT, dmt_deactivation_time TEXT, dmt_voting_last_read_time INTEGER,"
-                        " ext_attributes_loaded INTEGER, owner TEXT, title TEXT, ext_attributes_load_time INTEGER)")
-
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_proposals_hash ON proposals(hash)")
-
-            # structure for protx info
-            cur.execute("CREATE TABLE IF NOT EXISTS protx(id INTEGER PRIMARY KEY, protx_hash TEXT, "
-                        "operator_reward REAL, service TEXT, registered_height INTEGER, "
-                        "pose_penalty INTEGER, pose_revived_height INTEGER, pose_ban_height INTEGER, "                        
-                        "operator_payout_address TEXT)")
-
-            cur.execute("CREATE TABLE IF NOT EXISTS voting_results(id INTEGER PRIMARY KEY, proposal_id INTEGER,"
-                        " masternode_ident TEXT, voting_time TEXT, voting_result TEXT, signal TEXT, weight INTEGER,"
-                        " hash TEXT)")
-
-            cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_voting_results_hash ON voting_results(hash)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_voting_results_1 ON voting_results(proposal_id)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_voting_results_2 ON voting_results(masternode_ident)")
-
-            # Create table for storing live data, for example, last read time of proposals
-            cur.execute("CREATE TABLE IF NOT EXISTS LIVE_CONFIG(symbol text PRIMARY KEY, value TEXT)")
-            cur.execute("CREATE INDEX IF NOT EXISTS IDX_LIVE_CONFIG_SYMBOL ON LIVE_CONFIG(symbol)")
-            cur.execute("CREATE TABLE IF NOT EXISTS hd_tree(id INTEGER PRIMARY KEY, ident TEXT, label TEXT)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_hd_tree_1 ON hd_tree(ident)")
-
-            cur.execute("CREATE TABLE IF NOT EXISTS address(id INTEGER PRIMARY KEY,"
-                        "xpub_hash TEXT, parent_id INTEGER, address_index INTEGER, address TEXT, path TEXT, "
-                        "tree_id INTEGER, balance INTEGER DEFAULT 0 NOT NULL, received INTEGER DEFAULT 0 NOT NULL, "
-                        "is_change INTEGER, last_scan_block_height INTEGER DEFAULT 0 NOT NULL, label TEXT,"
-                        "status INTEGER DEFAULT 0)")
-
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_address_1 ON address(xpub_hash)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_address_2 ON address(parent_id, address_index)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_address_3 ON address(address)")
-            cur.execute("CREATE INDEX IF NOT EXISTS idx_address_4 ON address(tree_id)")
-
-            # if tx.block_height == 0, the transaction has not yet been confirmed (it may be the transaction that
-            # has just been sent from dmt wallet or the transaction which appeared in the mempool); in this case
-            # tx.block_timestamp indicates the moment when the transaction was added to the cache (it will be purged
-            # if will not appear on the blockchain after a defined amount of time)
-            cur.execute("CREATE TABLE IF NOT EXISTS tx(id INTEGER PRIMARY KEY, tx_hash TEXT, block_height INTEGER,"
-                        "block_timestamp INTEGER, coinbase INTEGER)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_1 ON tx(tx_hash)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_2 ON tx(block_height)")
-
-            cur.execute("CREATE TABLE IF NOT EXISTS tx_output(id INTEGER PRIMARY KEY, "
-                        "address TEXT, tx_id INTEGER NOT NULL, output_index INTEGER NOT NULL, "
-                        "satoshis INTEGER NOT NULL, spent_tx_hash TEXT, spent_input_index INTEGER, "
-                        "script_type TEXT)")
-
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_output_1 ON tx_output(tx_id, output_index)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_output_3 ON tx_output(address)")
-
-            cur.execute("CREATE TABLE IF NOT EXISTS tx_input(id INTEGER PRIMARY KEY, src_address TEXT, "
-                        "tx_id INTEGER NOT NULL, input_index INTEGER NOT NULL, "
-                        "satoshis INTEGER DEFAULT 0, src_tx_hash TEXT, src_tx_output_index INTEGER, "
-                        "coinbase INTEGER DEFAULT 0 NOT NULL)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_input_1 ON tx_input(tx_id, input_index)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_input_3 ON tx_input(src_address)")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_input_4 ON tx_input(src_tx_hash)")
-
-            cur.execute('create table if not exists labels.address_label(id INTEGER PRIMARY KEY, key TEXT, label TEXT, '
-                        'timestamp INTEGER)')
-            cur.execute('create index if not exists labels.address_label_1 on address_label(key)')
-
-            cur.execute('create table if not exists labels.tx_out_label(id INTEGER PRIMARY KEY, key TEXT, label TEXT, '
-                        'timestamp INTEGER)')  # key: tx hash + '-' + output_index
-            cur.execute('create index if not exists labels.tx_out_label_1 on address_label(key)')
-
-            # Upgrade to schema 0.9.33
-            cur.execute("PRAGMA table_info(masternodes)")
-            columns = [x[1] for x in cur.fetchall()]
-            if 'protx_hash' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN protx_hash TEXT")
-            if 'registered_height' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN registered_height INTEGER")
-            if 'queue_position' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN queue_position INTEGER")
-            if 'type' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN type TEXT")
-            if 'platform_node_id' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN platform_node_id TEXT")
-            if 'platform_p2p_port' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN platform_p2p_port INTEGER")
-            if 'platform_http_port' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN platform_http_port INTEGER")
-            if 'collateral_hash' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN collateral_hash TEXT")
-            if 'collateral_index' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN collateral_index INTEGER")
-            if 'collateral_address' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN collateral_address TEXT")
-            if 'owner_address' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN owner_address TEXT")
-            if 'voting_address' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN voting_address TEXT")
-            if 'pubkey_operator' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN pubkey_operator TEXT")
-            if 'operator_reward' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN operator_reward REAL")
-            if 'pose_penalty' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN pose_penalty INTEGER")
-            if 'pose_revived_height' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN pose_revived_height INTEGER")
-            if 'pose_ban_height' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN pose_ban_height INTEGER")
-            if 'operator_payout_address' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN operator_payout_address TEXT")
-            if 'pose_ban_timestamp' not in columns:
-                cur.execute("ALTER TABLE masternodes ADD COLUMN pose_ban_timestamp INTEGER")
-            if not self.table_columns_exist('voting_results', ['signal']):
-                cur.execute("ALTER TABLE voting_results ADD COLUMN signal TEXT")
-            if not self.table_columns_exist('voting_results', ['weight']):
-                cur.execute("ALTER TABLE voting_results ADD COLUMN weight INTEGER")
-
-            # Upgrade to schema 0.9.40
-            # Here we're introducing the 'spent_tx_hash' column as a replacement of 'spent_tx_id' to avoid storing
-            # the transactions in db cache that are not strictly related to the addresses from our hardware wallet
-            cur.execute("PRAGMA table_info(tx_output)")
-            columns = [x[1] for x in cur.fetchall()]
-            if 'spent_tx_hash' not in columns:
-                cur.execute("ALTER TABLE tx_output ADD COLUMN spent_tx_hash TEXT")
-            cur.execute("CREATE INDEX IF NOT EXISTS tx_output_5 ON tx_output(spent_tx_hash)")
-            if 'spent_tx_id' in columns:
-                cur.execute("DROP INDEX IF EXISTS tx_output_4")
-                cur.execute('ALTER TABLE tx_output DROP COLUMN spent_tx_id')
-            if 'address_id' in columns:
-                cur.execute("DROP INDEX IF EXISTS tx_output_2")
-                cur.execute('ALTER TABLE tx_output DROP COLUMN address_id')
-
-            cur.execute("PRAGMA table_info(tx_input)")
-            columns = [x[1] for x in cur.fetchall()]
-            if 'src_tx_id' in columns:
-                cur.execute("DROP INDEX IF EXISTS tx_input_5")
-                cur.execute('ALTER TABLE tx_input DROP COLUMN src_tx_id')  # similar to 'spent_tx_id'
-            if 'src_address_id' in columns:
-                cur.execute("DROP INDEX IF EXISTS tx_input_2")
-                cur.execute('ALTER TABLE tx_input DROP COLUMN src_address_id')  # similar to 'spent_tx_id'
-
+            self.run_migrations(cur, 'main', [self.migrate_main_1, self.migrate_main_2,
+                                              self.migrate_main_3, self.migrate_main_4, self.migrate_main_5,
+                                              self.migrate_main_6, self.migrate_main_7, self.migrate_main_8,
+                                              self.migrate_main_9])
+            self.run_migrations(cur, 'labels', [self.migrate_labels_1])
         except Exception:
             log.exception('Exception while initializing database.')
             raise
 
+    def enable_incremental_vacuum(self, interruptible: bool) -> bool:
+        """
+        Switches a cache database created without the incremental auto-vacuum to this mode, so the maintenance can
+        release the free pages in small steps. Changing the mode requires a one-time full VACUUM, which can't be done
+        in portions and holds the database lock until it finishes, so if interruptible is True, it's aborted as soon
+        as the database is needed by the application (or is being closed) and retried by a later maintenance run.
+        :return: True if the database has been converted
+        """
+        def is_break():
+            # the lock is held by the VACUUM, so the activity is detected by the get_cursor calls waiting for it
+            return self.maintenance_stop_event.is_set() or self.last_activity_time > tm_begin
+
+        cur = self.get_cursor()
+        tm_begin = time.time()
+        try:
+            log.info('Converting the database cache to the incremental auto-vacuum mode')
+            cur.execute('PRAGMA main.auto_vacuum=INCREMENTAL')
+            if interruptible:
+                self.db_conn.set_progress_handler(is_break, 10000)
+            try:
+                cur.execute('VACUUM main')
+            except sqlite3.OperationalError:
+                if interruptible and is_break():
+                    log.info('Conversion to the incremental auto-vacuum mode interrupted')
+                    return False
+                raise
+            finally:
+                self.db_conn.set_progress_handler(None, 0)
+            log.info('Database cache converted to the incremental auto-vacuum mode')
+            return True
+        finally:
+            self.release_cursor()
+
+    def run_migrations(self, cur, schema: str, steps: List[Callable]):
+        cur.execute(f'PRAGMA {schema}.user_version')
+        version = cur.fetchone()[0]
+        if version > len(steps):
+            log.warning(f'The {schema} database schema version ({version}) is newer than supported ({len(steps)})')
+        for step_version in range(version + 1, len(steps) + 1):
+            log.info(f'Upgrading the {schema} database schema to version {step_version}')
+            cur.execute('BEGIN')
+            try:
+                steps[step_version - 1](cur)
+                cur.execute(f'PRAGMA {schema}.user_version={step_version}')
+                self.db_conn.commit()
+            except Exception:
+                self.db_conn.rollback()
+                raise
+
+    def migrate_main_1(self, cur):
+        """
+        Structures of the schema versions prior to introducing the versioning (the cache files created by earlier
+        versions of the app have user_version=0 and get here whatever their shape is).
+        """
+        # create structures for masternodes data:
+        cur.execute("CREATE TABLE IF NOT EXISTS masternodes(id INTEGER PRIMARY KEY, ident TEXT, status TEXT,"
+                    " type TEXT, protocol TEXT, payee TEXT, last_seen INTEGER, active_seconds INTEGER,"
+                    " last_paid_time INTEGER, last_paid_block INTEGER, ip TEXT,"
+                    " collateral_hash TEXT, collateral_index INTEGER, collateral_address TEXT, "
+                    " owner_address TEXT, voting_address TEXT, pubkey_operator TEXT,"
+                    " platform_node_id TEXT, platform_p2p_port INTEGER, platform_http_port INTEGER, "
+                    " dmt_active INTEGER, dmt_create_time TEXT, dmt_deactivation_time TEXT, "
+                    " protx_hash TEXT, queue_position INTEGER, registered_height INTEGER, "
+                    " operator_reward REAL, pose_penalty INTEGER, pose_revived_height INTEGER, "
+                    " pose_ban_height INTEGER, operator_payout_address TEXT, pose_ban_timestamp INTEGER)")
+
+        cur.execute("CREATE INDEX IF NOT EXISTS IDX_masternodes_DMT_ACTIVE ON masternodes(dmt_active)")
+        cur.execute("CREATE INDEX IF NOT EXISTS IDX_masternodes_IDENT ON masternodes(ident)")
+        cur.execute("CREATE INDEX IF NOT EXISTS IDX_masternodes_DMT_CREATE_TIME ON masternodes(dmt_create_time)")
+        cur.execute("CREATE INDEX IF NOT EXISTS IDX_masternodes_DMT_DEACTIVATION_TIME ON "
+                    "masternodes(dmt_deactivation_time)")
+
+        # create structures for proposals:
+        cur.execute("CREATE TABLE IF NOT EXISTS proposals(id INTEGER PRIMARY KEY, name TEXT, payment_start TEXT,"
+                    " payment_end TEXT, payment_amount REAL, yes_count INTEGER, absolute_yes_count INTEGER,"
+                    " no_count INTEGER, abstain_count INTEGER, creation_time TEXT, url TEXT, payment_address TEXT,"
+                    " type INTEGER, hash TEXT,  collateral_hash TEXT, f_blockchain_validity INTEGER,"
+                    " f_cached_valid INTEGER, f_cached_delete INTEGER, f_cached_funding INTEGER, "
+                    " f_cached_endorsed INTEGER, object_type INTEGER, is_valid_reason TEXT, dmt_active INTEGER, "
+                    " dmt_create_time TEXT, dmt_deactivation_time TEXT, dmt_voting_last_read_time INTEGER,"
+                    " ext_attributes_loaded INTEGER, owner TEXT, title TEXT, ext_attributes_load_time INTEGER)")
+
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_proposals_hash ON proposals(hash)")
+
+        # structure for protx info
+        cur.execute("CREATE TABLE IF NOT EXISTS protx(id INTEGER PRIMARY KEY, protx_hash TEXT, "
+                    "operator_reward REAL, service TEXT, registered_height INTEGER, "
+                    "pose_penalty INTEGER, pose_revived_height INTEGER, pose_ban_height INTEGER, "                        
+                    "operator_payout_address TEXT)")
+
+        cur.execute("CREATE TABLE IF NOT EXISTS voting_results(id INTEGER PRIMARY KEY, proposal_id INTEGER,"
+                    " masternode_ident TEXT, voting_time TEXT, voting_result TEXT, signal TEXT, weight INTEGER,"
+                    " hash TEXT)")
+
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_voting_results_hash ON voting_results(hash)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_voting_results_1 ON voting_results(proposal_id)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_voting_results_2 ON voting_results(masternode_ident)")
+
+        # Create table for storing live data, for example, last read time of proposals
+        cur.execute("CREATE TABLE IF NOT EXISTS LIVE_CONFIG(symbol text PRIMARY KEY, value TEXT)")
+        cur.execute("CREATE INDEX IF NOT EXISTS IDX_LIVE_CONFIG_SYMBOL ON LIVE_CONFIG(symbol)")
+        cur.execute("CREATE TABLE IF NOT EXISTS hd_tree(id INTEGER PRIMARY KEY, ident TEXT, label TEXT)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_hd_tree_1 ON hd_tree(ident)")
+
+        cur.execute("CREATE TABLE IF NOT EXISTS address(id INTEGER PRIMARY KEY,"
+                    "xpub_hash TEXT, parent_id INTEGER, address_index INTEGER, address TEXT, path TEXT, "
+                    "tree_id INTEGER, balance INTEGER DEFAULT 0 NOT NULL, received INTEGER DEFAULT 0 NOT NULL, "
+                    "is_change INTEGER, last_scan_block_height INTEGER DEFAULT 0 NOT NULL, label TEXT,"
+                    "status INTEGER DEFAULT 0)")
+
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_address_1 ON address(xpub_hash)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_address_2 ON address(parent_id, address_index)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_address_3 ON address(address)")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_address_4 ON address(tree_id)")
+
+        # if tx.block_height == 0, the transaction has not yet been confirmed (it may be the transaction that
+        # has just been sent from dmt wallet or the transaction which appeared in the mempool); in this case
+        # tx.block_timestamp indicates the moment when the transaction was added to the cache (it will be purged
+        # if will not appear on the blockchain after a defined amount of time)
+        cur.execute("CREATE TABLE IF NOT EXISTS tx(id INTEGER PRIMARY KEY, tx_hash TEXT, block_height INTEGER,"
+                    "block_timestamp INTEGER, coinbase INTEGER)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_1 ON tx(tx_hash)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_2 ON tx(block_height)")
+
+        cur.execute("CREATE TABLE IF NOT EXISTS tx_output(id INTEGER PRIMARY KEY, "
+                    "address TEXT, tx_id INTEGER NOT NULL, output_index INTEGER NOT NULL, "
+                    "satoshis INTEGER NOT NULL, spent_tx_hash TEXT, spent_input_index INTEGER, "
+                    "script_type TEXT)")
+
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_output_1 ON tx_output(tx_id, output_index)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_output_3 ON tx_output(address)")
+
+        cur.execute("CREATE TABLE IF NOT EXISTS tx_input(id INTEGER PRIMARY KEY, src_address TEXT, "
+                    "tx_id INTEGER NOT NULL, input_index INTEGER NOT NULL, "
+                    "satoshis INTEGER DEFAULT 0, src_tx_hash TEXT, src_tx_output_index INTEGER, "
+                    "coinbase INTEGER DEFAULT 0 NOT NULL)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_input_1 ON tx_input(tx_id, input_index)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_input_3 ON tx_input(src_address)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_input_4 ON tx_input(src_tx_hash)")
+
+        # Upgrade to schema 0.9.33
+        cur.execute("PRAGMA table_info(masternodes)")
+        columns = [x[1] for x in cur.fetchall()]
+        if 'protx_hash' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN protx_hash TEXT")
+        if 'registered_height' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN registered_height INTEGER")
+        if 'queue_position' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN queue_position INTEGER")
+        if 'type' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN type TEXT")
+        if 'platform_node_id' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN platform_node_id TEXT")
+        if 'platform_p2p_port' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN platform_p2p_port INTEGER")
+        if 'platform_http_port' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN platform_http_port INTEGER")
+        if 'collateral_hash' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN collateral_hash TEXT")
+        if 'collateral_index' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN collateral_index INTEGER")
+        if 'collateral_address' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN collateral_address TEXT")
+        if 'owner_address' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN owner_address TEXT")
+        if 'voting_address' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN voting_address TEXT")
+        if 'pubkey_operator' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN pubkey_operator TEXT")
+        if 'operator_reward' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN operator_reward REAL")
+        if 'pose_penalty' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN pose_penalty INTEGER")
+        if 'pose_revived_height' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN pose_revived_height INTEGER")
+        if 'pose_ban_height' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN pose_ban_height INTEGER")
+        if 'operator_payout_address' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN operator_payout_address TEXT")
+        if 'pose_ban_timestamp' not in columns:
+            cur.execute("ALTER TABLE masternodes ADD COLUMN pose_ban_timestamp INTEGER")
+        if not self.table_columns_exist('voting_results', ['signal']):
+            cur.execute("ALTER TABLE voting_results ADD COLUMN signal TEXT")
+        if not self.table_columns_exist('voting_results', ['weight']):
+            cur.execute("ALTER TABLE voting_results ADD COLUMN weight INTEGER")
+
+        # Upgrade to schema 0.9.40
+        # Here we're introducing the 'spent_tx_hash' column as a replacement of 'spent_tx_id' to avoid storing
+        # the transactions in db cache that are not strictly related to the addresses from our hardware wallet
+        cur.execute("PRAGMA table_info(tx_output)")
+        columns = [x[1] for x in cur.fetchall()]
+        if 'spent_tx_hash' not in columns:
+            cur.execute("ALTER TABLE tx_output ADD COLUMN spent_tx_hash TEXT")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_output_5 ON tx_output(spent_tx_hash)")
+        if 'spent_tx_id' in columns:
+            cur.execute("DROP INDEX IF EXISTS tx_output_4")
+            cur.execute('ALTER TABLE tx_output DROP COLUMN spent_tx_id')
+        if 'address_id' in columns:
+            cur.execute("DROP INDEX IF EXISTS tx_output_2")
+            cur.execute('ALTER TABLE tx_output DROP COLUMN address_id')
+
+        cur.execute("PRAGMA table_info(tx_input)")
+        columns = [x[1] for x in cur.fetchall()]
+        if 'src_tx_id' in columns:
+            cur.execute("DROP INDEX IF EXISTS tx_input_5")
+            cur.execute('ALTER TABLE tx_input DROP COLUMN src_tx_id')  # similar to 'spent_tx_id'
+        if 'src_address_id' in columns:
+            cur.execute("DROP INDEX IF EXISTS tx_input_2")
+            cur.execute('ALTER TABLE tx_input DROP COLUMN src_address_id')  # similar to 'spent_tx_id'
+
+    def migrate_main_2(self, cur):
+        cur.execute("CREATE TABLE IF NOT EXISTS block_index(height INTEGER PRIMARY KEY, block_hash TEXT NOT NULL, "
+                    "time INTEGER NOT NULL)")
+
+    def migrate_main_3(self, cur):
+        # composite and covering indexes for the wallet's hot queries: balance sums by address, utxo lists,
+        # joins of tx inputs/outputs to the addresses of a given hd tree and lookups of the spending inputs
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_address_5 ON address(address, tree_id)")
+        cur.execute("DROP INDEX IF EXISTS idx_address_3")
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_address_6 ON address(parent_id, balance, received)")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_output_6 ON tx_output(address, spent_input_index, spent_tx_hash, "
+                    "satoshis, tx_id, output_index)")
+        cur.execute("DROP INDEX IF EXISTS tx_output_3")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_input_6 ON tx_input(src_address, satoshis, tx_id)")
+        cur.execute("DROP INDEX IF EXISTS tx_input_3")
+        cur.execute("CREATE INDEX IF NOT EXISTS tx_input_7 ON tx_input(src_tx_hash, src_tx_output_index)")
+        cur.execute("DROP INDEX IF EXISTS tx_input_4")
+
+    def migrate_main_4(self, cur):
+        # transaction hashes are kept as 32-byte blobs instead of 64-character hex strings, which halves the size
+        # of these columns and their indexes; the tables are rebuilt to get the proper column types
+        def is_hex(value):
+            if isinstance(value, str):
+                try:
+                    bytes.fromhex(value)
+                except ValueError:
+                    return 0
+            return 1
+
+        def hex_to_blob(value):
+            return bytes.fromhex(value) if isinstance(value, str) else value
+
+        self.db_conn.create_function('is_hex', 1, is_hex, deterministic=True)
+        self.db_conn.create_function('hex_to_blob', 1, hex_to_blob, deterministic=True)
+
+        # hashes that are not valid hex strings (not written by the app, but possible in a damaged cache file) can't
+        # be converted: spent marks are restored from the cached spending inputs, transactions with such hashes are
+        # removed; the addresses involved are marked to be rescanned, so the missing data is fetched again
+        cur.execute("CREATE TEMP TABLE bad_tx AS SELECT id FROM tx WHERE NOT is_hex(tx_hash) "
+                    "UNION SELECT tx_id FROM tx_input WHERE NOT is_hex(src_tx_hash)")
+        cur.execute("CREATE TEMP TABLE bad_spent AS SELECT id FROM tx_output WHERE NOT is_hex(spent_tx_hash)")
+        cur.execute("SELECT (SELECT count(*) FROM bad_tx), (SELECT count(*) FROM bad_spent)")
+        bad_tx_count, bad_spent_count = cur.fetchone()
+        if bad_tx_count or bad_spent_count:
+            log.warning(f'Invalid transaction hashes found in the cache: removing {bad_tx_count} transaction(s), '
+                        f'repairing {bad_spent_count} spent mark(s)')
+            cur.execute("UPDATE address SET last_scan_block_height=0 WHERE address IN ("
+                        "SELECT address FROM tx_output WHERE tx_id IN (SELECT id FROM bad_tx) "
+                        "OR id IN (SELECT id FROM bad_spent) "
+                        "UNION SELECT src_address FROM tx_input WHERE tx_id IN (SELECT id FROM bad_tx))")
+            cur.execute("UPDATE tx_output SET (spent_tx_hash, spent_input_index) = ("
+                        "SELECT t.tx_hash, i.input_index FROM tx ot JOIN tx_input i ON i.src_tx_hash=ot.tx_hash "
+                        "AND i.src_tx_output_index=tx_output.output_index JOIN tx t ON t.id=i.tx_id "
+                        "WHERE ot.id=tx_output.tx_id AND is_hex(t.tx_hash)) "
+                        "WHERE id IN (SELECT id FROM bad_spent)")
+            cur.execute("DELETE FROM tx_output WHERE tx_id IN (SELECT id FROM bad_tx)")
+            cur.execute("DELETE FROM tx_input WHERE tx_id IN (SELECT id FROM bad_tx)")
+            cur.execute("DELETE FROM tx WHERE id IN (SELECT id FROM bad_tx)")
+        cur.execute("DROP TABLE bad_tx")
+        cur.execute("DROP TABLE bad_spent")
+
+        cur.execute("CREATE TABLE tx_new(id INTEGER PRIMARY KEY, tx_hash BLOB, block_height INTEGER,"
+                    "block_timestamp INTEGER, coinbase INTEGER)")
+        cur.execute("INSERT INTO tx_new(id, tx_hash, block_height, block_timestamp, coinbase) "
+                    "SELECT id, hex_to_blob(tx_hash), block_height, block_timestamp, coinbase FROM tx")
+        cur.execute("DROP TABLE tx")
+        cur.execute("ALTER TABLE tx_new RENAME TO tx")
+        cur.execute("CREATE INDEX tx_1 ON tx(tx_hash)")
+        cur.execute("CREATE INDEX tx_2 ON tx(block_height)")
+
+        cur.execute("CREATE TABLE tx_output_new(id INTEGER PRIMARY KEY, "
+                    "address TEXT, tx_id INTEGER NOT NULL, output_index INTEGER NOT NULL, "
+                    "satoshis INTEGER NOT NULL, spent_tx_hash BLOB, spent_input_index INTEGER, "
+                    "script_type TEXT)")
+        cur.execute("INSERT INTO tx_output_new(id, address, tx_id, output_index, satoshis, spent_tx_hash, "
+                    "spent_input_index, script_type) "
+                    "SELECT id, address, tx_id, output_index, satoshis, hex_to_blob(spent_tx_hash), "
+                    "spent_input_index, script_type FROM tx_output")
+        cur.execute("DROP TABLE tx_output")
+        cur.execute("ALTER TABLE tx_output_new RENAME TO tx_output")
+        cur.execute("CREATE INDEX tx_output_1 ON tx_output(tx_id, output_index)")
+        cur.execute("CREATE INDEX tx_output_5 ON tx_output(spent_tx_hash)")
+        cur.execute("CREATE INDEX tx_output_6 ON tx_output(address, spent_input_index, spent_tx_hash, satoshis, "
+                    "tx_id, output_index)")
+
+        cur.execute("CREATE TABLE tx_input_new(id INTEGER PRIMARY KEY, src_address TEXT, "
+                    "tx_id INTEGER NOT NULL, input_index INTEGER NOT NULL, "
+                    "satoshis INTEGER DEFAULT 0, src_tx_hash BLOB, src_tx_output_index INTEGER, "
+                    "coinbase INTEGER DEFAULT 0 NOT NULL)")
+        cur.execute("INSERT INTO tx_input_new(id, src_address, tx_id, input_index, satoshis, src_tx_hash, "
+                    "src_tx_output_index, coinbase) "
+                    "SELECT id, src_address, tx_id, input_index, satoshis, hex_to_blob(src_tx_hash), "
+                    "src_tx_output_index, coinbase FROM tx_input")
+        cur.execute("DROP TABLE tx_input")
+        cur.execute("ALTER TABLE tx_input_new RENAME TO tx_input")
+        cur.execute("CREATE INDEX tx_input_1 ON tx_input(tx_id, input_index)")
+        cur.execute("CREATE INDEX tx_input_6 ON tx_input(src_address, satoshis, tx_id)")
+        cur.execute("CREATE INDEX tx_input_7 ON tx_input(src_tx_hash, src_tx_output_index)")
+
+    def migrate_main_5(self, cur):
+        # transaction inputs and outputs refer to the address table by id instead of the address text; addresses
+        # not belonging to the wallet are kept in the address table with external=1
+        cur.execute("ALTER TABLE address ADD COLUMN external INTEGER DEFAULT 0 NOT NULL")
+        cur.execute("INSERT INTO address(address, external) SELECT DISTINCT address, 1 FROM tx_output "
+                    "WHERE address IS NOT NULL AND address NOT IN (SELECT address FROM address "
+                    "WHERE address IS NOT NULL)")
+        cur.execute("INSERT INTO address(address, external) SELECT DISTINCT src_address, 1 FROM tx_input "
+                    "WHERE src_address IS NOT NULL AND src_address NOT IN (SELECT address FROM address "
+                    "WHERE address IS NOT NULL)")
+
+        cur.execute("CREATE TABLE tx_output_new(id INTEGER PRIMARY KEY, "
+                    "address_id INTEGER, tx_id INTEGER NOT NULL, output_index INTEGER NOT NULL, "
+                    "satoshis INTEGER NOT NULL, spent_tx_hash BLOB, spent_input_index INTEGER, "
+                    "script_type TEXT)")
+        cur.execute("INSERT INTO tx_output_new(id, address_id, tx_id, output_index, satoshis, spent_tx_hash, "
+                    "spent_input_index, script_type) "
+                    "SELECT id, (SELECT min(a.id) FROM address a WHERE a.address=o.address), tx_id, output_index, "
+                    "satoshis, spent_tx_hash, spent_input_index, script_type FROM tx_output o")
+        cur.execute("DROP TABLE tx_output")
+        cur.execute("ALTER TABLE tx_output_new RENAME TO tx_output")
+        cur.execute("CREATE INDEX tx_output_1 ON tx_output(tx_id, output_index)")
+        cur.execute("CREATE INDEX tx_output_5 ON tx_output(spent_tx_hash)")
+        cur.execute("CREATE INDEX tx_output_6 ON tx_output(address_id, spent_input_index, spent_tx_hash, satoshis, "
+                    "tx_id, output_index)")
+
+        cur.execute("CREATE TABLE tx_input_new(id INTEGER PRIMARY KEY, src_address_id INTEGER, "
+                    "tx_id INTEGER NOT NULL, input_index INTEGER NOT NULL, "
+                    "satoshis INTEGER DEFAULT 0, src_tx_hash BLOB, src_tx_output_index INTEGER, "
+                    "coinbase INTEGER DEFAULT 0 NOT NULL)")
+        cur.execute("INSERT INTO tx_input_new(id, src_address_id, tx_id, input_index, satoshis, src_tx_hash, "
+                    "src_tx_output_index, coinbase) "
+                    "SELECT id, (SELECT min(a.id) FROM address a WHERE a.address=i.src_address), tx_id, input_index, "
+                    "satoshis, src_tx_hash, src_tx_output_index, coinbase FROM tx_input i")
+        cur.execute("DROP TABLE tx_input")
+        cur.execute("ALTER TABLE tx_input_new RENAME TO tx_input")
+        cur.execute("CREATE INDEX tx_input_1 ON tx_input(tx_id, input_index)")
+        cur.execute("CREATE INDEX tx_input_6 ON tx_input(src_address_id, satoshis, tx_id)")
+        cur.execute("CREATE INDEX tx_input_7 ON tx_input(src_tx_hash, src_tx_output_index)")
+
+    def migrate_main_6(self, cur):
+        # 'received' and 'balance' of the addresses are maintained incrementally by triggers on the tx_output and
+        # tx_input tables (input satoshis are stored as negative values) instead of being recomputed with sum()
+        cur.execute("UPDATE address SET received=(SELECT ifnull(sum(o.satoshis), 0) FROM tx_output o "
+                    "WHERE o.address_id=address.id), balance=(SELECT ifnull(sum(o.satoshis), 0) FROM tx_output o "
+                    "WHERE o.address_id=address.id) + (SELECT ifnull(sum(i.satoshis), 0) FROM tx_input i "
+                    "WHERE i.src_address_id=address.id) "
+                    "WHERE id NOT IN (SELECT parent_id FROM address WHERE parent_id IS NOT NULL)")
+
+        cur.execute("CREATE TRIGGER tx_output_ai AFTER INSERT ON tx_output WHEN new.address_id IS NOT NULL "
+                    "BEGIN UPDATE address SET received=ifnull(received, 0)+new.satoshis, "
+                    "balance=ifnull(balance, 0)+new.satoshis WHERE id=new.address_id; END")
+        cur.execute("CREATE TRIGGER tx_output_ad AFTER DELETE ON tx_output WHEN old.address_id IS NOT NULL "
+                    "BEGIN UPDATE address SET received=ifnull(received, 0)-old.satoshis, "
+                    "balance=ifnull(balance, 0)-old.satoshis WHERE id=old.address_id; END")
+        cur.execute("CREATE TRIGGER tx_output_au AFTER UPDATE OF address_id, satoshis ON tx_output "
+                    "BEGIN UPDATE address SET received=ifnull(received, 0)-old.satoshis, "
+                    "balance=ifnull(balance, 0)-old.satoshis WHERE id=old.address_id; "
+                    "UPDATE address SET received=ifnull(received, 0)+new.satoshis, "
+                    "balance=ifnull(balance, 0)+new.satoshis WHERE id=new.address_id; END")
+
+        cur.execute("CREATE TRIGGER tx_input_ai AFTER INSERT ON tx_input WHEN new.src_address_id IS NOT NULL "
+                    "BEGIN UPDATE address SET balance=ifnull(balance, 0)+ifnull(new.satoshis, 0) "
+                    "WHERE id=new.src_address_id; END")
+        cur.execute("CREATE TRIGGER tx_input_ad AFTER DELETE ON tx_input WHEN old.src_address_id IS NOT NULL "
+                    "BEGIN UPDATE address SET balance=ifnull(balance, 0)-ifnull(old.satoshis, 0) "
+                    "WHERE id=old.src_address_id; END")
+        cur.execute("CREATE TRIGGER tx_input_au AFTER UPDATE OF src_address_id, satoshis ON tx_input "
+                    "BEGIN UPDATE address SET balance=ifnull(balance, 0)-ifnull(old.satoshis, 0) "
+                    "WHERE id=old.src_address_id; "
+                    "UPDATE address SET balance=ifnull(balance, 0)+ifnull(new.satoshis, 0) "
+                    "WHERE id=new.src_address_id; END")
+
+    def migrate_main_7(self, cur):
+        # hash of the persisted fields of a masternode, used to skip writing the rows that haven't changed
+        cur.execute("ALTER TABLE masternodes ADD COLUMN data_hash BLOB")
+
+    def migrate_main_8(self, cur):
+        # creation/deactivation times of the masternodes are kept as integer epochs instead of the local time text,
+        # so loading the cache doesn't need to parse them; the table is rebuilt to get the proper column types
+        cur.execute("CREATE TABLE masternodes_new(id INTEGER PRIMARY KEY, ident TEXT, status TEXT,"
+                    " type TEXT, protocol TEXT, payee TEXT, last_seen INTEGER, active_seconds INTEGER,"
+                    " last_paid_time INTEGER, last_paid_block INTEGER, ip TEXT,"
+                    " collateral_hash TEXT, collateral_index INTEGER, collateral_address TEXT, "
+                    " owner_address TEXT, voting_address TEXT, pubkey_operator TEXT,"
+                    " platform_node_id TEXT, platform_p2p_port INTEGER, platform_http_port INTEGER, "
+                    " dmt_active INTEGER, dmt_create_time INTEGER, dmt_deactivation_time INTEGER, "
+                    " protx_hash TEXT, queue_position INTEGER, registered_height INTEGER, "
+                    " operator_reward REAL, pose_penalty INTEGER, pose_revived_height INTEGER, "
+                    " pose_ban_height INTEGER, operator_payout_address TEXT, pose_ban_timestamp INTEGER,"
+                    " data_hash BLOB)")
+        columns = "id, ident, status, type, protocol, payee, last_seen, active_seconds, last_paid_time, " \
+                  "last_paid_block, ip, collateral_hash, collateral_index, collateral_address, owner_address, " \
+                  "voting_address, pubkey_operator, platform_node_id, platform_p2p_port, platform_http_port, " \
+                  "dmt_active, protx_hash, queue_position, registered_height, operator_reward, pose_penalty, " \
+                  "pose_revived_height, pose_ban_height, operator_payout_address, pose_ban_timestamp, data_hash"
+        cur.execute(f"INSERT INTO masternodes_new({columns}, dmt_create_time, dmt_deactivation_time) "
+                    f"SELECT {columns}, CAST(strftime('%s', dmt_create_time, 'utc') AS INTEGER), "
+                    f"CAST(strftime('%s', dmt_deactivation_time, 'utc') AS INTEGER) FROM masternodes")
+        cur.execute("DROP TABLE masternodes")
+        cur.execute("ALTER TABLE masternodes_new RENAME TO masternodes")
+        cur.execute("CREATE INDEX IDX_masternodes_DMT_ACTIVE ON masternodes(dmt_active)")
+        cur.execute("CREATE INDEX IDX_masternodes_IDENT ON masternodes(ident)")
+        cur.execute("CREATE INDEX IDX_masternodes_DMT_CREATE_TIME ON masternodes(dmt_create_time)")
+        cur.execute("CREATE INDEX IDX_masternodes_DMT_DEACTIVATION_TIME ON masternodes(dmt_deactivation_time)")
+
+    def migrate_main_9(self, cur):
+        # the external addresses (added to the address table with the 'external' flag) have no parent and no hd tree,
+        # so with them in the parent_id/tree_id indexes the statistics gathered by ANALYZE make these columns look
+        # unselective and the planner falls back to full scans in the wallet queries; partial indexes skip them
+        cur.execute("DROP INDEX IF EXISTS idx_address_2")
+        cur.execute("CREATE INDEX idx_address_2 ON address(parent_id, address_index) WHERE parent_id IS NOT NULL")
+        cur.execute("DROP INDEX IF EXISTS idx_address_4")
+        cur.execute("CREATE INDEX idx_address_4 ON address(tree_id) WHERE tree_id IS NOT NULL")
+        cur.execute("DROP INDEX IF EXISTS idx_address_6")
+        cur.execute("CREATE INDEX idx_address_6 ON address(parent_id, balance, received) WHERE parent_id IS NOT NULL")
+
+    def migrate_labels_1(self, cur):
+        cur.execute('create table if not exists labels.address_label(id INTEGER PRIMARY KEY, key TEXT, label TEXT, '
+                    'timestamp INTEGER)')
+        cur.execute('create index if not exists labels.address_label_1 on address_label(key)')
+
+        cur.execute('create table if not exists labels.tx_out_label(id INTEGER PRIMARY KEY, key TEXT, label TEXT, '
+                    'timestamp INTEGER)')  # key: tx hash + '-' + output_index
+        cur.execute('create index if not exists labels.tx_out_label_1 on address_label(key)')
+
     def table_columns_exist(self, table_name, column_names: List[str]):
         cur = self.db_conn.cursor()
         try:
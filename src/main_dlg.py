@@ -575,12 +575,12 @@ class MainWindow(QMainWindow, QDetectThemeChange, WndUtils, ui_main_dlg.Ui_MainW
                           default_button=QMessageBox.Cancel, icon=QMessageBox.Warning) == QMessageBox.Yes:
             db_cursor = self.app_config.db_intf.get_cursor()
             try:
-                db_cursor.execute('drop table address')
-                db_cursor.execute('drop table hd_tree')
-                db_cursor.execute('drop table tx_input')
-                db_cursor.execute('drop table tx_output')
-                db_cursor.execute('drop table tx')
-                self.app_config.db_intf.create_structures()
+                db_cursor.execute('delete from address')
+                db_cursor.execute('delete from hd_tree')
+                db_cursor.execute('delete from tx_input')
+                db_cursor.execute('delete from tx_output')
+                db_cursor.execute('delete from tx')
+                self.app_config.db_intf.commit()
             finally:
                 self.app_config.db_intf.release_cursor()
             self.info_msg('Wallet cache cleared.')
@@ -592,9 +592,9 @@ class MainWindow(QMainWindow, QDetectThemeChange, WndUtils, ui_main_dlg.Ui_MainW
                           default_button=QMessageBox.Cancel, icon=QMessageBox.Warning) == QMessageBox.Yes:
             db_cursor = self.app_config.db_intf.get_cursor()
             try:
-                db_cursor.execute('drop table proposals')
-                db_cursor.execute('drop table voting_results')
-                self.app_config.db_intf.create_structures()
+                db_cursor.execute('delete from proposals')
+                db_cursor.execute('delete from voting_results')
+                self.app_config.db_intf.commit()
             finally:
                 self.app_config.db_intf.release_cursor()
             self.info_msg('Proposals cache cleared.')
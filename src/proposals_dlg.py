@@ -1134,10 +1134,11 @@ class ProposalsDlg(QDialog, wnd_utils.QDetectThemeChange, ui_proposals.Ui_Propos
             self.cur_block_height = self.dashd_intf.getblockcount()
             self.cur_block_timestamp = int(time.time())
 
-            self.last_superblock_time = self.dashd_intf.get_block_timestamp(self.last_superblock)
+            block_timestamps = self.dashd_intf.get_block_timestamps([self.last_superblock, self.cur_block_height])
+            self.last_superblock_time = block_timestamps[self.last_superblock]
             self.next_superblock_time = 0
             if 0 < self.cur_block_height <= self.next_superblock:
-                self.next_superblock_time = self.dashd_intf.get_block_timestamp(self.cur_block_height) + (
+                self.next_superblock_time = block_timestamps[self.cur_block_height] + (
                         self.next_superblock - self.cur_block_height) * 2.5 * 60
 
             if self.next_superblock_time == 0:
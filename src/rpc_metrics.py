@@ -0,0 +1,203 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+
+"""
+Metrics of RPC calls (latency histograms, transferred bytes, failures, retries and connection switches) collected
+per RPC method and per node connection, along with the byte counting at the transport (socket) level.
+"""
+import bisect
+import threading
+import time
+from typing import Dict, Optional, Any
+
+# upper bounds (in ms) of the latency histogram buckets; the last bucket collects everything above
+LATENCY_BUCKET_BOUNDS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000, 20000, 60000)
+
+
+class RpcTransferCounter(threading.local):
+    """
+    Number of bytes sent and received over RPC connections by the current thread. Since a pooled connection
+    is used by one thread at a time, the difference between two readings gives the wire bytes of the calls
+    performed in between.
+    """
+    def __init__(self):
+        self.bytes_sent = 0
+        self.bytes_received = 0
+
+
+transfer_counter = RpcTransferCounter()
+
+
+class CountingReader(object):
+    """Wrapper of the socket's file object (used by HTTPResponse) counting the bytes read."""
+    def __init__(self, fp):
+        self.fp = fp
+
+    def read(self, *args):
+        data = self.fp.read(*args)
+        if data:
+            transfer_counter.bytes_received += len(data)
+        return data
+
+    def read1(self, *args):
+        data = self.fp.read1(*args)
+        if data:
+            transfer_counter.bytes_received += len(data)
+        return data
+
+    def readline(self, *args):
+        data = self.fp.readline(*args)
+        if data:
+            transfer_counter.bytes_received += len(data)
+        return data
+
+    def readinto(self, b):
+        n = self.fp.readinto(b)
+        if n:
+            transfer_counter.bytes_received += n
+        return n
+
+    def __getattr__(self, name):
+        return getattr(self.fp, name)
+
+
+class CountingSocket(object):
+    """Wrapper of the socket used by HTTPConnection counting the bytes sent and received."""
+    def __init__(self, sock):
+        self.sock = sock
+
+    def sendall(self, data, *args):
+        transfer_counter.bytes_sent += len(data)
+        return self.sock.sendall(data, *args)
+
+    def send(self, data, *args):
+        n = self.sock.send(data, *args)
+        transfer_counter.bytes_sent += n
+        return n
+
+    def makefile(self, mode='r', *args, **kwargs):
+        fp = self.sock.makefile(mode, *args, **kwargs)
+        if 'r' in mode:
+            return CountingReader(fp)
+        return fp
+
+    def __getattr__(self, name):
+        return getattr(self.sock, name)
+
+
+class LatencyHistogram(object):
+    def __init__(self):
+        self.buckets = [0] * (len(LATENCY_BUCKET_BOUNDS_MS) + 1)
+        self.count = 0
+        self.sum_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, latency_ms: float):
+        self.buckets[bisect.bisect_left(LATENCY_BUCKET_BOUNDS_MS, latency_ms)] += 1
+        self.count += 1
+        self.sum_ms += latency_ms
+        self.max_ms = max(self.max_ms, latency_ms)
+
+    def percentile(self, percent: float) -> Optional[float]:
+        """
+        Estimates the given percentile by linear interpolation within the histogram bucket containing it.
+        """
+        if not self.count:
+            return None
+        rank = self.count * percent / 100
+        cumulative = 0
+        for idx, bucket_count in enumerate(self.buckets):
+            if bucket_count and cumulative + bucket_count >= rank:
+                lower = LATENCY_BUCKET_BOUNDS_MS[idx - 1] if idx > 0 else 0
+                upper = LATENCY_BUCKET_BOUNDS_MS[idx] if idx < len(LATENCY_BUCKET_BOUNDS_MS) else self.max_ms
+                return min(lower + (upper - lower) * (rank - cumulative) / bucket_count, self.max_ms)
+            cumulative += bucket_count
+        return self.max_ms
+
+
+class RpcCallMetrics(object):
+    def __init__(self):
+        self.call_count = 0
+        self.failure_count = 0
+        self.retry_count = 0
+        self.switch_count = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.latency = LatencyHistogram()
+
+    def add(self, latency_ms: float, bytes_sent: int, bytes_received: int, failure: bool, retries: int,
+            switches: int):
+        self.call_count += 1
+        if failure:
+            self.failure_count += 1
+        self.retry_count += retries
+        self.switch_count += switches
+        self.bytes_sent += bytes_sent
+        self.bytes_received += bytes_received
+        self.latency.add(latency_ms)
+
+    def to_dict(self) -> Dict[str, Any]:
+        def rnd(v):
+            return round(v, 1) if v is not None else None
+
+        return {
+            'call_count': self.call_count,
+            'failure_count': self.failure_count,
+            'retry_count': self.retry_count,
+            'switch_count': self.switch_count,
+            'bytes_sent': self.bytes_sent,
+            'bytes_received': self.bytes_received,
+            'latency_avg_ms': rnd(self.latency.sum_ms / self.latency.count) if self.latency.count else None,
+            'latency_p50_ms': rnd(self.latency.percentile(50)),
+            'latency_p95_ms': rnd(self.latency.percentile(95)),
+            'latency_p99_ms': rnd(self.latency.percentile(99)),
+            'latency_max_ms': rnd(self.latency.max_ms),
+            'latency_buckets': {
+                (f'<={LATENCY_BUCKET_BOUNDS_MS[idx]}' if idx < len(LATENCY_BUCKET_BOUNDS_MS) else
+                 f'>{LATENCY_BUCKET_BOUNDS_MS[-1]}'): cnt for idx, cnt in enumerate(self.latency.buckets) if cnt
+            }
+        }
+
+
+class RpcMetrics(object):
+    """
+    RPC call metrics aggregated per RPC method (every decorated call, including the nested ones) and per node
+    connection (only the outermost calls, so the nested ones are not counted twice).
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.methods: Dict[str, RpcCallMetrics] = {}
+        self.connections: Dict[str, RpcCallMetrics] = {}
+        self.start_time = time.time()
+
+    def reset(self):
+        with self.lock:
+            self.methods.clear()
+            self.connections.clear()
+            self.start_time = time.time()
+
+    def record_call(self, method: str, conn_name: Optional[str], latency_ms: float, bytes_sent: int,
+                    bytes_received: int, failure: bool, retries: int, switches: int):
+        with self.lock:
+            m = self.methods.get(method)
+            if not m:
+                m = RpcCallMetrics()
+                self.methods[method] = m
+            m.add(latency_ms, bytes_sent, bytes_received, failure, retries, switches)
+
+            if conn_name:
+                m = self.connections.get(conn_name)
+                if not m:
+                    m = RpcCallMetrics()
+                    self.connections[conn_name] = m
+                m.add(latency_ms, bytes_sent, bytes_received, failure, retries, switches)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {
+                'period_seconds': int(time.time() - self.start_time),
+                'methods': {name: m.to_dict() for name, m in sorted(self.methods.items())},
+                'connections': {name: m.to_dict() for name, m in sorted(self.connections.items())}
+            }
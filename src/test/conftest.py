@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import gc
+import os
+import sys
+import timeit
+import tracemalloc
+from typing import Callable, List
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# manual scripts requiring a connected hardware wallet
+collect_ignore = ['ledger_transaction_test.py', 'trezor_basic_test.py']
+
+
+def pytest_addoption(parser):
+    parser.addoption('--benchmark', action='store_true', default=False,
+                     help='run the benchmarks (tests marked with "benchmark"); they are skipped by default')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'benchmark: performance benchmark, run only with the --benchmark option')
+
+
+def pytest_collection_modifyitems(config, items):
+    if not config.getoption('--benchmark'):
+        skip = pytest.mark.skip(reason='benchmark; use the --benchmark option to run it')
+        for item in items:
+            if 'benchmark' in item.keywords:
+                item.add_marker(skip)
+
+
+class Benchmark:
+    """Measuring helpers of the benchmarks; the reported results are printed in the summary of the session."""
+    results: List[str] = []
+
+    @staticmethod
+    def time(fun: Callable, number: int = 1, repeat: int = 5) -> float:
+        """:return: the best time of a single call of fun, in seconds"""
+        return min(timeit.repeat(fun, number=number, repeat=repeat)) / number
+
+    @staticmethod
+    def peak_alloc(fun: Callable) -> int:
+        """:return: the peak size of the memory allocated during a call of fun, in bytes"""
+        gc.collect()
+        tracemalloc.start()
+        try:
+            fun()
+            return tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    def report(self, title: str, *lines: str):
+        self.results.append(title)
+        self.results.extend('    ' + line for line in lines)
+
+
+@pytest.fixture
+def bench():
+    return Benchmark()
+
+
+def pytest_terminal_summary(terminalreporter):
+    if Benchmark.results:
+        terminalreporter.section('benchmark results')
+        for line in Benchmark.results:
+            terminalreporter.write_line(line)
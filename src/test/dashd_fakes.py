@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+"""
+Fake RPC nodes for the DashdInterface tests: the HTTP connections of the connection pool are replaced with
+FakeHTTPConnection objects, passing the JSON-RPC requests to a FakeRpcNode instead of the network.
+"""
+import json
+import threading
+from types import SimpleNamespace
+from typing import Callable, Dict, List
+
+from bitcoinrpc.authproxy import JSONRPCException
+import dashd_intf
+from dashd_intf import DashdInterface, RpcConnectionPool
+
+
+class FakeResponse:
+    def __init__(self, status: int, reason: str, content_type: str, data: bytes):
+        self.status = status
+        self.reason = reason
+        self.content_type = content_type
+        self.data = data
+
+    def getheader(self, name, default=None):
+        if name.lower() == 'content-type':
+            return self.content_type
+        return default
+
+    def read(self):
+        return self.data
+
+
+class FakeSocket:
+    def __init__(self):
+        self.shut_down = threading.Event()
+        self.timeout = None
+
+    def settimeout(self, timeout):
+        self.timeout = timeout
+
+    def shutdown(self, how):
+        self.shut_down.set()
+
+
+class FakeHTTPConnection:
+    def __init__(self, node: 'FakeRpcNode'):
+        self.node = node
+        self.host = node.host
+        self.sock = FakeSocket()
+        self.request_body = None
+        self.closed = False
+
+    def connect(self):
+        if self.node.refuse_connections:
+            raise ConnectionRefusedError('Connection refused')
+
+    def request(self, method, url, body, headers):
+        self.request_body = body
+
+    def getresponse(self):
+        body, self.request_body = self.request_body, None
+        return self.node.handle(self, body)
+
+    def close(self):
+        self.closed = True
+
+
+class FakeConnCfg:
+    """Replaces DashNetworkConnectionCfg."""
+    def __init__(self, host: str):
+        self.host = host
+        self.port = 9998
+        self.username = 'user'
+        self.password = 'pass'
+        self.use_ssl = False
+        self.use_ssh_tunnel = False
+
+    def get_conn_id(self):
+        return self.host
+
+    def get_description(self):
+        return self.host
+
+
+class FakeRpcNode:
+    """
+    Answers the JSON-RPC requests (single and batch) with the functions from 'methods'. Functions raising
+    JSONRPCException give error responses. With 'delay' set, the responses are sent after the delay, unless the
+    socket of the connection is shut down in the meantime. With 'refuse_connections' set, the node behaves as if it
+    was down.
+    """
+    def __init__(self, host: str, methods: Dict[str, Callable], batch_supported: bool = True, delay: float = 0,
+                 reverse_batch_responses: bool = False):
+        self.host = host
+        self.conn_def = FakeConnCfg(host)
+        self.methods = methods
+        self.batch_supported = batch_supported
+        self.delay = delay
+        self.reverse_batch_responses = reverse_batch_responses
+        self.refuse_connections = False
+        self.lock = threading.Lock()
+        self.requests: List = []
+        self.connections: List[FakeHTTPConnection] = []
+
+    def create_http_conn(self) -> FakeHTTPConnection:
+        conn = FakeHTTPConnection(self)
+        with self.lock:
+            self.connections.append(conn)
+        return conn
+
+    def call(self, request: Dict) -> Dict:
+        try:
+            fun = self.methods.get(request['method'])
+            if not fun:
+                raise JSONRPCException({'code': -32601, 'message': 'Method not found'})
+            return {'result': fun(*request['params']), 'error': None, 'id': request['id']}
+        except JSONRPCException as e:
+            return {'result': None, 'error': e.error, 'id': request['id']}
+
+    def handle(self, conn: FakeHTTPConnection, body: str) -> FakeResponse:
+        if self.refuse_connections:
+            raise ConnectionRefusedError('Connection refused')
+        request = json.loads(body)
+        with self.lock:
+            self.requests.append(request)
+        if self.delay and conn.sock.shut_down.wait(self.delay):
+            raise ConnectionResetError('Connection reset by peer')
+        if isinstance(request, list):
+            if not self.batch_supported:
+                response = {'result': None, 'error': {'code': -32700, 'message': 'Top-level object parse error'},
+                            'id': None}
+            else:
+                response = [self.call(r) for r in request]
+                if self.reverse_batch_responses:
+                    response.reverse()  # the JSON-RPC spec allows any order of the batch responses
+        else:
+            response = self.call(request)
+        return FakeResponse(200, 'OK', 'application/json', json.dumps(response).encode('utf-8'))
+
+    def batch_requests(self) -> List[List[Dict]]:
+        return [r for r in self.requests if isinstance(r, list)]
+
+    def single_requests(self) -> List[Dict]:
+        return [r for r in self.requests if isinstance(r, dict)]
+
+
+class FakeRpcConnectionPool(RpcConnectionPool):
+    def __init__(self, node: FakeRpcNode, max_size: int):
+        conn_def = node.conn_def
+        super().__init__(f'http://{conn_def.username}:{conn_def.password}@{conn_def.host}:{conn_def.port}',
+                         conn_def.host, conn_def.port, False, max_size)
+        self.node = node
+
+    def create_http_conn(self, timeout):
+        return self.node.create_http_conn()
+
+
+def install_fake_network(monkeypatch, nodes: List[FakeRpcNode]):
+    """Makes DashdInterface.open_internal create the pools of the fake nodes instead of the network ones."""
+    nodes_by_host = {node.host: node for node in nodes}
+    monkeypatch.setattr(dashd_intf, 'RpcConnectionPool',
+                        lambda rpc_url, rpc_host, rpc_port, use_ssl, max_size:
+                        FakeRpcConnectionPool(nodes_by_host[rpc_host], max_size))
+
+
+def make_dashd_intf(nodes: List[FakeRpcNode], pool_size: int = 4, hedged_requests: bool = False) -> DashdInterface:
+    """DashdInterface connected to the first of the fake nodes, the others being the alternative connections."""
+    intf = DashdInterface(None)
+    intf.app_config = SimpleNamespace(dash_network='TESTNET', rpc_hedged_requests=hedged_requests,
+                                      rpc_conn_pool_size=pool_size, random_dash_net_config=False, tx_cache=None,
+                                      conn_cfg_success=lambda conn_def: None, conn_cfg_failure=lambda conn_def: None)
+    intf.connections = [node.conn_def for node in nodes]
+    intf.cur_conn_def = intf.connections[0]
+    intf.conn_pool = FakeRpcConnectionPool(nodes[0], pool_size)
+    intf.rpc_auth_header = b'Basic dXNlcjpwYXNz'
+    intf.active = True
+    return intf
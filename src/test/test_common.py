@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import pytest
+
+from common import AttrsProtected, set_attrs_protection_enabled
+
+
+class Entry(AttrsProtected):
+    class_value = 1
+
+    def __init__(self):
+        super().__init__()
+        self.name = 'a'
+        self.__amount = 0
+        self.set_attr_protection()
+
+    @property
+    def amount(self):
+        return self.__amount
+
+    @amount.setter
+    def amount(self, value):
+        self.__amount = value
+
+
+class Base(object):
+    def __init__(self):
+        self.base_value = 0
+
+
+class ProtectedFirst(AttrsProtected, Base):
+    def __init__(self):
+        AttrsProtected.__init__(self)
+        Base.__init__(self)
+        self.own_value = 0
+        self.set_attr_protection()
+
+
+class ProtectedLast(Base, AttrsProtected):
+    def __init__(self):
+        Base.__init__(self)
+        AttrsProtected.__init__(self)
+        self.own_value = 0
+        self.set_attr_protection()
+
+
+@pytest.fixture(autouse=True)
+def protection_enabled():
+    set_attrs_protection_enabled(True)
+    yield
+    set_attrs_protection_enabled(True)
+
+
+def assert_rejects_undefined(obj):
+    with pytest.raises(AttributeError, match='Attribute definition protection'):
+        obj.nmae = 'b'
+    assert 'nmae' not in obj.__dict__
+
+
+def test_defined_attributes_assignable():
+    e = Entry()
+    e.name = 'b'
+    e.amount = 10
+    e.class_value = 2
+    assert (e.name, e.amount, e.class_value) == ('b', 10, 2)
+    assert_rejects_undefined(e)
+
+
+def test_add_attribute_restores_protection():
+    e = Entry()
+    e.add_attribute('extra', 5)
+    assert e.extra == 5
+    e.extra = 6
+    assert e.extra == 6
+    assert_rejects_undefined(e)
+
+
+def test_remove_and_set_protection():
+    e = Entry()
+    e.remove_attr_protection()
+    e.later = 1
+    assert e.later == 1
+    e.set_attr_protection()
+    e.later = 2
+    assert_rejects_undefined(e)
+
+
+@pytest.mark.parametrize('cls', [ProtectedFirst, ProtectedLast])
+def test_multiple_inheritance(cls):
+    obj = cls()
+    obj.base_value = 1
+    obj.own_value = 2
+    assert (obj.base_value, obj.own_value) == (1, 2)
+    assert_rejects_undefined(obj)
+
+
+def test_disabled_protection_allows_definitions():
+    set_attrs_protection_enabled(False)
+    e = Entry()
+    e.nmae = 'b'
+    e.amount = 3
+    assert (e.nmae, e.amount) == ('b', 3)
+
+
+def test_toggling_restores_protection():
+    set_attrs_protection_enabled(False)
+    set_attrs_protection_enabled(False)
+    set_attrs_protection_enabled(True)
+    for obj in (Entry(), ProtectedFirst(), ProtectedLast()):
+        assert_rejects_undefined(obj)
+
+
+class PlainEntry(object):
+    """Entry without the attribute protection, the baseline of the benchmarks."""
+    class_value = 1
+
+    def __init__(self):
+        self.name = 'a'
+        self.__amount = 0
+
+    @property
+    def amount(self):
+        return self.__amount
+
+    @amount.setter
+    def amount(self, value):
+        self.__amount = value
+
+
+@pytest.mark.benchmark
+def test_benchmark_creation_and_attribute_writes(bench):
+    def write_attributes(e):
+        e.name = 'b'
+        e.amount = 10
+
+    results = {}
+    for label, cls, enabled in (('protection on', Entry, True), ('protection off', Entry, False),
+                                ('plain object', PlainEntry, True)):
+        set_attrs_protection_enabled(enabled)
+        e = cls()
+        results[label] = (bench.time(cls, number=10000), bench.time(lambda: write_attributes(e), number=10000))
+    bench.report('AttrsProtected, per object creation / per two attribute writes',
+                 *(f'{label}: {create * 1e6:.2f} us / {write * 1e6:.2f} us'
+                   for label, (create, write) in results.items()))
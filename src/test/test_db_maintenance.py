@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import sqlite3
+import time
+
+import pytest
+
+from db_intf import DBCache, UNCONFIRMED_TX_BLOCK_HEIGHT
+
+
+@pytest.fixture
+def db(tmp_path):
+    cache_file = str(tmp_path / 'cache.db')
+    # a cache file created by the app versions not using the incremental auto-vacuum
+    conn = sqlite3.connect(cache_file)
+    conn.execute('CREATE TABLE LIVE_CONFIG(symbol text PRIMARY KEY, value TEXT)')
+    conn.commit()
+    conn.close()
+
+    db = DBCache()
+    db.open(cache_file, str(tmp_path / 'labels.db'))
+    assert db.is_active()
+    yield db
+    db.close()
+
+
+def auto_vacuum_mode(db) -> int:
+    cur = db.get_cursor()
+    try:
+        cur.execute('PRAGMA main.auto_vacuum')
+        return cur.fetchone()[0]
+    finally:
+        db.release_cursor()
+
+
+def test_maintenance_converts_to_incremental_vacuum(db):
+    # the conversion, requiring a full vacuum, is not done on opening the database
+    assert auto_vacuum_mode(db) == 0
+    summary = db.run_maintenance(check_break_fun=lambda: False)
+    assert summary['completed']
+    assert auto_vacuum_mode(db) == 2
+
+
+def test_conversion_to_incremental_vacuum_is_interrupted_on_close(db):
+    cur = db.get_cursor()
+    try:
+        cur.executemany("INSERT INTO address(address, tree_id) VALUES (?, 1)", [(f'Xaddr{i}',) for i in range(5000)])
+        db.commit()
+    finally:
+        db.release_cursor()
+    db.maintenance_stop_event.set()
+
+    summary = db.run_maintenance(check_break_fun=lambda: False)
+    assert not summary['completed']
+    assert auto_vacuum_mode(db) == 0
+
+    # the next maintenance run retries it
+    db.maintenance_stop_event.clear()
+    assert db.run_maintenance(check_break_fun=lambda: False)['completed']
+    assert auto_vacuum_mode(db) == 2
+
+
+def test_maintenance_counts_pruned_inputs_and_outputs(db):
+    old_ts = int(time.time()) - (db.retention_unconfirmed_tx_days + 1) * 86400
+    cur = db.get_cursor()
+    try:
+        cur.execute("INSERT INTO address(id, address, tree_id) VALUES (1, 'XaddrOwn', 1)")
+        for tx_id, ts in ((1, old_ts), (2, old_ts), (3, int(time.time()))):
+            cur.execute("INSERT INTO tx(id, tx_hash, block_height, block_timestamp, coinbase) VALUES (?, ?, ?, ?, 0)",
+                        (tx_id, bytes([tx_id]) * 32, UNCONFIRMED_TX_BLOCK_HEIGHT, ts))
+            cur.execute("INSERT INTO tx_output(address_id, tx_id, output_index, satoshis) VALUES (1, ?, 0, 1000), "
+                        "(1, ?, 1, 2000)", (tx_id, tx_id))
+            cur.execute("INSERT INTO tx_input(src_address_id, tx_id, input_index, satoshis) VALUES (1, ?, 0, -500)",
+                        (tx_id,))
+        db.commit()
+    finally:
+        db.release_cursor()
+
+    summary = db.run_maintenance()
+
+    assert summary['completed']
+    deleted = summary['rows_deleted']
+    assert (deleted['unconfirmed_txs'], deleted['unconfirmed_tx_outputs'], deleted['unconfirmed_tx_inputs']) == \
+           (2, 4, 2)
+    cur = db.get_cursor()
+    try:
+        cur.execute('SELECT id FROM tx')
+        assert cur.fetchall() == [(3,)]
+        cur.execute('SELECT received, balance FROM address WHERE id=1')
+        assert cur.fetchone() == (3000, 2500)
+        cur.execute('PRAGMA main.freelist_count')
+        assert cur.fetchone()[0] == 0
+    finally:
+        db.release_cursor()
+
+
+def test_maintenance_can_be_broken(db):
+    summary = db.run_maintenance(check_break_fun=lambda: True)
+    assert not summary['completed']
+    assert summary['rows_deleted'] == {'unconfirmed_txs': 0, 'unconfirmed_tx_outputs': 0,
+                                       'unconfirmed_tx_inputs': 0}
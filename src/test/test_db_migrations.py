@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import pytest
+
+from db_intf import DBCache
+
+
+MAIN_SCHEMA_VERSION = 9
+LABELS_SCHEMA_VERSION = 1
+
+TX_HASH = 'ab' * 32
+SRC_TX_HASH = 'cd' * 32
+
+# shape of the cache created by the app versions prior to 0.9.33 (before the protx and platform columns, the
+# 'spent_tx_hash' column and the replacement of the address/tx ids with texts in the tx_input/tx_output tables)
+BASELINE_DDL = [
+    "CREATE TABLE masternodes(id INTEGER PRIMARY KEY, ident TEXT, status TEXT, protocol TEXT, payee TEXT, "
+    "last_seen INTEGER, active_seconds INTEGER, last_paid_time INTEGER, last_paid_block INTEGER, ip TEXT, "
+    "dmt_active INTEGER, dmt_create_time TEXT, dmt_deactivation_time TEXT)",
+    "CREATE INDEX IDX_masternodes_DMT_ACTIVE ON masternodes(dmt_active)",
+    "CREATE INDEX IDX_masternodes_IDENT ON masternodes(ident)",
+    "CREATE TABLE voting_results(id INTEGER PRIMARY KEY, proposal_id INTEGER, masternode_ident TEXT, "
+    "voting_time TEXT, voting_result TEXT, hash TEXT)",
+    "CREATE TABLE LIVE_CONFIG(symbol text PRIMARY KEY, value TEXT)",
+    "CREATE TABLE address(id INTEGER PRIMARY KEY, xpub_hash TEXT, parent_id INTEGER, address_index INTEGER, "
+    "address TEXT, path TEXT, tree_id INTEGER, balance INTEGER DEFAULT 0 NOT NULL, "
+    "received INTEGER DEFAULT 0 NOT NULL, is_change INTEGER, last_scan_block_height INTEGER DEFAULT 0 NOT NULL, "
+    "label TEXT, status INTEGER DEFAULT 0)",
+    "CREATE TABLE tx(id INTEGER PRIMARY KEY, tx_hash TEXT, block_height INTEGER, block_timestamp INTEGER, "
+    "coinbase INTEGER)",
+    "CREATE TABLE tx_output(id INTEGER PRIMARY KEY, address_id INTEGER, address TEXT, tx_id INTEGER NOT NULL, "
+    "output_index INTEGER NOT NULL, satoshis INTEGER NOT NULL, spent_tx_id INTEGER, spent_input_index INTEGER, "
+    "script_type TEXT)",
+    "CREATE INDEX tx_output_2 ON tx_output(address_id)",
+    "CREATE INDEX tx_output_4 ON tx_output(spent_tx_id)",
+    "CREATE TABLE tx_input(id INTEGER PRIMARY KEY, src_address_id INTEGER, src_address TEXT, "
+    "tx_id INTEGER NOT NULL, input_index INTEGER NOT NULL, satoshis INTEGER DEFAULT 0, src_tx_id INTEGER, "
+    "src_tx_hash TEXT, src_tx_output_index INTEGER, coinbase INTEGER DEFAULT 0 NOT NULL)",
+    "CREATE INDEX tx_input_2 ON tx_input(src_address_id)",
+    "CREATE INDEX tx_input_5 ON tx_input(src_tx_id)",
+]
+
+
+def open_db(tmp_path, name) -> DBCache:
+    db = DBCache()
+    db.db_cache_file_name = str(tmp_path / (name + '.db'))
+    db.db_labels_file_name = str(tmp_path / (name + '_labels.db'))
+    db.connect()
+    return db
+
+
+def main_steps(db):
+    return [db.migrate_main_1, db.migrate_main_2, db.migrate_main_3, db.migrate_main_4, db.migrate_main_5,
+            db.migrate_main_6, db.migrate_main_7, db.migrate_main_8, db.migrate_main_9]
+
+
+def schema_of(db):
+    cur = db.db_conn.cursor()
+    cur.execute("SELECT type, name FROM sqlite_master WHERE name NOT LIKE 'sqlite_%'")
+    objects = set(cur.fetchall())
+    columns = {}
+    for obj_type, name in objects:
+        if obj_type == 'table':
+            cur.execute(f'PRAGMA table_info({name})')
+            columns[name] = {(c[1], c[2]) for c in cur.fetchall()}
+    return objects, columns
+
+
+def user_versions(db):
+    cur = db.db_conn.cursor()
+    return tuple(cur.execute(f'PRAGMA {schema}.user_version').fetchone()[0] for schema in ('main', 'labels'))
+
+
+@pytest.fixture
+def reference_schema(tmp_path):
+    db = open_db(tmp_path, 'reference')
+    db.create_structures()
+    assert user_versions(db) == (MAIN_SCHEMA_VERSION, LABELS_SCHEMA_VERSION)
+    schema = schema_of(db)
+    db.db_conn.close()
+    return schema
+
+
+def insert_wallet_data(cur, baseline: bool):
+    cur.execute("INSERT INTO address(id, address, tree_id) VALUES (1, 'XaddrOwn', 1)")
+    cur.execute("INSERT INTO tx(id, tx_hash, block_height, block_timestamp, coinbase) VALUES (1, ?, 100, 0, 0)",
+                (TX_HASH,))
+    if baseline:
+        cur.execute("INSERT INTO tx_output(address, tx_id, output_index, satoshis, spent_tx_id) "
+                    "VALUES ('XaddrOwn', 1, 0, 5000, NULL), ('XaddrExternal', 1, 1, 300, NULL)")
+    else:
+        cur.execute("INSERT INTO tx_output(address, tx_id, output_index, satoshis, spent_tx_hash) "
+                    "VALUES ('XaddrOwn', 1, 0, 5000, NULL), ('XaddrExternal', 1, 1, 300, NULL)")
+    cur.execute("INSERT INTO tx_input(src_address, tx_id, input_index, satoshis, src_tx_hash, src_tx_output_index) "
+                "VALUES ('XaddrOwn', 1, 0, -1200, ?, 3)", (SRC_TX_HASH,))
+    cur.execute("INSERT INTO masternodes(ident, status, dmt_active, dmt_create_time) "
+                "VALUES ('aa-0', 'ENABLED', 1, '2023-01-15 10:20:30')")
+
+
+def check_migrated_data(db):
+    cur = db.db_conn.cursor()
+    cur.execute("SELECT tx_hash FROM tx")
+    assert cur.fetchall() == [(bytes.fromhex(TX_HASH),)]
+    cur.execute("SELECT a.address, o.satoshis FROM tx_output o JOIN address a ON a.id=o.address_id "
+                "ORDER BY o.output_index")
+    assert cur.fetchall() == [('XaddrOwn', 5000), ('XaddrExternal', 300)]
+    cur.execute("SELECT src_tx_hash, src_tx_output_index FROM tx_input")
+    assert cur.fetchall() == [(bytes.fromhex(SRC_TX_HASH), 3)]
+    cur.execute("SELECT received, balance, external FROM address WHERE address='XaddrOwn'")
+    assert cur.fetchall() == [(5000, 3800, 0)]
+    cur.execute("SELECT external FROM address WHERE address='XaddrExternal'")
+    assert cur.fetchall() == [(1,)]
+    cur.execute("SELECT ident, typeof(dmt_create_time) FROM masternodes")
+    assert cur.fetchall() == [('aa-0', 'integer')]
+
+
+def test_new_database(reference_schema):
+    objects, columns = reference_schema
+    assert ('trigger', 'tx_output_ai') in objects
+    assert ('index', 'tx_output_6') in objects
+    assert ('index', 'tx_output_3') not in objects
+    assert ('data_hash', 'BLOB') in columns['masternodes']
+    assert ('dmt_create_time', 'INTEGER') in columns['masternodes']
+    assert ('tx_hash', 'BLOB') in columns['tx']
+    assert ('address_id', 'INTEGER') in columns['tx_output']
+    assert 'address' not in {c[0] for c in columns['tx_output']}
+
+
+def test_migration_from_baseline_schema(tmp_path, reference_schema):
+    db = open_db(tmp_path, 'baseline')
+    cur = db.db_conn.cursor()
+    for ddl in BASELINE_DDL:
+        cur.execute(ddl)
+    insert_wallet_data(cur, baseline=True)
+    db.db_conn.commit()
+    assert user_versions(db) == (0, 0)
+
+    db.create_structures()
+
+    assert user_versions(db) == (MAIN_SCHEMA_VERSION, LABELS_SCHEMA_VERSION)
+    assert schema_of(db) == reference_schema
+    check_migrated_data(db)
+    db.db_conn.close()
+
+
+@pytest.mark.parametrize('start_version', range(MAIN_SCHEMA_VERSION))
+def test_migration_from_versioned_schema(tmp_path, reference_schema, start_version):
+    db = open_db(tmp_path, f'v{start_version}')
+    cur = db.db_conn.cursor()
+    # version 0 with migrate_main_1 applied is the shape of the last app version before the schema versioning
+    db.run_migrations(cur, 'main', main_steps(db)[:max(start_version, 1)])
+    cur.execute(f'PRAGMA main.user_version={start_version}')
+    if start_version < 4:
+        insert_wallet_data(cur, baseline=False)
+        db.db_conn.commit()
+
+    db.create_structures()
+
+    assert user_versions(db) == (MAIN_SCHEMA_VERSION, LABELS_SCHEMA_VERSION)
+    assert schema_of(db) == reference_schema
+    if start_version < 4:
+        check_migrated_data(db)
+    db.db_conn.close()
+
+
+def test_migration_is_not_repeated(tmp_path):
+    db = open_db(tmp_path, 'repeat')
+    db.create_structures()
+    cur = db.db_conn.cursor()
+    cur.execute("INSERT INTO masternodes(ident, dmt_active) VALUES ('aa-0', 1)")
+    db.db_conn.commit()
+
+    db.create_structures()
+
+    assert user_versions(db) == (MAIN_SCHEMA_VERSION, LABELS_SCHEMA_VERSION)
+    assert cur.execute("SELECT ident FROM masternodes").fetchall() == [('aa-0',)]
+    db.db_conn.close()
+
+
+def test_failed_migration_step_is_rolled_back(tmp_path):
+    db = open_db(tmp_path, 'failed')
+    cur = db.db_conn.cursor()
+
+    def failing_step(cur):
+        cur.execute("CREATE TABLE new_table(id INTEGER PRIMARY KEY)")
+        raise ValueError('migration error')
+
+    with pytest.raises(ValueError):
+        db.run_migrations(cur, 'main', [db.migrate_main_1, failing_step])
+
+    assert user_versions(db)[0] == 1
+    assert cur.execute("SELECT name FROM sqlite_master WHERE name='new_table'").fetchall() == []
+    db.db_conn.close()
+
+
+def test_migration_repairs_invalid_tx_hashes(tmp_path):
+    db = open_db(tmp_path, 'invalid_hashes')
+    cur = db.db_conn.cursor()
+    db.run_migrations(cur, 'main', main_steps(db)[:3])
+    cur.execute("INSERT INTO address(id, address, tree_id, last_scan_block_height) VALUES "
+                "(1, 'XaddrA', 1, 500), (2, 'XaddrB', 1, 500), (3, 'XaddrC', 1, 500)")
+    cur.execute("INSERT INTO tx(id, tx_hash, block_height, block_timestamp, coinbase) VALUES "
+                "(1, ?, 100, 0, 0), (2, ?, 101, 0, 0), (3, 'not a hash', 102, 0, 0)", (TX_HASH, SRC_TX_HASH))
+    # tx 2 spends the output 0 of tx 1, but the spent mark of the output is damaged
+    cur.execute("INSERT INTO tx_output(id, address, tx_id, output_index, satoshis, spent_tx_hash, spent_input_index) "
+                "VALUES (1, 'XaddrA', 1, 0, 5000, 'zz', 7), (2, 'XaddrB', 2, 0, 4000, NULL, NULL), "
+                "(3, 'XaddrC', 3, 0, 3000, NULL, NULL)")
+    cur.execute("INSERT INTO tx_input(tx_id, input_index, src_address, satoshis, src_tx_hash, src_tx_output_index) "
+                "VALUES (2, 0, 'XaddrA', -5000, ?, 0)", (TX_HASH,))
+    db.db_conn.commit()
+
+    db.create_structures()
+
+    assert user_versions(db)[0] == MAIN_SCHEMA_VERSION
+    cur.execute("SELECT id, tx_hash FROM tx ORDER BY id")
+    assert cur.fetchall() == [(1, bytes.fromhex(TX_HASH)), (2, bytes.fromhex(SRC_TX_HASH))]
+    cur.execute("SELECT id, spent_tx_hash, spent_input_index FROM tx_output ORDER BY id")
+    assert cur.fetchall() == [(1, bytes.fromhex(SRC_TX_HASH), 0), (2, None, None)]
+    # the addresses of the removed/repaired data are rescanned
+    cur.execute("SELECT address, last_scan_block_height FROM address WHERE id <= 3 ORDER BY id")
+    assert cur.fetchall() == [('XaddrA', 0), ('XaddrB', 500), ('XaddrC', 0)]
+    db.db_conn.close()
@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import datetime
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from db_intf import DBCache
+
+
+# local times of the masternode creation/deactivation, as saved in the cache by the app before the schema version 8
+CREATE_TIMES = ['2023-01-15 10:20:30', '2023-07-01 23:59:59.123456']
+DEACTIVATION_TIMES = [None, '2024-08-31 02:30:00']
+
+
+@pytest.fixture
+def local_tz(monkeypatch):
+    # a timezone with DST, so the conversion of the local time texts to epochs is actually checked
+    monkeypatch.setenv('TZ', 'Europe/Warsaw')
+    time.tzset()
+    yield
+    monkeypatch.undo()
+    time.tzset()
+
+
+def create_schema_7_db(tmp_path, rows) -> DBCache:
+    """The cache as left by the app version using schema 7 (text times), with the masternodes of the given rows:
+    (create time, deactivation time)."""
+    db = DBCache()
+    db.db_cache_file_name = str(tmp_path / 'cache.db')
+    db.db_labels_file_name = str(tmp_path / 'labels.db')
+    db.connect()
+    cur = db.db_conn.cursor()
+    db.run_migrations(cur, 'main', [db.migrate_main_1, db.migrate_main_2, db.migrate_main_3, db.migrate_main_4,
+                                    db.migrate_main_5, db.migrate_main_6, db.migrate_main_7])
+    cur.executemany("INSERT INTO masternodes(ident, status, payee, ip, protx_hash, type, dmt_active, "
+                    "dmt_create_time, dmt_deactivation_time, last_paid_block, registered_height) "
+                    "VALUES (?, 'ENABLED', 'XpayeeAddress', '1.2.3.4:9999', ?, 'Regular', ?, ?, ?, ?, NULL)",
+                    [(f'{idx:064x}-0', f'{idx:064x}', 1 if deactivation_time is None else 0, create_time,
+                      deactivation_time, 1000 + idx) for idx, (create_time, deactivation_time) in enumerate(rows)])
+    db.db_conn.commit()
+    return db
+
+
+@pytest.fixture
+def db(tmp_path, local_tz):
+    db = create_schema_7_db(tmp_path, zip(CREATE_TIMES, DEACTIVATION_TIMES))
+    db.create_structures()
+    db.db_active = True
+    yield db
+    db.close()
+
+
+def local_epoch(text):
+    fmt = '%Y-%m-%d %H:%M:%S.%f' if '.' in text else '%Y-%m-%d %H:%M:%S'
+    return int(datetime.datetime.strptime(text, fmt).timestamp())
+
+
+def test_migration_converts_masternode_times_to_epochs(db):
+    cur = db.db_conn.cursor()
+    cur.execute('PRAGMA main.user_version')
+    assert cur.fetchone()[0] >= 8  # the version converting the times
+    cur.execute("SELECT dmt_create_time, dmt_deactivation_time, typeof(dmt_create_time) FROM masternodes "
+                "ORDER BY id")
+    rows = cur.fetchall()
+    assert rows == [(local_epoch(c), local_epoch(d) if d else None, 'integer')
+                    for c, d in zip(CREATE_TIMES, DEACTIVATION_TIMES)]
+
+
+def test_masternode_cache_load_uses_epochs(db):
+    pytest.importorskip('PyQt5')
+    pytest.importorskip('paramiko')
+    pytest.importorskip('bitcoinrpc')
+    from dashd_intf import DashdInterface, Masternode
+
+    masternodes = []
+    removed = []
+    DashdInterface.read_masternode_data_from_db(SimpleNamespace(db_intf=db), masternodes, '1=1', None, removed)
+
+    assert len(masternodes) == 2 and removed == []
+    for mn, create_time, deactivation_time in zip(masternodes, CREATE_TIMES, DEACTIVATION_TIMES):
+        assert isinstance(mn, Masternode)
+        assert mn.dmt_creation_time == local_epoch(create_time)
+        assert mn.dmt_deactivation_time == (local_epoch(deactivation_time) if deactivation_time else None)
+        assert mn.ip_port == '1.2.3.4:9999'
+        assert mn.registered_height == -1  # NULL column mapped to the default of the property
+        assert mn.pose_ban_timestamp == 0
+    assert [mn.lastpaidblock for mn in masternodes] == [1000, 1001]
+    assert [mn.dmt_active for mn in masternodes] == [1, 0]
+
+    # objects created without __init__ still reject undefined attributes
+    with pytest.raises(AttributeError):
+        masternodes[0].not_defined_attr = 1
+    masternodes[0].status = 'POSE_BANNED'
+    assert masternodes[0].status == 'POSE_BANNED'
+
+
+@pytest.mark.benchmark
+def test_benchmark_masternode_cache_load(bench, tmp_path, local_tz):
+    pytest.importorskip('PyQt5')
+    pytest.importorskip('paramiko')
+    pytest.importorskip('bitcoinrpc')
+    from dashd_intf import DashdInterface
+
+    count = 5000
+    rows = [(CREATE_TIMES[idx % 2], DEACTIVATION_TIMES[idx % 2]) for idx in range(count)]
+    db = create_schema_7_db(tmp_path, rows)
+    try:
+        migration_time = bench.time(db.create_structures, repeat=1)
+        db.db_active = True
+        intf = SimpleNamespace(db_intf=db)
+        masternodes = []
+
+        def load():
+            masternodes.clear()
+            DashdInterface.read_masternode_data_from_db(intf, masternodes, '1=1', None, [])
+
+        load_time = bench.time(load)
+        refresh_time = bench.time(lambda: DashdInterface.read_masternode_data_from_db(intf, masternodes, '1=1',
+                                                                                       None, []))
+        assert len(masternodes) == count
+        assert masternodes[1].dmt_deactivation_time == local_epoch(DEACTIVATION_TIMES[1])
+    finally:
+        db.close()
+    # the cost the loader had before the migration to epochs: parsing the time texts of each row
+    parse_time = bench.time(lambda: [local_epoch(t) for row in rows for t in row if t])
+    bench.report(f'Masternode cache load, {count} masternodes',
+                 f'load into a new list: {load_time * 1000:.1f} ms, refresh of the loaded objects: '
+                 f'{refresh_time * 1000:.1f} ms',
+                 f'per-row time text parsing (removed by the migration): {parse_time * 1000:.1f} ms',
+                 f'one-time migration of the times to epochs: {migration_time * 1000:.1f} ms')
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('paramiko')
+pytest.importorskip('bitcoinrpc')
+
+import app_cache
+from bitcoinrpc.authproxy import JSONRPCException
+from dashd_intf import DashdInterface, TxMemCache
+
+# responses of the masternode related RPC calls at the blocks 1000 and 1005 of a test network: between them, one
+# masternode has been removed, one added, one has changed its service address, one has been PoSe-banned, five
+# have been paid and the PoSe penalty of one has been decreasing on each block
+FIXTURE_FILE = os.path.join(os.path.dirname(__file__), 'data', 'masternode_list_1000_1005.json')
+
+
+class FixtureProxy:
+    """Serves the RPC calls used by the masternode list sync from the recorded responses."""
+
+    def __init__(self, fixture, height: int, diff_error: bool = False):
+        self.blocks = {b['height']: b for b in fixture['blocks']}
+        self.diffs = {(d['baseBlockHash'], d['blockHash']): d for d in fixture['protx_diff']}
+        self.payments = fixture['masternode_payments']
+        self.height = height
+        self.diff_error = diff_error
+        self.calls = []
+
+    @property
+    def tip(self):
+        return self.blocks[self.height]
+
+    def getblockcount(self):
+        return self.height
+
+    def getblockhash(self, height):
+        return self.blocks[height]['hash']
+
+    def masternodelist(self, mode, filter_str=None):
+        self.calls.append(('masternodelist', mode) + ((filter_str,) if filter_str else ()))
+        mns = self.tip['masternodelist']
+        if filter_str:
+            return {ident: mn for ident, mn in mns.items() if filter_str in json.dumps(mn)}
+        return mns
+
+    def protx(self, command, *args):
+        self.calls.append(('protx', command) + args)
+        if command == 'list':
+            return self.tip['protx_list']
+        elif command == 'info':
+            return next(p for p in self.tip['protx_list'] if p['proTxHash'] == args[0])
+        elif command == 'diff':
+            if self.diff_error:
+                raise JSONRPCException({'code': -8, 'message': 'block not found'})
+            return self.diffs[args]
+        raise JSONRPCException({'code': -32601, 'message': 'Method not found'})
+
+    def masternode(self, command, block_hash, count):
+        self.calls.append(('masternode', command, block_hash, count))
+        payments = self.payments[block_hash]
+        assert len(payments) == -count
+        return payments
+
+
+@pytest.fixture
+def fixture():
+    with open(FIXTURE_FILE) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def cache(monkeypatch):
+    values = {}
+    monkeypatch.setattr(app_cache, 'get_value', lambda symbol, default, type=None: values.get(symbol, default))
+    monkeypatch.setattr(app_cache, 'set_value', lambda symbol, value: values.__setitem__(symbol, value))
+    return values
+
+
+def make_dashd_intf(proxy: FixtureProxy) -> DashdInterface:
+    intf = DashdInterface.__new__(DashdInterface)
+    intf.masternodes = []
+    intf.masternodes_by_ident = {}
+    intf.masternodes_by_ip_port = {}
+    intf.masternodes_last_db_timestamp = 0
+    intf.app_config = SimpleNamespace(dash_network='TESTNET')
+    intf.db_intf = SimpleNamespace(db_active=False)
+    intf.tx_mem_cache = TxMemCache()
+    intf.last_block_height = 0
+    conn = SimpleNamespace(proxy=proxy)
+    intf.get_thread_conn = lambda: conn
+    intf.open = lambda: True
+    intf.getblockcount = lambda: DashdInterface.getblockcount.__wrapped__(intf)
+    intf.rpc_batch = lambda calls, **kwargs: [getattr(proxy, c[0])(*c[1:]) for c in calls]
+    intf.get_block_timestamps = lambda heights: {h: 1700000000 + (h - 1000) * 157 for h in heights}
+    return intf
+
+
+def get_masternodelist(intf: DashdInterface):
+    # without the control_rpc_call wrapper, which handles the connections
+    return DashdInterface.get_masternodelist.__wrapped__(intf, 'json', data_max_age=0)
+
+
+def mn_list_state(masternodes):
+    return {mn.ident: mn.get_db_values() for mn in masternodes}
+
+
+def full_fetch(fixture, height):
+    proxy = FixtureProxy(fixture, height)
+    return mn_list_state(get_masternodelist(make_dashd_intf(proxy)))
+
+
+def test_diff_sync_equals_full_fetch(fixture, cache):
+    proxy = FixtureProxy(fixture, 1000)
+    intf = make_dashd_intf(proxy)
+    get_masternodelist(intf)
+    before = mn_list_state(intf.masternodes)
+    assert before == full_fetch(fixture, 1000)
+
+    proxy.height = 1005
+    proxy.calls.clear()
+    get_masternodelist(intf)
+
+    assert ('protx', 'list', 'registered', True) not in proxy.calls
+    assert ('masternodelist', 'json') not in proxy.calls
+    after = mn_list_state(intf.masternodes)
+    assert after == full_fetch(fixture, 1005)
+
+    # the fixture covers the removed, added and changed masternodes
+    assert before.keys() - after.keys() and after.keys() - before.keys()
+    changed = {ident for ident in before.keys() & after.keys() if before[ident] != after[ident]}
+    assert len(changed) >= 5
+    assert {mn.status for mn in intf.masternodes} == {'ENABLED', 'POSE_BANNED'}
+    assert cache['MasternodesSyncBlockHash_TESTNET'] == proxy.blocks[1005]['hash']
+    # the tip height is read through getblockcount, which updates the height the caches depend on
+    assert intf.last_block_height == 1005
+
+
+def test_diff_error_falls_back_to_full_fetch(fixture, cache):
+    proxy = FixtureProxy(fixture, 1000, diff_error=True)
+    intf = make_dashd_intf(proxy)
+    get_masternodelist(intf)
+
+    proxy.height = 1005
+    proxy.calls.clear()
+    get_masternodelist(intf)
+
+    assert ('protx', 'diff', proxy.blocks[1000]['hash'], proxy.blocks[1005]['hash']) in proxy.calls
+    assert ('protx', 'list', 'registered', True) in proxy.calls
+    assert ('masternodelist', 'json') in proxy.calls
+    assert mn_list_state(intf.masternodes) == full_fetch(fixture, 1005)
+
+
+def test_no_changes_at_the_same_block(fixture, cache):
+    proxy = FixtureProxy(fixture, 1005)
+    intf = make_dashd_intf(proxy)
+    get_masternodelist(intf)
+    proxy.calls.clear()
+
+    get_masternodelist(intf)
+
+    assert proxy.calls == []
+    assert mn_list_state(intf.masternodes) == full_fetch(fixture, 1005)
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import random
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('paramiko')
+pytest.importorskip('bitcoinrpc')
+
+from dashd_intf import DashdInterface, Masternode
+
+
+def reference_queue_positions(masternodes):
+    """The previous, per-masternode implementation of DashdInterface._update_mn_queue_values, kept as a reference:
+    an Evo masternode is put in the queue four times and positions are found with list.index()."""
+    payment_queue = []
+    for mn in masternodes:
+        if mn.status == 'ENABLED':
+            if mn.lastpaidblock > 0:
+                mn.queue_position = mn.lastpaidblock
+            else:
+                mn.queue_position = mn.registered_height
+
+            if mn.pose_revived_height is not None and mn.pose_revived_height > 0 and \
+                    mn.pose_revived_height > mn.lastpaidblock:
+                mn.queue_position = mn.pose_revived_height
+
+            payment_queue.append(mn)
+            if mn.type == 'Evo':
+                payment_queue.append(mn)
+                payment_queue.append(mn)
+                payment_queue.append(mn)
+        else:
+            mn.queue_position = None
+    payment_queue.sort(key=lambda x: x.queue_position, reverse=False)
+
+    for mn in masternodes:
+        if mn.status == 'ENABLED':
+            mn.queue_position = payment_queue.index(mn) + 1
+
+
+def random_masternodes(rnd: random.Random, count: int):
+    masternodes = []
+    tip = 2000000
+    for idx in range(count):
+        mn = Masternode()
+        mn.ident = f'{idx:064x}-0'
+        mn.status = rnd.choice(['ENABLED'] * 8 + ['POSE_BANNED'])
+        mn.type = rnd.choice(['Regular'] * 3 + ['Evo'])
+        # narrow ranges of heights, so there are many masternodes waiting from the same block
+        mn.registered_height = rnd.randint(tip - 5000, tip - 10)
+        mn.lastpaidblock = rnd.choice([0, -1, rnd.randint(mn.registered_height, tip)])
+        mn.pose_revived_height = rnd.choice([-1, -1, -1, rnd.randint(mn.registered_height, tip)])
+        masternodes.append(mn)
+    return masternodes
+
+
+@pytest.mark.parametrize('seed, count', [(1, 1), (2, 10), (3, 100), (4, 1000), (5, 5000)])
+def test_queue_positions_equal_reference(seed, count):
+    masternodes = random_masternodes(random.Random(seed), count)
+    DashdInterface._update_mn_queue_values(SimpleNamespace(), masternodes)
+    positions = [mn.queue_position for mn in masternodes]
+
+    reference_queue_positions(masternodes)
+    assert positions == [mn.queue_position for mn in masternodes]
+
+
+def test_queue_positions_of_evo_masternodes():
+    masternodes = random_masternodes(random.Random(6), 3)
+    for mn, mn_type, paid in zip(masternodes, ['Evo', 'Regular', 'Regular'], [100, 101, 102]):
+        mn.status = 'ENABLED'
+        mn.type = mn_type
+        mn.lastpaidblock = paid
+        mn.pose_revived_height = -1
+    DashdInterface._update_mn_queue_values(SimpleNamespace(), masternodes)
+
+    assert [mn.queue_position for mn in masternodes] == [1, 5, 6]
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize('count', [5000, 20000])
+def test_benchmark_queue_positions(bench, count):
+    masternodes = random_masternodes(random.Random(7), count)
+    one_pass_time = bench.time(lambda: DashdInterface._update_mn_queue_values(SimpleNamespace(), masternodes))
+    positions = [mn.queue_position for mn in masternodes]
+    reference_time = bench.time(lambda: reference_queue_positions(masternodes), repeat=1)
+    assert positions == [mn.queue_position for mn in masternodes]
+    bench.report(f'Masternode payment queue positions, {count} masternodes',
+                 f'one pass: {one_pass_time * 1000:.1f} ms, previous (list.index): {reference_time * 1000:.1f} ms')
@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import pytest
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('paramiko')
+pytest.importorskip('bitcoinrpc')
+
+from bitcoinrpc.authproxy import JSONRPCException
+from dashd_intf import RPC_BATCH_MAX_SIZE
+from dashd_fakes import FakeRpcNode, make_dashd_intf
+
+
+def getblockhash(height):
+    if height < 0:
+        raise JSONRPCException({'code': -8, 'message': 'Block height out of range'})
+    return f'hash{height}'
+
+
+def make_node(**kwargs) -> FakeRpcNode:
+    return FakeRpcNode('node1', {'getblockhash': getblockhash}, **kwargs)
+
+
+def test_calls_are_split_into_batches():
+    node = make_node()
+    intf = make_dashd_intf([node])
+    count = 2 * RPC_BATCH_MAX_SIZE + 50
+
+    results = intf.rpc_batch([('getblockhash', h) for h in range(count)])
+
+    assert results == [f'hash{h}' for h in range(count)]
+    assert [len(b) for b in node.batch_requests()] == [RPC_BATCH_MAX_SIZE, RPC_BATCH_MAX_SIZE, 50]
+    assert node.single_requests() == []
+    assert intf.get_conn_pool_metrics()['in_use'] == 0
+
+
+def test_results_are_mapped_back_by_id():
+    node = make_node(reverse_batch_responses=True)
+    intf = make_dashd_intf([node])
+
+    results = intf.rpc_batch([['getblockhash', h] for h in (5, 3, 8)])
+
+    assert results == ['hash5', 'hash3', 'hash8']
+    ids = [r['id'] for r in node.batch_requests()[0]]
+    assert len(set(ids)) == 3
+
+
+def test_failed_calls_without_raising():
+    node = make_node()
+    intf = make_dashd_intf([node])
+
+    results = intf.rpc_batch([('getblockhash', 1), ('getblockhash', -1), ('getblockcount',)],
+                             raise_on_error=False)
+
+    assert results[0] == 'hash1'
+    assert isinstance(results[1], JSONRPCException) and results[1].code == -8
+    assert isinstance(results[2], JSONRPCException) and results[2].code == -32601
+
+
+def test_failed_call_raises():
+    intf = make_dashd_intf([make_node()])
+    with pytest.raises(JSONRPCException) as e:
+        intf.rpc_batch([('getblockhash', 1), ('getblockhash', -1)])
+    assert e.value.code == -8
+
+
+def test_fallback_to_single_calls_when_batches_are_not_supported():
+    node = make_node(batch_supported=False)
+    intf = make_dashd_intf([node])
+
+    results = intf.rpc_batch([('getblockhash', h) for h in range(3)] + [('getblockhash', -1)], raise_on_error=False)
+
+    assert results[:3] == ['hash0', 'hash1', 'hash2']
+    assert isinstance(results[3], JSONRPCException)
+    assert len(node.batch_requests()) == 1
+    assert [r['params'] for r in node.single_requests()] == [[0], [1], [2], [-1]]
+    assert intf.conn_features['node1']['rpc_batch'] == {'enabled': False}
+
+    # the node is not asked for a batch again
+    assert intf.rpc_batch([('getblockhash', 7)]) == ['hash7']
+    assert len(node.batch_requests()) == 1
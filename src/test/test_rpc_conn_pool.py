@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('paramiko')
+pytest.importorskip('bitcoinrpc')
+
+from bitcoinrpc.authproxy import JSONRPCException
+from dashd_intf import control_rpc_call
+from dashd_fakes import FakeRpcConnectionPool, FakeRpcNode, install_fake_network, make_dashd_intf
+
+
+def getblockcount_fun(height):
+    def getblockcount():
+        return height
+    return getblockcount
+
+
+def make_node(host: str, height: int = 1000, **kwargs) -> FakeRpcNode:
+    def getblockhash(h):
+        raise JSONRPCException({'code': -8, 'message': 'Block height out of range'})
+    return FakeRpcNode(host, {'getblockcount': getblockcount_fun(height), 'getblockhash': getblockhash}, **kwargs)
+
+
+def wait_until(condition, timeout: float = 5):
+    tm_end = time.time() + timeout
+    while not condition():
+        if time.time() > tm_end:
+            raise TimeoutError()
+        time.sleep(0.005)
+
+
+class ConnHolder(threading.Thread):
+    """Keeps a pool connection as if an RPC call was in progress, until released."""
+    def __init__(self, intf):
+        super().__init__()
+        self.intf = intf
+        self.conn = None
+        self.acquired = threading.Event()
+        self.release = threading.Event()
+
+    def run(self):
+        self.intf.rpc_call_depth_inc()
+        try:
+            self.conn = self.intf.get_thread_conn()
+            self.acquired.set()
+            self.release.wait(5)
+        finally:
+            self.intf.rpc_call_depth_dec()
+
+
+def test_acquire_waits_for_a_free_connection():
+    pool = FakeRpcConnectionPool(make_node('node1'), 2)
+    c1 = pool.acquire()
+    c2 = pool.acquire()
+    acquired = []
+    t = threading.Thread(target=lambda: acquired.append(pool.acquire()))
+    t.start()
+    wait_until(lambda: pool.get_metrics()['wait_count'] == 1)
+    time.sleep(0.05)
+    assert acquired == []
+
+    pool.release(c1)
+    t.join(5)
+    assert acquired == [c1]
+    pool.release(c2)
+    pool.release(c1)
+    m = pool.get_metrics()
+    assert (m['size'], m['in_use'], m['idle'], m['created_count'], m['max_in_use']) == (2, 0, 2, 2, 2)
+
+
+def test_connections_in_use_during_reset_are_closed_on_release():
+    pool = FakeRpcConnectionPool(make_node('node1'), 2)
+    c1 = pool.acquire()
+    c2 = pool.acquire()
+    pool.release(c2)
+    pool.reset()
+    assert c2.http_conn.closed and not c1.http_conn.closed
+
+    pool.release(c1)
+    assert c1.http_conn.closed
+    c3 = pool.acquire()
+    assert c3 is not c1 and c3 is not c2
+    assert pool.get_metrics()['size'] == 1
+
+
+def test_connection_is_released_when_the_outermost_call_ends():
+    intf = make_dashd_intf([make_node('node1')])
+    pool = intf.conn_pool
+
+    @control_rpc_call
+    def outer_call(self):
+        conn = self.get_thread_conn()
+        assert self.getblockcount() == 1000  # nested call uses the connection of the outer one
+        assert self.get_thread_conn() is conn
+        assert pool.get_metrics()['in_use'] == 1
+        return conn
+
+    conn = outer_call(intf)
+    m = pool.get_metrics()
+    assert (m['in_use'], m['idle'], m['created_count']) == (0, 1, 1)
+    assert intf.conn_tls.conn is None and intf.conn_tls.depth == 0
+
+    # the same when the call fails
+    with pytest.raises(JSONRPCException):
+        intf.rpc_call(False, False, 'getblockhash', 5)
+    assert pool.get_metrics()['in_use'] == 0
+    assert conn.http_conn.closed  # reconnects at the next request
+
+
+def test_connection_used_outside_rpc_call_is_released_at_once():
+    intf = make_dashd_intf([make_node('node1')])
+    assert intf.proxy.getblockcount() == 1000
+    m = intf.conn_pool.get_metrics()
+    assert (m['in_use'], m['idle']) == (0, 1)
+    assert getattr(intf.conn_tls, 'conn', None) is None
+
+
+def test_calls_of_different_threads_use_separate_connections():
+    node = make_node('node1', delay=0.1)
+    intf = make_dashd_intf([node], pool_size=4)
+    threads = [threading.Thread(target=intf.getblockcount) for _ in range(3)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join(5)
+    m = intf.conn_pool.get_metrics()
+    assert (m['created_count'], m['max_in_use'], m['in_use']) == (3, 3, 0)
+
+
+def test_switch_to_next_node_drains_the_old_pool(monkeypatch):
+    node1, node2 = make_node('node1', 1000), make_node('node2', 2000)
+    install_fake_network(monkeypatch, [node1, node2])
+    intf = make_dashd_intf([node1, node2])
+    old_pool = intf.conn_pool
+    holder = ConnHolder(intf)
+    holder.start()
+    holder.acquired.wait(5)
+
+    node1.refuse_connections = True
+    assert intf.getblockcount() == 2000
+    assert intf.conn_pool.node is node2 and intf.cur_conn_def is node2.conn_def
+    assert old_pool.closed
+
+    # the call in flight keeps its connection to the old node until finished
+    assert not holder.conn.http_conn.closed
+    holder.release.set()
+    holder.join(5)
+    assert holder.conn.http_conn.closed
+    assert old_pool.get_metrics()['in_use'] == 0
+    assert all(c.closed for c in node1.connections)
+
+
+def test_threads_wait_for_the_switch_to_finish(monkeypatch):
+    node1, node2 = make_node('node1', 1000), make_node('node2', 2000)
+    install_fake_network(monkeypatch, [node1, node2])
+    intf = make_dashd_intf([node1, node2], pool_size=1)
+    holder = ConnHolder(intf)
+    holder.start()
+    holder.acquired.wait(5)
+
+    # this thread waits for the only connection of the pool
+    waiter = ConnHolder(intf)
+    waiter.start()
+    wait_until(lambda: intf.conn_pool.get_metrics()['wait_count'] == 1)
+
+    with intf.conn_state_lock:
+        intf.disconnect()
+        # a thread starting a call during the switch waits for the new pool instead of failing
+        starting = ConnHolder(intf)
+        starting.start()
+        time.sleep(0.05)
+        assert not starting.acquired.is_set()
+        intf.cur_conn_index = 1
+        intf.cur_conn_def = node2.conn_def
+        intf.app_config.rpc_conn_pool_size = 2
+        assert intf.open()
+
+    try:
+        assert waiter.acquired.wait(5) and starting.acquired.wait(5)
+        assert waiter.conn.pool is intf.conn_pool and starting.conn.pool is intf.conn_pool
+        assert waiter.conn is not starting.conn
+    finally:
+        for t in (holder, waiter, starting):
+            t.release.set()
+            t.join(5)
+    assert holder.conn.http_conn.closed
+    assert intf.conn_pool.get_metrics()['in_use'] == 0
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import time
+
+import pytest
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('paramiko')
+pytest.importorskip('bitcoinrpc')
+
+import dashd_intf
+from dashd_fakes import FakeRpcNode, install_fake_network, make_dashd_intf
+
+HEDGE_DELAY = 0.05
+
+
+def make_node(host: str, height: int, **kwargs) -> FakeRpcNode:
+    return FakeRpcNode(host, {'getblockcount': lambda: height}, **kwargs)
+
+
+@pytest.fixture
+def nodes(monkeypatch):
+    monkeypatch.setattr(dashd_intf, 'HEDGE_MIN_DELAY_SECONDS', HEDGE_DELAY)
+    nodes = [make_node('node1', 1000), make_node('node2', 2000)]
+    install_fake_network(monkeypatch, nodes)
+    return nodes
+
+
+@pytest.fixture
+def intf(nodes):
+    intf = make_dashd_intf(nodes, hedged_requests=True)
+    # both nodes are known to respond within 10 ms
+    for node in nodes:
+        stats = intf.get_conn_stats(node.conn_def)
+        for _ in range(dashd_intf.HEDGE_MIN_SAMPLES):
+            stats.record_success(10)
+    yield intf
+    intf.disconnect()
+
+
+def test_fast_primary_call_is_not_hedged(intf, nodes):
+    assert intf.getblockcount() == 1000
+    time.sleep(HEDGE_DELAY * 3)
+
+    assert nodes[1].requests == []
+    assert intf.metrics_hedged_count == 0
+    assert intf.conn_pool.get_metrics()['in_use'] == 0
+
+
+def test_hedged_call_wins_over_slow_primary(intf, nodes):
+    nodes[0].delay = 5
+    tm_begin = time.time()
+
+    assert intf.getblockcount() == 2000
+    assert time.time() - tm_begin < 2
+
+    assert (intf.metrics_hedged_count, intf.metrics_hedge_wins) == (1, 1)
+    # the interrupted connection of the primary call is closed, so it reconnects, and returned to the pool
+    primary_conn = nodes[0].connections[0]
+    assert primary_conn.sock.shut_down.is_set() and primary_conn.closed
+    m = intf.conn_pool.get_metrics()
+    assert (m['in_use'], m['idle']) == (0, 1)
+    assert intf.hedge_pool.get_metrics()['in_use'] == 0
+    assert intf.cur_conn_def is nodes[0].conn_def
+
+
+def test_failed_hedge_does_not_affect_primary_call(intf, nodes):
+    nodes[0].delay = HEDGE_DELAY * 4
+    nodes[1].refuse_connections = True
+    error_rate = intf.get_conn_stats(nodes[1].conn_def).error_rate
+
+    assert intf.getblockcount() == 1000
+
+    assert (intf.metrics_hedged_count, intf.metrics_hedge_wins) == (1, 0)
+    assert len(nodes[1].requests) == 0 and len(nodes[1].connections) == 1
+    assert not nodes[0].connections[0].sock.shut_down.is_set()
+    assert intf.get_conn_stats(nodes[1].conn_def).error_rate > error_rate
+    assert intf.conn_pool.get_metrics()['in_use'] == 0
+    assert intf.hedge_pool.get_metrics()['in_use'] == 0
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import decimal
+import http.client
+import json
+import socket
+import threading
+
+import pytest
+
+from rpc_metrics import CountingSocket, RpcMetrics, LatencyHistogram, transfer_counter
+
+
+def test_counting_socket_counts_bytes_sent_and_received():
+    s1, s2 = socket.socketpair()
+    try:
+        cs = CountingSocket(s1)
+        sent_before = transfer_counter.bytes_sent
+        received_before = transfer_counter.bytes_received
+
+        cs.sendall(b'x' * 1000)
+        assert s2.recv(2000) == b'x' * 1000
+
+        s2.sendall(b'HTTP/1.1 200 OK\r\n' + b'y' * 100)
+        fp = cs.makefile('rb')
+        assert fp.readline() == b'HTTP/1.1 200 OK\r\n'
+        assert fp.read(100) == b'y' * 100
+
+        assert transfer_counter.bytes_sent - sent_before == 1000
+        assert transfer_counter.bytes_received - received_before == 117
+    finally:
+        s1.close()
+        s2.close()
+
+
+def test_latency_histogram_percentiles():
+    h = LatencyHistogram()
+    assert h.percentile(50) is None
+    for ms in range(1, 101):
+        h.add(ms)
+    assert h.count == 100
+    assert 20 <= h.percentile(50) <= 50
+    assert 50 <= h.percentile(95) <= 100
+    assert h.percentile(100) <= h.max_ms == 100
+
+
+def test_rpc_metrics_per_method_and_connection():
+    m = RpcMetrics()
+    m.record_call('getblockcount', 'node1', 10, 100, 200, False, 0, 0)
+    m.record_call('getblockcount', None, 30, 100, 200, True, 1, 1)  # nested call: not counted per connection
+    d = m.to_dict()
+    gbc = d['methods']['getblockcount']
+    assert gbc['call_count'] == 2
+    assert gbc['failure_count'] == 1
+    assert gbc['retry_count'] == 1 and gbc['switch_count'] == 1
+    assert gbc['bytes_sent'] == 200 and gbc['bytes_received'] == 400
+    assert d['connections']['node1']['call_count'] == 1
+
+
+def masternodelist_response(count: int) -> bytes:
+    """HTTP response of the 'masternodelist json' call for a network with 'count' masternodes."""
+    mns = {f'{idx:064x}-0': {
+        'proTxHash': f'{idx:064x}', 'address': f'10.{idx // 65536}.{idx // 256 % 256}.{idx % 256}:9999',
+        'payee': 'X' + f'{idx:033d}', 'status': 'ENABLED', 'type': 'Evo' if idx % 4 == 0 else 'Regular',
+        'pospenaltyscore': 0, 'consecutivePayments': 0, 'lastpaidtime': 1700000000 + idx,
+        'lastpaidblock': 1900000 + idx, 'owneraddress': 'X' + f'{idx:033d}', 'votingaddress': 'X' + f'{idx:033d}',
+        'collateraladdress': 'X' + f'{idx:033d}', 'pubkeyoperator': f'{idx:096x}'} for idx in range(count)}
+    body = json.dumps({'result': mns, 'error': None, 'id': 1}).encode('utf-8')
+    return b'HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nContent-Length: %d\r\n\r\n' % len(body) + body
+
+
+def receive_result(response: bytes, counting: bool):
+    """Reads an RPC response the way AuthServiceProxy does, optionally through CountingSocket."""
+    s1, s2 = socket.socketpair()
+    sender = threading.Thread(target=s2.sendall, args=(response,))
+    sender.start()
+    try:
+        http_response = http.client.HTTPResponse(CountingSocket(s1) if counting else s1)
+        http_response.begin()
+        return json.loads(http_response.read().decode('utf8'), parse_float=decimal.Decimal)['result']
+    finally:
+        sender.join()
+        s1.close()
+        s2.close()
+
+
+@pytest.mark.benchmark
+def test_benchmark_payload_sizing(bench):
+    """
+    Payload sizing of a large 'masternodelist json' result: the former len(str(result)) on the parsed result vs.
+    counting the bytes in CountingSocket while the response is read.
+    """
+    response = masternodelist_response(5000)
+    result = receive_result(response, False)
+
+    received_before = transfer_counter.bytes_received
+    receive_result(response, True)
+    assert transfer_counter.bytes_received - received_before == len(response)
+
+    str_time = bench.time(lambda: len(str(result)))
+    str_peak = bench.peak_alloc(lambda: len(str(result)))
+    plain_time = bench.time(lambda: receive_result(response, False))
+    counting_time = bench.time(lambda: receive_result(response, True))
+    plain_peak = bench.peak_alloc(lambda: receive_result(response, False))
+    counting_peak = bench.peak_alloc(lambda: receive_result(response, True))
+
+    bench.report(f'RPC payload sizing, masternodelist of 5000 entries ({len(response) / 1e6:.1f} MB response)',
+                 f'len(str(result)): {str_time * 1000:.1f} ms, peak allocation {str_peak / 1e6:.1f} MB',
+                 f'reading the response: {plain_time * 1000:.1f} ms plain socket, '
+                 f'{counting_time * 1000:.1f} ms CountingSocket',
+                 f'peak allocation of reading: {plain_peak / 1e6:.1f} MB plain socket, '
+                 f'{counting_peak / 1e6:.1f} MB CountingSocket')
+    # the counting adds no copy of the data, while the string of the former sizing was as big as the response
+    assert counting_peak - plain_peak < str_peak / 10
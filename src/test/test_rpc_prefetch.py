@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import base64
+import gzip
+import json
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('paramiko')
+pytest.importorskip('bitcoinrpc')
+
+import dashd_intf
+from bitcoinrpc.authproxy import JSONRPCException
+from dashd_intf import DashdInterface, RPC_PREFETCH_QUEUE_SIZE
+
+CHUNK_SIZE = 3
+
+
+def compress_result(result):
+    return {'encoding': 'gzip+base64',
+            'encoded_data': base64.b64encode(gzip.compress(json.dumps(result).encode('utf-8'))).decode('ascii')}
+
+
+class ChunkSource:
+    """Replaces the 'getaddressdeltasrawtx_dmt' RPC call, returning tx_count transactions in chunks."""
+    def __init__(self, tx_count: int, fail_at_offset: int = None, compress: bool = False):
+        self.tx_count = tx_count
+        self.fail_at_offset = fail_at_offset
+        self.compress = compress
+        self.offsets = []
+        self.threads = set()
+
+    def __call__(self, addresses, start, end, verbose, include_mempool, start_offset, allow_compression,
+                 max_chunk_prepare_time):
+        self.offsets.append(start_offset)
+        self.threads.add(threading.current_thread())
+        if start_offset == self.fail_at_offset:
+            raise JSONRPCException({'code': -1, 'message': 'chunk failed'})
+        transactions = [{'txid': f'{idx:064x}'} for idx in range(start_offset,
+                                                                  min(start_offset + CHUNK_SIZE, self.tx_count))]
+        result = {'transactions': transactions, 'is_complete': start_offset + CHUNK_SIZE >= self.tx_count}
+        return compress_result(result) if self.compress else result
+
+
+def make_intf(source: ChunkSource) -> DashdInterface:
+    intf = DashdInterface(None)
+    intf._getaddressdeltasrawtx_dmt_chunk = source
+    return intf
+
+
+def prefetch(intf):
+    return intf.prefetch_addressdeltasrawtx_dmt_chunks(['Xaddr'], 1, 1000, 1, 0)
+
+
+def txids(chunk):
+    return [int(tx['txid'], 16) for tx in chunk]
+
+
+def wait_until(condition, timeout: float = 5):
+    tm_end = time.time() + timeout
+    while not condition():
+        if time.time() > tm_end:
+            raise TimeoutError()
+        time.sleep(0.005)
+
+
+@pytest.mark.parametrize('compress', [False, True], ids=['plain', 'compressed'])
+def test_chunks_are_yielded_in_order(compress):
+    source = ChunkSource(10, compress=compress)
+    chunks = [txids(c) for c in prefetch(make_intf(source))]
+
+    assert chunks == [[0, 1, 2], [3, 4, 5], [6, 7, 8], [9]]
+    assert source.offsets == [0, 3, 6, 9]
+    assert threading.current_thread() not in source.threads
+
+
+def test_decompress_in_blocks(monkeypatch):
+    monkeypatch.setattr(dashd_intf, 'RPC_DECODE_BLOCK_SIZE', 16)
+    result = {'transactions': [{'txid': f'{idx:064x}', 'hex': 'ab' * idx} for idx in range(50)]}
+    assert DashdInterface(None).decompress_rpc_result(compress_result(result)) == result
+
+
+def test_worker_exception_reaches_the_consumer():
+    source = ChunkSource(10, fail_at_offset=3)
+    gen = prefetch(make_intf(source))
+
+    assert txids(next(gen)) == [0, 1, 2]
+    with pytest.raises(JSONRPCException) as e:
+        next(gen)
+    assert e.value.message == 'chunk failed'
+    assert source.offsets == [0, 3]
+
+
+def test_producer_stops_when_the_queue_is_full():
+    source = ChunkSource(100 * CHUNK_SIZE)
+    gen = prefetch(make_intf(source))
+
+    assert txids(next(gen)) == [0, 1, 2]
+    # the consumed chunk, the full queue and one more chunk waiting to be put in it
+    expected_fetches = RPC_PREFETCH_QUEUE_SIZE + 2
+    wait_until(lambda: len(source.offsets) >= expected_fetches)
+    time.sleep(0.2)
+    assert len(source.offsets) == expected_fetches
+
+    rest = [txid for chunk in gen for txid in txids(chunk)]
+    assert rest == list(range(CHUNK_SIZE, 100 * CHUNK_SIZE))
+
+
+def test_thread_exits_when_the_generator_is_abandoned():
+    source = ChunkSource(100 * CHUNK_SIZE)
+    gen = prefetch(make_intf(source))
+    next(gen)
+    wait_until(lambda: len(source.offsets) >= RPC_PREFETCH_QUEUE_SIZE + 2)
+    (thread,) = source.threads
+
+    del gen
+    thread.join(5)
+    assert not thread.is_alive()
+    assert len(source.offsets) == RPC_PREFETCH_QUEUE_SIZE + 2
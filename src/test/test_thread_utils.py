@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import threading
+import time
+
+import pytest
+
+import thread_utils
+from thread_utils import EnhRLock
+
+
+@pytest.fixture(params=[False, True], ids=['default', 'diagnostics'])
+def save_call_stack(request, monkeypatch):
+    monkeypatch.setattr(thread_utils, 'SAVE_CALL_STACK', request.param)
+    return request.param
+
+
+def test_owner_info_points_to_the_caller(save_call_stack):
+    lock = EnhRLock()
+    lock.acquire()
+    line = test_owner_info_points_to_the_caller.__code__.co_firstlineno + 2
+    try:
+        blocker = lock.blocker
+        assert blocker.thread is threading.current_thread()
+        assert blocker.file_name == __file__
+        assert blocker.line_number == line
+        assert bool(blocker.call_stack) == save_call_stack
+        if save_call_stack:
+            assert lock.owner_info is None
+        else:
+            assert lock.owner_caller is None
+    finally:
+        lock.release()
+    assert lock.blocker is None
+
+
+def test_reentrant_acquire_keeps_the_first_owner(save_call_stack):
+    lock = EnhRLock()
+    with lock:
+        first = lock.blocker
+        with lock:
+            assert lock.depth == 2
+            assert lock.blocker.line_number == first.line_number
+        assert lock.depth == 1
+        assert lock.blocker is not None
+    assert lock.depth == 0
+    assert lock.blocker is None
+
+
+def test_release_from_not_owning_thread_raises(save_call_stack):
+    lock = EnhRLock()
+    errors = []
+
+    def release():
+        try:
+            lock.release()
+        except Exception as e:
+            errors.append(str(e))
+
+    with lock:
+        t = threading.Thread(target=release)
+        t.start()
+        t.join()
+        assert lock.depth == 1
+    assert errors == ['Cannot release not owned lock']
+
+
+def test_contended_acquire_records_waiter(save_call_stack):
+    lock = EnhRLock()
+    acquired = threading.Event()
+
+    def worker():
+        lock.acquire()
+        acquired.set()
+        lock.release()
+
+    with lock:
+        t = threading.Thread(target=worker)
+        t.start()
+        for _ in range(200):
+            if lock.waiters:
+                break
+            time.sleep(0.01)
+        assert [w.thread for w in lock.waiters] == [t]
+        assert lock.waiters[0].file_name == __file__
+        waiter, locker = EnhRLock.detect_deadlock(t)
+        assert waiter is lock.waiters[0]
+        assert locker.thread is threading.current_thread()
+    t.join()
+    assert acquired.is_set()
+    assert lock.waiters == []
+
+
+@pytest.mark.benchmark
+def test_benchmark_acquire_release(bench, save_call_stack):
+    def acquire_release(lock):
+        lock.acquire()
+        lock.release()
+
+    def nested_acquire_release(lock):
+        with lock:
+            with lock:
+                pass
+
+    lines = []
+    for name, fun in (('acquire/release', acquire_release), ('nested acquire/release', nested_acquire_release)):
+        lock, rlock = EnhRLock(), threading.RLock()
+        enh_time = bench.time(lambda: fun(lock), number=2000)
+        base_time = bench.time(lambda: fun(rlock), number=2000)
+        lines.append(f'{name}: {enh_time * 1e6:.2f} us, threading.RLock: {base_time * 1e6:.2f} us '
+                     f'({enh_time / base_time:.1f}x)')
+    bench.report(f'EnhRLock, {"diagnostics" if save_call_stack else "default"} mode, uncontended', *lines)
@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import json
+import os
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+pytest.importorskip('bitcoinrpc')
+
+from bitcoinrpc.authproxy import EncodeDecimal
+from tx_cache import TxCacheStore, UNCONFIRMED_VALID_SECONDS
+
+TXID = 'ab' * 32
+TX = {'txid': TXID, 'confirmations': 10, 'vout': [{'value': Decimal('1.23456789'), 'n': 0}]}
+UNCONFIRMED_TX = {'txid': 'cd' * 32, 'vout': [{'value': Decimal('0.5'), 'n': 0}]}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = TxCacheStore(str(tmp_path))
+    store.open()
+    yield store
+    store.close()
+
+
+def write_legacy_file(cache_dir, prefix: str, key: str, value) -> str:
+    file_name = os.path.join(cache_dir, prefix + key + '.json')
+    with open(file_name, 'w') as fp:
+        json.dump(value, fp, default=EncodeDecimal)
+    return file_name
+
+
+def read_entries(store):
+    with store.lock:
+        return {row[0]: row[1:] for row in
+                store.db_conn.execute('SELECT key, confirmed, size FROM cache_entry').fetchall()}
+
+
+def test_put_get_keeps_decimals(store):
+    store.put('tx-1-' + TXID, TX)
+    store.put('blockhash-100', '00' * 32)
+
+    tx = store.get('tx-1-' + TXID)
+    assert tx == TX
+    assert isinstance(tx['vout'][0]['value'], Decimal)
+    assert store.get('blockhash-100') == '00' * 32
+    assert store.get('blockhash-101') is None
+    assert store.total_size == sum(size for _, size in read_entries(store).values())
+
+
+def test_get_from_another_thread_does_not_wait_for_the_writer(store):
+    store.put('tx-1-' + TXID, TX)
+    results = []
+    with store.lock:
+        t = threading.Thread(target=lambda: results.append(store.get('tx-1-' + TXID)))
+        t.start()
+        t.join(5)
+        assert results == [TX]
+
+
+def test_import_legacy_files(tmp_path):
+    cache_dir = str(tmp_path)
+    files = [write_legacy_file(cache_dir, 'insight_dash_', 'tx-1-' + TXID, TX),
+             write_legacy_file(cache_dir, 'insight_dash_', 'tx-1-' + UNCONFIRMED_TX['txid'], UNCONFIRMED_TX),
+             write_legacy_file(cache_dir, 'insight_dash_testnet_', 'blockhash-100', '00' * 32)]
+    broken_file = os.path.join(cache_dir, 'insight_dash_tx-1-broken.json')
+    with open(broken_file, 'w') as fp:
+        fp.write('{"txid": ')
+    other_file = write_legacy_file(cache_dir, 'other_', 'blockhash-100', '11' * 32)
+
+    store = TxCacheStore(cache_dir)
+    store.open()
+    try:
+        store.import_thread.join(10)
+        assert not store.legacy_files_present
+        assert not any(os.path.exists(f) for f in files + [broken_file])
+        assert os.path.exists(other_file)
+
+        entries = read_entries(store)
+        assert entries.keys() == {'tx-1-' + TXID, 'tx-1-' + UNCONFIRMED_TX['txid'], 'blockhash-100'}
+        assert entries['tx-1-' + TXID][0] == 1
+        assert entries['tx-1-' + UNCONFIRMED_TX['txid']][0] == 0
+        assert store.get('tx-1-' + TXID) == TX
+        assert store.get('blockhash-100') == '00' * 32
+    finally:
+        store.close()
+
+
+def test_get_imports_legacy_file_on_demand(store, tmp_path):
+    # a file not imported yet by the background import
+    file_name = write_legacy_file(str(tmp_path), 'insight_dash_', 'tx-1-' + TXID, TX)
+    store.legacy_files_present = True
+
+    assert store.get('tx-1-' + TXID) == TX
+    assert not os.path.exists(file_name)
+    assert 'tx-1-' + TXID in read_entries(store)
+
+    store.legacy_files_present = False
+    assert store.get('tx-1-' + TXID) == TX
+
+
+def add_entry(store, key: str, confirmed: bool, create_age: int, access_age: int, size: int = 1000):
+    now = int(time.time())
+    with store.lock:
+        store.put_internal(key, b'x' * size, confirmed, now - create_age, replace=True)
+        store.db_conn.execute('UPDATE cache_entry SET access_time=? WHERE key=?', (now - access_age, key))
+        store.db_conn.commit()
+
+
+@pytest.fixture
+def filled_store(store):
+    """Five confirmed entries, the oldest ones being accessed the longest time ago, and two unconfirmed ones."""
+    day = 24 * 60 * 60
+    for idx in range(5):
+        add_entry(store, f'tx-1-c{idx}', True, 100 * day, (10 - idx) * day)
+    add_entry(store, 'tx-1-u-old', False, UNCONFIRMED_VALID_SECONDS + 60, 0)
+    add_entry(store, 'tx-1-u-new', False, 60, 0)
+    assert store.total_size == 7000
+    return store
+
+
+def test_evict_removes_outdated_unconfirmed_entries_only(filled_store):
+    filled_store.max_size_bytes = 10000
+    filled_store.evict()
+
+    # confirmed entries don't expire, however old they are
+    assert read_entries(filled_store).keys() == {f'tx-1-c{idx}' for idx in range(5)} | {'tx-1-u-new'}
+    assert filled_store.total_size == 6000
+
+
+def test_evict_removes_least_recently_used_entries_down_to_90_percent(filled_store):
+    filled_store.max_size_bytes = 5000
+    filled_store.evict()
+
+    # unconfirmed entries go first, then the least recently used confirmed ones
+    assert read_entries(filled_store).keys() == {f'tx-1-c{idx}' for idx in range(1, 5)}
+    assert filled_store.total_size == 4000 <= filled_store.max_size_bytes * 0.9
+
+
+def test_put_over_the_limit_evicts(filled_store):
+    filled_store.max_size_bytes = 7010
+    filled_store.put('blockhash-100', '00' * 32)
+
+    entries = read_entries(filled_store)
+    assert 'blockhash-100' in entries and 'tx-1-u-old' not in entries
+    assert filled_store.total_size <= 7010 * 0.9
+    assert 'tx-1-c0' in entries
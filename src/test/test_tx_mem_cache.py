@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import pytest
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('paramiko')
+pytest.importorskip('bitcoinrpc')
+
+from dashd_intf import TxMemCache
+from dashd_fakes import FakeRpcNode, make_dashd_intf
+
+
+def make_tx(txid: str, hex_len: int = 1000, confirmations: int = 1):
+    return {'txid': txid, 'hex': '0' * hex_len, 'confirmations': confirmations}
+
+
+def test_lru_eviction_by_size():
+    tx_size = TxMemCache.estimate_size(make_tx('a'))
+    cache = TxMemCache(max_bytes=3 * tx_size)
+    for txid in 'abc':
+        cache.put(txid, 1, make_tx(txid), True)
+    assert cache.size == 3 * tx_size
+
+    cache.get('a', 1)  # 'b' becomes the least recently used
+    cache.put('d', 1, make_tx('d'), True)
+    assert [key[0] for key in cache.entries] == ['c', 'a', 'd']
+    assert cache.get('b', 1) is None
+
+    # a bigger entry evicts as many entries as needed
+    big_tx = make_tx('e', hex_len=2000)
+    cache.put('e', 1, big_tx, True)
+    assert [key[0] for key in cache.entries] == ['d', 'e']
+    assert cache.size == tx_size + TxMemCache.estimate_size(big_tx) <= cache.max_bytes
+
+
+def test_put_replaces_entry_and_its_size():
+    cache = TxMemCache()
+    cache.put('a', 1, make_tx('a', confirmations=0), False)
+    cache.put('a', 1, make_tx('a', hex_len=500), True)
+    assert cache.size == TxMemCache.estimate_size(make_tx('a', hex_len=500))
+    assert cache.unconfirmed_keys == set()
+
+    cache.put('a', 0, '00' * 100, True)  # non-verbose result is a separate entry
+    assert len(cache.entries) == 2
+
+
+def test_invalidate_unconfirmed():
+    cache = TxMemCache()
+    cache.put('a', 1, make_tx('a'), True)
+    cache.put('b', 1, make_tx('b', confirmations=0), False)
+    cache.invalidate_unconfirmed()
+    assert cache.get('a', 1) is not None
+    assert cache.get('b', 1) is None
+    assert cache.size == TxMemCache.estimate_size(make_tx('a'))
+
+
+def test_new_block_invalidates_unconfirmed_transactions():
+    height = [1000]
+    txes = {'a': make_tx('a'), 'b': make_tx('b', confirmations=0)}
+    node = FakeRpcNode('node1', {'getblockcount': lambda: height[0],
+                                 'getrawtransaction': lambda txid, verbose: txes[txid]})
+    intf = make_dashd_intf([node])
+
+    assert intf.getblockcount() == 1000
+    intf.getrawtransaction('a', 1)
+    intf.getrawtransaction('b', 1)
+    assert intf.getblockcount() == 1000
+    assert len(intf.tx_mem_cache.entries) == 2
+
+    height[0] = 1001
+    intf.getblockcount()
+    assert [key[0] for key in intf.tx_mem_cache.entries] == ['a']
+    assert intf.last_block_height == 1001
+
+
+def test_hit_and_miss_counters():
+    node = FakeRpcNode('node1', {'getrawtransaction': lambda txid, verbose: make_tx(txid)})
+    intf = make_dashd_intf([node])
+
+    tx = intf.getrawtransaction('a', 1)
+    assert intf.getrawtransaction('a', 1) is tx
+    assert intf.getrawtransactions(['a', 'b'], 1) == {'a': tx, 'b': make_tx('b')}
+    assert len(node.single_requests()) == 1  # the second tx has been fetched in a batch
+
+    metrics = intf.get_tx_mem_cache_metrics()
+    assert (metrics['hits'], metrics['misses'], metrics['entries']) == (2, 2, 2)
+    assert metrics['size_bytes'] == 2 * TxMemCache.estimate_size(tx)
+
+    intf.reset_metrics()
+    metrics = intf.get_tx_mem_cache_metrics()
+    assert (metrics['hits'], metrics['misses'], metrics['entries']) == (0, 0, 2)
+
+    # transactions are fetched again when the cache is skipped
+    intf.getrawtransaction('a', 1, skip_cache=True)
+    assert len(node.single_requests()) == 2
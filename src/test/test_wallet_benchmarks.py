@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import os
+import random
+import shutil
+import sqlite3
+import time
+
+import pytest
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('paramiko')
+pytest.importorskip('bitcoinrpc')
+
+from db_intf import DBCache
+from test_wallet_query_plans import ACCOUNT_IDS, MemoryDBIntf, WalletQueries, populate
+
+
+class ReconnectingDBCache(DBCache):
+    """DBCache as it was before the persistent connection: a new connection, with the default settings, is opened
+    for each session (the cursor depth going from 0 to 1) and closed at its end; reads use the same session."""
+
+    def connect(self):
+        self.db_conn = sqlite3.connect(self.db_cache_file_name, check_same_thread=False)
+        self.db_conn.execute(f"attach database '{self.db_labels_file_name}' as labels")
+
+    def get_cursor(self):
+        self.lock.acquire()
+        self.depth += 1
+        if self.depth == 1:
+            self.connect()
+        return self.db_conn.cursor()
+
+    def release_cursor(self):
+        try:
+            self.depth -= 1
+            if self.depth == 0:
+                self.db_conn.close()
+                self.db_conn = None
+        finally:
+            self.lock.release()
+
+    get_read_cursor = get_cursor
+    release_read_cursor = release_cursor
+
+
+@pytest.fixture(scope='module')
+def wallet_db_files(tmp_path_factory):
+    """Cache and labels files of the test_wallet_query_plans' wallet, created by the current DBCache."""
+    path = tmp_path_factory.mktemp('wallet')
+    files = str(path / 'cache.db'), str(path / 'labels.db')
+    db = DBCache()
+    db.open(*files)
+    db.get_cursor()
+    try:
+        populate(db.db_conn)
+    finally:
+        db.release_cursor()
+    db.close()
+    return files
+
+
+def open_db(db_class, files, path):
+    copies = []
+    for file_name in files:
+        copies.append(str(path / os.path.basename(file_name)))
+        shutil.copyfile(file_name, copies[-1])
+    if db_class is ReconnectingDBCache:
+        for file_name in copies:
+            conn = sqlite3.connect(file_name)
+            conn.execute('PRAGMA journal_mode=DELETE')
+            conn.close()
+    db = db_class()
+    db.open(*copies)
+    return db
+
+
+def list_txs(wallet, account_id):
+    cur = wallet.db_intf.get_read_cursor()
+    try:
+        wallet._prepare_cursor_for_txs_list(cur, account_id, None)
+        return cur.fetchall()
+    finally:
+        wallet.db_intf.release_read_cursor()
+
+
+@pytest.mark.benchmark
+def test_benchmark_wallet_operations_latency(bench, wallet_db_files, tmp_path):
+    account = type('Account', (), {'id': ACCOUNT_IDS[0], 'last_verify_balance_ts': None})()
+    operations = {
+        'list_utxos_for_account': lambda w: list(w.list_utxos_for_account(ACCOUNT_IDS[0])),
+        'list_txs (account)': lambda w: list_txs(w, ACCOUNT_IDS[0]),
+        '_update_addr_balances': lambda w: w._update_addr_balances(account),
+    }
+    times = {}
+    results = {}
+    for db_class, label in ((ReconnectingDBCache, 'before'), (DBCache, 'after')):
+        path = tmp_path / label
+        path.mkdir()
+        db = open_db(db_class, wallet_db_files, path)
+        try:
+            wallet = WalletQueries(db)
+            for name, op in operations.items():
+                results[label, name] = op(wallet)
+                times[label, name] = bench.time(lambda: op(wallet), number=20)
+        finally:
+            db.close()
+
+    for name in operations:
+        assert results['before', name] == results['after', name]
+    bench.report('Bip44Wallet operations, 2000 txs, per-session connection (before) vs persistent one (after)',
+                 *(f'{name}: {times["before", name] * 1000:.3f} ms -> {times["after", name] * 1000:.3f} ms'
+                   for name in operations))
+
+
+def hash_of(tx_id: int) -> str:
+    return tx_id.to_bytes(32, 'big').hex()
+
+
+def create_hex_hashes_db(path, tx_count: int) -> DBCache:
+    """Cache at the schema version 3, with hex transaction hashes; each transaction has two outputs, the first one
+    spent by the next transaction."""
+    db = DBCache()
+    db.db_cache_file_name = str(path / 'cache.db')
+    db.db_labels_file_name = str(path / 'labels.db')
+    db.connect()
+    cur = db.db_conn.cursor()
+    db.run_migrations(cur, 'main', [db.migrate_main_1, db.migrate_main_2, db.migrate_main_3])
+    cur.executemany("INSERT INTO tx(id, tx_hash, block_height, block_timestamp, coinbase) VALUES (?, ?, ?, ?, 0)",
+                    ((tx_id, hash_of(tx_id), 1000 + tx_id, 1600000000 + tx_id) for tx_id in range(1, tx_count + 1)))
+    cur.executemany("INSERT INTO tx_output(address, tx_id, output_index, satoshis, spent_tx_hash, spent_input_index) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    ((f'Xaddr{(tx_id + idx) % 500}', tx_id, idx, 100000 if idx == 0 else 5000,
+                      hash_of(tx_id + 1) if idx == 0 and tx_id < tx_count else None, 0 if idx == 0 else None)
+                     for tx_id in range(1, tx_count + 1) for idx in (0, 1)))
+    cur.executemany("INSERT INTO tx_input(src_address, tx_id, input_index, satoshis, src_tx_hash, "
+                    "src_tx_output_index) VALUES (?, ?, 0, -100000, ?, 0)",
+                    ((f'Xaddr{(tx_id - 1) % 500}', tx_id, hash_of(tx_id - 1)) for tx_id in range(2, tx_count + 1)))
+    db.db_conn.commit()
+    return db
+
+
+def hash_lookups(db, hashes):
+    """The hash lookups of the wallet: a transaction, the input spending an output and the output spent by an input."""
+    cur = db.db_conn.cursor()
+    for tx_hash in hashes:
+        cur.execute('SELECT id FROM tx WHERE tx_hash=?', (tx_hash,)).fetchone()
+        cur.execute('SELECT id FROM tx_input WHERE src_tx_hash=? AND src_tx_output_index=0', (tx_hash,)).fetchone()
+        cur.execute('SELECT id FROM tx_output WHERE spent_tx_hash=?', (tx_hash,)).fetchone()
+
+
+@pytest.mark.benchmark
+def test_benchmark_tx_hash_blobs(bench, tmp_path):
+    tx_count = 50000
+    text_path, blob_path = tmp_path / 'text', tmp_path / 'blob'
+    text_path.mkdir()
+    blob_path.mkdir()
+    db = create_hex_hashes_db(text_path, tx_count)
+    db.close()
+    for file_name in ('cache.db', 'labels.db'):
+        shutil.copyfile(str(text_path / file_name), str(blob_path / file_name))
+
+    dbs = {}
+    for label, path in (('hex text', text_path), ('blob', blob_path)):
+        db = DBCache()
+        db.db_cache_file_name = str(path / 'cache.db')
+        db.db_labels_file_name = str(path / 'labels.db')
+        db.connect()
+        dbs[label] = db
+    tm_begin = time.time()
+    db = dbs['blob']
+    db.run_migrations(db.db_conn.cursor(), 'main', [db.migrate_main_1, db.migrate_main_2, db.migrate_main_3,
+                                                    db.migrate_main_4])
+    migration_time = time.time() - tm_begin
+
+    sample = random.Random(1).sample(range(1, tx_count + 1), 5000)
+    lines = []
+    try:
+        for label, db in dbs.items():
+            db.db_conn.execute('VACUUM')
+            db.db_conn.execute('PRAGMA wal_checkpoint(TRUNCATE)')
+            size = os.path.getsize(db.db_cache_file_name)
+            hashes = [hash_of(tx_id) if label == 'hex text' else bytes.fromhex(hash_of(tx_id)) for tx_id in sample]
+            found = db.db_conn.execute('SELECT count(*) FROM tx WHERE tx_hash IN (?, ?)', hashes[:2]).fetchone()
+            assert found == (2,)
+            lookup_time = bench.time(lambda: hash_lookups(db, hashes), repeat=3) / len(hashes)
+            lines.append(f'{label}: db size {size / 2 ** 20:.1f} MB, lookups {lookup_time * 1e6:.1f} us per hash '
+                         f'(3 queries)')
+    finally:
+        for db in dbs.values():
+            db.close()
+    bench.report(f'Wallet tx hashes, {tx_count} txs, {2 * tx_count} outputs, hex text vs 32-byte blobs',
+                 *lines, f'migration to blobs: {migration_time:.2f} s')
+
+
+def fill_temp_ids_table(ids, db_cursor):
+    """The way id lists were passed to the wallet queries before the json_each parameter."""
+    db_cursor.execute("CREATE TEMPORARY TABLE IF NOT EXISTS temp_ids(id INTEGER PRIMARY KEY)")
+    db_cursor.execute('delete from temp_ids')
+    db_cursor.executemany('insert into temp_ids(id) values(?)', [(id,) for id in ids])
+
+
+@pytest.mark.benchmark
+def test_benchmark_id_list_queries(bench):
+    db_intf = MemoryDBIntf()
+    populate(db_intf.conn)
+    wallet = WalletQueries(db_intf)
+    cur = db_intf.get_cursor()
+    cur.execute('SELECT min(id), max(id) FROM address WHERE parent_id IS NOT NULL')
+    first_addr_id, last_addr_id = cur.fetchone()
+
+    def list_utxos(ids):
+        wallet.utxos_added = dict.fromkeys(ids)
+        return list(wallet.list_utxos_for_account(None, only_new=True))
+
+    def list_txs_for_addresses(ids):
+        wallet._prepare_cursor_for_txs_list(cur, None, ids)
+        return cur.fetchall()
+
+    lines = []
+    for count in (10, 1000, 20000):
+        output_ids = list(range(1, count + 1))
+        # the wallet's addresses first, then ids not present in the db
+        address_ids = list(range(first_addr_id, first_addr_id + count))
+        times = {
+            'json_each param': bench.time(lambda: wallet._ids_param(address_ids), number=10),
+            'temp table fill': bench.time(lambda: fill_temp_ids_table(address_ids, cur), number=10),
+            'list_utxos_for_account(only_new)': bench.time(lambda: list_utxos(output_ids), repeat=3),
+            'list_txs': bench.time(lambda: list_txs_for_addresses(address_ids), repeat=3),
+        }
+        db_intf.conn.rollback()
+        db_intf.statements.clear()
+        assert len(list_txs_for_addresses(address_ids)) > 0
+        lines.append(f'{count} ids: ' + ', '.join(f'{name} {t * 1000:.2f} ms' for name, t in times.items()))
+    db_intf.release_cursor()
+    bench.report(f'Wallet queries with id lists (ids of {last_addr_id - first_addr_id + 1} addresses, '
+                 f'2000 txs)', *lines)
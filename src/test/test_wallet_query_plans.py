@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+import re
+from typing import List, Tuple
+
+import pytest
+
+pytest.importorskip('PyQt5')
+pytest.importorskip('paramiko')
+pytest.importorskip('bitcoinrpc')
+
+from bip44_wallet import Bip44Wallet
+from db_intf import DBCache
+
+TREE_ID = 1
+ACCOUNT_IDS = (1, 2)
+
+
+class RecordingCursor:
+    """Cursor wrapper recording the statements executed by the wallet's methods."""
+
+    def __init__(self, cursor, statements: List[Tuple[str, tuple]]):
+        self.cursor = cursor
+        self.statements = statements
+
+    def execute(self, sql, params=()):
+        self.statements.append((sql, tuple(params)))
+        return self.cursor.execute(sql, params)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+
+class MemoryDBIntf:
+    def __init__(self):
+        db = DBCache()
+        db.db_cache_file_name = ':memory:'
+        db.db_labels_file_name = ':memory:'
+        db.connect()
+        db.create_structures()
+        self.conn = db.db_conn
+        self.statements: List[Tuple[str, tuple]] = []
+
+    def get_cursor(self):
+        return RecordingCursor(self.conn.cursor(), self.statements)
+
+    get_read_cursor = get_cursor
+
+    def release_cursor(self):
+        pass
+
+    release_read_cursor = release_cursor
+
+    def commit(self):
+        self.conn.commit()
+
+
+class WalletQueries:
+    """Runs the wallet's query methods with the state they need, without the hw session and the network."""
+
+    _ids_param = staticmethod(Bip44Wallet._ids_param)
+    _wrap_txid = Bip44Wallet._wrap_txid
+    _unwrap_txid = Bip44Wallet._unwrap_txid
+    _parse_addrs_str_gen = Bip44Wallet._parse_addrs_str_gen
+    _prepare_cursor_for_txs_list = Bip44Wallet._prepare_cursor_for_txs_list
+    _verify_addr_balances = Bip44Wallet._verify_addr_balances
+    _resolve_address_ids = Bip44Wallet._resolve_address_ids
+    get_address_id = Bip44Wallet.get_address_id
+    list_utxos_for_account = Bip44Wallet.list_utxos_for_account
+    _update_addr_balances = Bip44Wallet._update_addr_balances
+    _process_tx_input_entry = Bip44Wallet._process_tx_input_entry
+
+    def __init__(self, db_intf):
+        self.db_intf = db_intf
+        self._Bip44Wallet__tree_id = TREE_ID
+        self.utxos_added = {}
+        self.addresses_by_id = {}
+        self.address_ids_by_address = {}
+        self.addr_bal_updated = {}
+        self.on_address_data_changed_callback = None
+
+    def validate_hd_tree(self):
+        pass
+
+    def get_tree_id(self):
+        return TREE_ID
+
+    def _get_utxo(self, *args):
+        return args
+
+    def _get_account_by_id(self, *args, **kwargs):
+        return None
+
+
+def populate(conn):
+    """Wallet cache with two accounts, their addresses and transactions; statistics are gathered as the app's
+    maintenance does."""
+    cur = conn.cursor()
+    wallet_addr_ids = []
+    external_addr_ids = []
+    for account_id in ACCOUNT_IDS:
+        cur.execute("INSERT INTO address(id, xpub_hash, address_index, tree_id) VALUES (?, ?, ?, ?)",
+                    (account_id, f'xpub{account_id}', 0x80000000 + account_id, TREE_ID))
+    addr_id = 100
+    for account_id in ACCOUNT_IDS:
+        for change in (0, 1):
+            change_id = addr_id
+            cur.execute("INSERT INTO address(id, parent_id, address_index, tree_id) VALUES (?, ?, ?, ?)",
+                        (change_id, account_id, change, TREE_ID))
+            addr_id += 1
+            for idx in range(50):
+                cur.execute("INSERT INTO address(id, parent_id, address_index, address, tree_id) "
+                            "VALUES (?, ?, ?, ?, ?)", (addr_id, change_id, idx, f'Xaddr{addr_id}', TREE_ID))
+                wallet_addr_ids.append(addr_id)
+                addr_id += 1
+    for idx in range(500):
+        cur.execute("INSERT INTO address(address, external) VALUES (?, 1)", (f'Xext{idx}',))
+        external_addr_ids.append(cur.lastrowid)
+
+    for tx_id in range(1, 2001):
+        cur.execute("INSERT INTO tx(id, tx_hash, block_height, block_timestamp, coinbase) VALUES (?, ?, ?, ?, 0)",
+                    (tx_id, tx_id.to_bytes(32, 'big'), 1000 + tx_id, 1600000000 + tx_id))
+        dest_id = wallet_addr_ids[tx_id % len(wallet_addr_ids)]
+        cur.execute("INSERT INTO tx_output(address_id, tx_id, output_index, satoshis) VALUES (?, ?, 0, 100000)",
+                    (dest_id, tx_id))
+        cur.execute("INSERT INTO tx_output(address_id, tx_id, output_index, satoshis) VALUES (?, ?, 1, 5000)",
+                    (external_addr_ids[tx_id % len(external_addr_ids)], tx_id))
+        if tx_id > 1:
+            src_id = wallet_addr_ids[(tx_id - 1) % len(wallet_addr_ids)]
+            cur.execute("INSERT INTO tx_input(src_address_id, tx_id, input_index, satoshis, src_tx_hash, "
+                        "src_tx_output_index) VALUES (?, ?, 0, -100000, ?, 0)",
+                        (src_id, tx_id, (tx_id - 1).to_bytes(32, 'big')))
+            cur.execute("UPDATE tx_output SET spent_tx_hash=?, spent_input_index=0 WHERE tx_id=? AND output_index=0",
+                        (tx_id.to_bytes(32, 'big'), tx_id - 1))
+    conn.commit()
+    cur.execute('ANALYZE')
+    conn.commit()
+
+
+@pytest.fixture(scope='module')
+def db_intf():
+    db_intf = MemoryDBIntf()
+    populate(db_intf.conn)
+    return db_intf
+
+
+@pytest.fixture
+def wallet(db_intf):
+    db_intf.statements.clear()
+    return WalletQueries(db_intf)
+
+
+def query_plans(db_intf) -> List[Tuple[str, List[str]]]:
+    """EXPLAIN QUERY PLAN details of the statements recorded since the last wallet fixture call."""
+    plans = []
+    cur = db_intf.conn.cursor()
+    for sql, params in db_intf.statements:
+        cur.execute('EXPLAIN QUERY PLAN ' + sql, params)
+        plans.append((sql, [row[3] for row in cur.fetchall()]))
+    return plans
+
+
+def assert_no_scans(plans):
+    for sql, plan in plans:
+        # json_each is the table function expanding the id list parameter
+        scans = [p for p in plan if re.match(r'SCAN (?!json_each)', p)]
+        assert not scans, f'Full scan in the plan of: {sql}\n' + '\n'.join(plan)
+
+
+def plan_lines(plans) -> List[str]:
+    return [line for _, plan in plans for line in plan]
+
+
+@pytest.mark.parametrize('account_id', [ACCOUNT_IDS[0], None])
+def test_list_utxos_for_account_uses_indexes(wallet, db_intf, account_id):
+    assert list(wallet.list_utxos_for_account(account_id))
+
+    plans = query_plans(db_intf)
+    assert_no_scans(plans)
+    assert 'SEARCH o USING COVERING INDEX tx_output_6 (address_id=?)' in plan_lines(plans)
+
+
+@pytest.mark.parametrize('account_id, address_ids', [(ACCOUNT_IDS[0], None), (None, [150, 151, 152])])
+def test_list_txs_uses_indexes(wallet, db_intf, account_id, address_ids):
+    # the query of list_txs
+    cur = db_intf.get_cursor()
+    wallet._prepare_cursor_for_txs_list(cur, account_id, address_ids)
+    assert cur.fetchall()
+
+    plans = query_plans(db_intf)
+    assert_no_scans(plans)
+    lines = plan_lines(plans)
+    assert 'SEARCH i USING COVERING INDEX tx_input_6 (src_address_id=?)' in lines
+    assert 'SEARCH o USING COVERING INDEX tx_output_6 (address_id=?)' in lines
+
+
+def test_update_addr_balances_for_account_uses_indexes(wallet, db_intf):
+    account = type('Account', (), {'id': ACCOUNT_IDS[0], 'last_verify_balance_ts': None})()
+    wallet._update_addr_balances(account)
+
+    plans = query_plans(db_intf)
+    assert_no_scans(plans)
+    lines = plan_lines(plans)
+    assert any(re.match(r'SEARCH a USING (COVERING )?INDEX idx_address_6 \(parent_id=\?\)', l) for l in lines)
+    assert any(re.match(r'SEARCH o USING (COVERING )?INDEX tx_output_6 \(address_id=\?\)', l) for l in lines)
+    assert any(re.match(r'SEARCH i USING (COVERING )?INDEX tx_input_6 \(src_address_id=\?\)', l) for l in lines)
+
+
+def test_update_addr_balances_for_addresses_uses_indexes(wallet, db_intf):
+    wallet._update_addr_balances(None, [150, 151, 152])
+
+    plans = query_plans(db_intf)
+    assert_no_scans(plans)
+    assert any(re.match(r'SEARCH a USING (COVERING )?INDEX idx_address_6 \(parent_id=\?\)', l)
+               for l in plan_lines(plans))
+
+
+def test_process_tx_input_entry_uses_indexes(wallet, db_intf):
+    # a new input of a cached transaction, spending an output of another one
+    tx_json = {'vin': [{'txid': (1500).to_bytes(32, 'big').hex(), 'vout': 0, 'valueSat': 100000},
+                       {'txid': (1400).to_bytes(32, 'big').hex(), 'vout': 1, 'valueSat': 5000,
+                        'address': 'Xext0'}]}
+    wallet._process_tx_input_entry(db_intf.get_cursor(), 1501, (1501).to_bytes(32, 'big'), 1, tx_json)
+    db_intf.conn.rollback()
+
+    plans = query_plans(db_intf)
+    assert_no_scans(plans)
+    lines = plan_lines(plans)
+    assert 'SEARCH tx_input USING INDEX tx_input_1 (tx_id=? AND input_index=?)' in lines
+    assert 'SEARCH tx_output USING INDEX tx_output_1 (tx_id=? AND output_index=?)' in lines
+    assert 'SEARCH tx USING COVERING INDEX tx_1 (tx_hash=?)' in lines
+    assert any(re.match(r'SEARCH address USING (COVERING )?INDEX idx_address_5 \(address=\?\)', l) for l in lines)
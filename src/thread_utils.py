@@ -4,15 +4,21 @@
 # Created on: 2017-10
 
 import logging
+import os
+import sys
 import threading
 import time
 import traceback
 from typing import Dict, Tuple, Optional, List
 
-SAVE_CALL_STACK = True
+# Saving the full call stack of lock owners/waiters (shown in deadlock reports) is expensive, so it is enabled only
+# for diagnostics, e.g. by setting the DMT_LOCK_DIAGNOSTICS environment variable to 1
+SAVE_CALL_STACK = os.environ.get('DMT_LOCK_DIAGNOSTICS', '0') == '1'
 
 
 class LockCaller:
+    __slots__ = ('thread', 'file_name', 'line_number', 'call_stack', 'time')
+
     def __init__(self, thread, calling_filename, calling_line_number, call_stack):
         self.thread = thread
         self.file_name = calling_filename
@@ -37,7 +43,8 @@ class EnhRLock:
     def __init__(self, stackinfo_skip_lines=0):
         self.__lock = threading.RLock()
         self.waiters = []
-        self.blocker = None
+        self.owner_info: Optional[Tuple] = None  # (thread ident, file name, line number, time) of the lock owner
+        self.owner_caller: Optional[LockCaller] = None  # set instead of owner_info in the diagnostics mode
         self.depth = 0
         self.stackinfo_skip_lines = stackinfo_skip_lines
         try:
@@ -59,36 +66,59 @@ class EnhRLock:
     def __exit__(self, type, value, traceback):
         self.release()
 
-    def acquire(self):
+    @property
+    def blocker(self) -> Optional[LockCaller]:
+        """Information on the thread owning the lock, used in the deadlock detection."""
+        owner_info = self.owner_info
+        if owner_info is not None:
+            thread = next((t for t in threading.enumerate() if t.ident == owner_info[0]), None)
+            caller = LockCaller(thread, owner_info[1], owner_info[2], [])
+            caller.time = owner_info[3]
+            return caller
+        return self.owner_caller
+
+    def get_caller(self) -> LockCaller:
         stack = traceback.extract_stack()
-        if len(stack) >= 2 + self.stackinfo_skip_lines:
-            calling_filename, calling_line_number, _, _ = stack[-2 - self.stackinfo_skip_lines]
+        if len(stack) >= 3 + self.stackinfo_skip_lines:
+            calling_filename, calling_line_number, _, _ = stack[-3 - self.stackinfo_skip_lines]
         else:
             calling_filename, calling_line_number = '', ''
+        return LockCaller(threading.current_thread(), calling_filename, calling_line_number,
+                          clean_call_stack(stack))
 
-        thread = threading.current_thread()
-
-        if SAVE_CALL_STACK:  # used in diagnostics
-            call_stack = clean_call_stack(stack)
-        else:
-            call_stack = []
-
-        waiter = LockCaller(thread, calling_filename, calling_line_number, call_stack)
-        self.waiters.append(waiter)
-        self.__lock.acquire()
+    def acquire(self):
+        if not self.__lock.acquire(blocking=False):
+            # the lock is owned by another thread; record the waiter for the deadlock detection
+            if SAVE_CALL_STACK:
+                waiter = self.get_caller()
+            else:
+                frame = sys._getframe(1 + self.stackinfo_skip_lines)
+                waiter = LockCaller(threading.current_thread(), frame.f_code.co_filename, frame.f_lineno, [])
+            self.waiters.append(waiter)
+            self.__lock.acquire()
+            self.waiters.remove(waiter)
 
         self.depth += 1
-        self.waiters.remove(waiter)
-        del waiter
-
-        self.blocker = LockCaller(thread, calling_filename, calling_line_number, call_stack)
+        if self.depth == 1:
+            if SAVE_CALL_STACK:
+                self.owner_caller = self.get_caller()
+            else:
+                frame = sys._getframe(1 + self.stackinfo_skip_lines)
+                self.owner_info = (threading.get_ident(), frame.f_code.co_filename, frame.f_lineno, time.time())
 
     def release(self):
-        if self.blocker is not None and self.blocker.thread != threading.current_thread():
+        if self.owner_info is not None:
+            owner_ident = self.owner_info[0]
+        elif self.owner_caller is not None:
+            owner_ident = self.owner_caller.thread.ident
+        else:
+            owner_ident = None
+        if owner_ident is not None and owner_ident != threading.get_ident():
             raise Exception('Cannot release not owned lock')
         self.depth -= 1
         if self.depth == 0:
-            self.blocker = None
+            self.owner_info = None
+            self.owner_caller = None
         self.__lock.release()
 
     def is_thread_waiting_for_me(self, checked_thread):
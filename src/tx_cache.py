@@ -0,0 +1,286 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+# Author: Bertrand256
+# Created on: 2026-10
+
+"""
+Single-file (sqlite) store for the raw results of the 'getrawtransaction', 'getblockhash' and 'getblockheader'
+RPC calls, replacing the per-call 'insight_dash_*.json' cache files.
+"""
+import decimal
+import glob
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import urllib.parse
+import zlib
+from typing import Any, List, Optional
+
+from bitcoinrpc.authproxy import EncodeDecimal
+
+
+log = logging.getLogger('dmt.tx_cache')
+
+TX_CACHE_FILE_NAME = 'tx_cache.db'
+TX_CACHE_MAX_SIZE_MB = 1024
+UNCONFIRMED_VALID_SECONDS = 60 * 60  # unconfirmed data (mempool transactions) are evicted after this time
+LAST_ACCESS_UPDATE_SECONDS = 24 * 60 * 60  # don't update access time more often to avoid a write on every read
+LEGACY_FILE_PREFIXES = ('insight_dash_testnet_', 'insight_dash_')
+
+
+class TxCacheStore(object):
+    """
+    Key-value store of RPC call results, where the key is the same identifier that has been used in the names of
+    the legacy JSON cache files (e.g. 'tx-1-<txid>', 'blockhash-<height>', 'blockheader-<hash>'). Values are
+    kept as zlib-compressed JSON.
+
+    Confirmed data never expire by age; when the total size of the stored data exceeds the limit, the least
+    recently used entries are evicted (unconfirmed ones first).
+
+    Writes go through a single connection guarded by 'lock'. Lookups use a read-only connection of the calling
+    thread, so the wallet, signing and mempool threads don't wait for each other nor for the writer (in WAL mode
+    readers see the last committed state).
+    """
+
+    def __init__(self, cache_dir: str, max_size_mb: int = TX_CACHE_MAX_SIZE_MB):
+        self.cache_dir = cache_dir
+        self.db_file_name = os.path.join(cache_dir, TX_CACHE_FILE_NAME)
+        self.max_size_bytes = max_size_mb * 1024 * 1024
+        self.lock = threading.RLock()
+        self.db_conn: Optional[sqlite3.Connection] = None
+        self.read_conn_tls = threading.local()
+        self.read_conns: List[sqlite3.Connection] = []  # read-only connections of all threads
+        self.read_conns_lock = threading.Lock()
+        self.read_conns_generation = 0  # incremented when the read-only connections are closed
+        self.total_size = 0
+        self.import_thread: Optional[threading.Thread] = None
+        self.legacy_files_present = False
+        self.finishing = False
+
+    def open(self):
+        with self.lock:
+            if self.db_conn is None:
+                self.db_conn = sqlite3.connect(self.db_file_name, check_same_thread=False)
+                self.db_conn.execute('PRAGMA journal_mode=WAL')
+                self.db_conn.execute('PRAGMA synchronous=NORMAL')
+                cur = self.db_conn.cursor()
+                cur.execute("CREATE TABLE IF NOT EXISTS cache_entry(key TEXT PRIMARY KEY, data BLOB NOT NULL, "
+                            "size INTEGER NOT NULL, confirmed INTEGER NOT NULL, create_time INTEGER NOT NULL, "
+                            "access_time INTEGER NOT NULL)")
+                cur.execute("CREATE INDEX IF NOT EXISTS cache_entry_1 ON cache_entry(confirmed, access_time)")
+                cur.execute("SELECT ifnull(sum(size), 0) FROM cache_entry")
+                self.total_size = cur.fetchone()[0]
+                self.db_conn.commit()
+
+        self.legacy_files_present = self.legacy_files_exist()
+        if self.legacy_files_present:
+            self.finishing = False
+            self.import_thread = threading.Thread(target=self.import_legacy_files, name='TxCacheImport',
+                                                  daemon=True)
+            self.import_thread.start()
+
+    def close(self):
+        self.finishing = True
+        if self.import_thread:
+            self.import_thread.join()
+            self.import_thread = None
+        with self.lock:
+            self.close_read_conns()
+            if self.db_conn is not None:
+                self.db_conn.close()
+                self.db_conn = None
+
+    def close_read_conns(self):
+        with self.read_conns_lock:
+            self.read_conns_generation += 1
+            for conn in self.read_conns:
+                try:
+                    conn.close()
+                except Exception as e:
+                    log.warning('Error while closing read-only connection: ' + str(e))
+            self.read_conns.clear()
+
+    def get_read_conn(self) -> Optional[sqlite3.Connection]:
+        """Returns the read-only connection of the calling thread."""
+        if self.db_conn is None:
+            return None
+        tls = self.read_conn_tls
+        conn = getattr(tls, 'conn', None)
+        if conn is None or tls.generation != self.read_conns_generation:
+            with self.read_conns_lock:
+                conn = sqlite3.connect('file:' + urllib.parse.quote(os.path.abspath(self.db_file_name)) + '?mode=ro',
+                                       uri=True, check_same_thread=False)
+                self.read_conns.append(conn)
+                tls.conn = conn
+                tls.generation = self.read_conns_generation
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        data = None
+        conn = self.get_read_conn()
+        if conn is not None:
+            # fetchall finishes the statement, so the connection doesn't keep an old snapshot of the database
+            rows = conn.execute("SELECT data, access_time FROM cache_entry WHERE key=?", (key,)).fetchall()
+            if rows:
+                data, access_time = rows[0]
+                now = int(time.time())
+                if now - access_time > LAST_ACCESS_UPDATE_SECONDS:
+                    with self.lock:
+                        if self.db_conn is not None:
+                            self.db_conn.execute("UPDATE cache_entry SET access_time=? WHERE key=?", (now, key))
+                            self.db_conn.commit()
+
+        if data is not None:
+            try:
+                return json.loads(zlib.decompress(data).decode('utf-8'), parse_float=decimal.Decimal)
+            except Exception:
+                log.exception('Cannot decode data of the cache entry: ' + key)
+                return None
+        elif self.legacy_files_present:
+            # the data could be in a legacy cache file which hasn't been imported yet
+            return self.import_legacy_file(key)
+        return None
+
+    def put(self, key: str, value: Any, confirmed: bool = True):
+        data = zlib.compress(json.dumps(value, default=EncodeDecimal).encode('utf-8'))
+        with self.lock:
+            if self.db_conn is not None:
+                self.put_internal(key, data, confirmed, int(time.time()), replace=True)
+                self.db_conn.commit()
+                if self.total_size > self.max_size_bytes:
+                    self.evict()
+
+    def put_internal(self, key: str, data: bytes, confirmed: bool, create_time: int, replace: bool):
+        cur = self.db_conn.cursor()
+        cur.execute("SELECT size FROM cache_entry WHERE key=?", (key,))
+        row = cur.fetchone()
+        if row:
+            if not replace:
+                return
+            self.total_size -= row[0]
+        cur.execute("INSERT OR REPLACE INTO cache_entry(key, data, size, confirmed, create_time, access_time) "
+                    "VALUES(?,?,?,?,?,?)", (key, data, len(data), 1 if confirmed else 0, create_time,
+                                            int(time.time())))
+        self.total_size += len(data)
+
+    def evict(self):
+        """
+        Removes outdated unconfirmed entries and then the least recently used ones until the size of the stored
+        data drops to 90% of the limit.
+        """
+        with self.lock:
+            tm_begin = time.time()
+            size_before = self.total_size
+            cur = self.db_conn.cursor()
+            cur.execute("DELETE FROM cache_entry WHERE confirmed=0 AND create_time<?",
+                        (int(time.time()) - UNCONFIRMED_VALID_SECONDS,))
+
+            cur.execute("SELECT ifnull(sum(size), 0) FROM cache_entry")
+            self.total_size = cur.fetchone()[0]
+            target_size = int(self.max_size_bytes * 0.9)
+            if self.total_size > target_size:
+                cur.execute("SELECT key, size FROM cache_entry ORDER BY confirmed, access_time")
+                keys = []
+                size_to_free = self.total_size - target_size
+                for key, size in cur.fetchall():
+                    keys.append((key,))
+                    size_to_free -= size
+                    if size_to_free <= 0:
+                        break
+                cur.executemany("DELETE FROM cache_entry WHERE key=?", keys)
+                cur.execute("SELECT ifnull(sum(size), 0) FROM cache_entry")
+                self.total_size = cur.fetchone()[0]
+            self.db_conn.commit()
+            log.info(f'Transaction cache eviction freed {size_before - self.total_size} bytes in '
+                     f'{round(time.time() - tm_begin, 2)} s')
+
+    def legacy_file_name(self, key: str) -> Optional[str]:
+        for prefix in LEGACY_FILE_PREFIXES:
+            file_name = os.path.join(self.cache_dir, prefix + key + '.json')
+            if os.path.exists(file_name):
+                return file_name
+        return None
+
+    def legacy_files_exist(self) -> bool:
+        for file_name in glob.iglob(os.path.join(self.cache_dir, 'insight_dash_*.json')):
+            return True
+        return False
+
+    def import_legacy_file(self, key: str) -> Optional[Any]:
+        try:
+            file_name = self.legacy_file_name(key)
+            if file_name:
+                with open(file_name) as fp:
+                    value = json.load(fp, parse_float=decimal.Decimal)
+                confirmed = not (isinstance(value, dict) and 'txid' in value and not value.get('confirmations'))
+                self.put(key, value, confirmed)
+                os.remove(file_name)
+                return value
+        except Exception:
+            log.exception('Error while importing a legacy cache file for ' + key)
+        return None
+
+    def import_legacy_files(self):
+        """
+        One-time import of the legacy 'insight_dash_*.json' cache files into the store. Imported files are removed.
+        """
+        tm_begin = time.time()
+        count = 0
+        try:
+            batch = []
+            for file_name in glob.iglob(os.path.join(self.cache_dir, 'insight_dash_*.json')):
+                if self.finishing:
+                    break
+                base_name = os.path.basename(file_name)[:-len('.json')]
+                key = None
+                for prefix in LEGACY_FILE_PREFIXES:
+                    if base_name.startswith(prefix):
+                        key = base_name[len(prefix):]
+                        break
+                if not key:
+                    continue
+                try:
+                    create_time = int(os.path.getctime(file_name))
+                    with open(file_name, 'rb') as fp:
+                        raw = fp.read()
+                    value = json.loads(raw.decode('utf-8'), parse_float=decimal.Decimal)
+                    confirmed = not (isinstance(value, dict) and 'txid' in value and not value.get('confirmations'))
+                    batch.append((key, zlib.compress(raw), confirmed, create_time, file_name))
+                except FileNotFoundError:
+                    continue  # file has been imported on demand in the meantime
+                except Exception as e:
+                    log.warning(f'Cannot import cache file {file_name}: {str(e)}')
+                    batch.append((None, None, None, None, file_name))
+
+                if len(batch) >= 1000:
+                    self.save_import_batch(batch)
+                    count += len(batch)
+                    batch.clear()
+            if batch:
+                self.save_import_batch(batch)
+                count += len(batch)
+            if not self.finishing:
+                self.legacy_files_present = False
+        except Exception:
+            log.exception('Error while importing legacy cache files')
+        log.info(f'Imported {count} legacy cache files in {round(time.time() - tm_begin, 2)} s')
+
+    def save_import_batch(self, batch):
+        with self.lock:
+            if self.db_conn is None:
+                return
+            for key, data, confirmed, create_time, _ in batch:
+                if key:
+                    # don't overwrite data that could have been fetched from the network in the meantime
+                    self.put_internal(key, data, confirmed, create_time, replace=False)
+            self.db_conn.commit()
+            if self.total_size > self.max_size_bytes:
+                self.evict()
+        for _, _, _, _, file_name in batch:
+            try:
+                os.remove(file_name)
+            except Exception:
+                pass